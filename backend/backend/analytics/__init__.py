@@ -4,9 +4,13 @@ Analytics package: file I/O, KPIs, charts, orders, and tables.
 Import from submodules, e.g.:
   from backend.analytics.io import read_uploaded_file
   from backend.analytics.kpis import calculate_kpis
+
+Components accept either a raw DataFrame or a PreparedDataset; build the latter
+once with prepare_dataset(df) when running several components on the same data.
 """
 
 from .io import read_uploaded_file
+from .prepared import PreparedDataset, prepare_dataset, as_prepared, filter_by_date
 from .kpis import calculate_kpis
 from .charts import (
     linechart,
@@ -25,9 +29,19 @@ from .orders import (
     top_products_by_orders_component,
 )
 from .tables import table_component, orders_list_component
+from .timeseries import GRANULARITIES, daily_base, time_series
+
+# Bump whenever a change alters the payload computed for the same file:
+# re-uploads only reuse stored analytics computed with the current version.
+ANALYTICS_VERSION = 2
 
 __all__ = [
+    "ANALYTICS_VERSION",
     "read_uploaded_file",
+    "PreparedDataset",
+    "prepare_dataset",
+    "as_prepared",
+    "filter_by_date",
     "calculate_kpis",
     "linechart",
     "comparison_bar_chart",
@@ -43,4 +57,7 @@ __all__ = [
     "top_products_by_orders_component",
     "table_component",
     "orders_list_component",
+    "GRANULARITIES",
+    "daily_base",
+    "time_series",
 ]
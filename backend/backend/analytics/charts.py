@@ -4,9 +4,11 @@ Chart data builders: line, bar, pie, map, comparison, multiline, top-products, m
 
 import pandas as pd
 
-from .utils import find_date_col, find_column_by_keywords
+from .prepared import as_prepared
+from .timeseries import GRANULARITIES, daily_base, period_labels
 from .constants import (
     PIE_MAX_SEGMENTS,
+    LINECHART_MAX_POINTS,
     REGION_COORDS,
     STATE_COORDS,
     COUNTRY_COORDS,
@@ -16,88 +18,179 @@ from . import utils as analytics_utils
 # Maximum products returned by top_products_by_revenue_chart
 TOP_PRODUCTS_MAX = 6
 
-
-def _find_product_col(df):
-    """Return the first product/category column found in df."""
-    for c in ("product name", "product_name", "productname", "product"):
-        if c in df.columns:
-            return c
-    for c in ("category", "sub-category", "sub_category"):
-        if c in df.columns:
-            return c
-    return None
+LINECHART_MODES = ("bucketed", "lttb", "per_row")
+# Mode used when none is requested: the frontend's line chart still expects
+# one point per row, so bucketed/LTTB series are opt-in via linechart_mode.
+LINECHART_DEFAULT_MODE = "per_row"
+# multiline_chart granularity → (pandas period alias, label format string)
+MULTILINE_GRANULARITIES = GRANULARITIES
+# Bucket widths tried in order by the bucketed line chart (pandas period aliases)
+LINECHART_BUCKETS = (
+    ("daily", "D"),
+    ("weekly", "W"),
+    ("monthly", "M"),
+    ("quarterly", "Q"),
+    ("yearly", "Y"),
+)
 
 
-def linechart(df):
+def linechart(df, mode=LINECHART_DEFAULT_MODE, max_points=LINECHART_MAX_POINTS):
     """
     Build line chart data: revenue_data, profit_data, date_data,
-    and optionally product_data (per-row product name for client-side
-    composition filtering by date range).
+    and optionally product_data / orders_data.
+
+    Modes:
+      - "bucketed": revenue/profit/orders summed per time bucket and
+        product. Buckets widen (daily → weekly → monthly → quarterly → yearly)
+        until at most max_points points remain, folding low-revenue products
+        into "Other" once at least TOP_PRODUCTS_MAX products still fit. Sums
+        over any date range are preserved at bucket resolution.
+      - "lttb": daily totals downsampled to max_points with
+        Largest-Triangle-Three-Buckets (shape-preserving, not sum-preserving);
+        no product_data.
+      - "per_row" (default, LINECHART_DEFAULT_MODE): one entry per input
+        row (unbounded payload size).
+
+    Bucketed/LTTB dates are ISO "YYYY-MM-DD" bucket starts; rows without a
+    valid date are left out. Accepts a DataFrame or a PreparedDataset.
     """
-    date_col = find_date_col(df)
+    ds = as_prepared(df)
+    date_col = ds.date_col
     missing = []
     if date_col is None:
         missing.append("date")
-    if "revenue" not in df.columns:
+    if "revenue" not in ds.columns:
         missing.append("revenue")
-    if "profit" not in df.columns:
+    if "profit" not in ds.columns:
         missing.append("profit")
     if missing:
         raise ValueError(f"Missing columns: {missing}")
+    if mode not in LINECHART_MODES:
+        raise ValueError(f"Unknown line chart mode: {mode}")
 
-    df = df.copy()
-    df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce")
-    df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
-    # Orders are optional for the line chart (used by some client-side comparisons).
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-    date_series = df[date_col].astype(str)
+    if mode == "per_row":
+        return _linechart_per_row(ds, date_col)
+    if ds.dates is None:
+        raise ValueError("Missing columns: ['date']")
+    if mode == "lttb":
+        return _linechart_lttb(ds, max_points)
+    return _linechart_bucketed(ds, max_points)
+
+
+def _linechart_per_row(ds, date_col):
+    date_series = ds.frame[date_col].astype(str)
 
     result = {
-        "revenue_data": df["revenue"].tolist(),
-        "profit_data": df["profit"].tolist(),
+        "revenue_data": ds.measure("revenue").tolist(),
+        "profit_data": ds.measure("profit").tolist(),
         "date_data": date_series.tolist(),
     }
 
-    product_col = _find_product_col(df)
+    product_col = ds.schema.product
     if product_col is not None:
-        result["product_data"] = df[product_col].astype(str).str.strip().tolist()
+        result["product_data"] = ds.dimension(product_col).tolist()
 
-    if "orders" in df.columns:
-        result["orders_data"] = df["orders"].tolist()
+    # Orders are optional for the line chart (used by some client-side comparisons).
+    if "orders" in ds.columns:
+        result["orders_data"] = ds.measure("orders").fillna(0).tolist()
 
     return result
 
 
-# ---------------------------------------------------------------------------
-# Comparing Bar Chart — Current vs Previous Period Sales
-# ---------------------------------------------------------------------------
+def _linechart_measures(ds, valid):
+    """Dated rows' measures as a small frame (orders only when present)."""
+    measures = {
+        "revenue": ds.measure("revenue")[valid],
+        "profit": ds.measure("profit")[valid],
+    }
+    if "orders" in ds.columns:
+        measures["orders"] = ds.measure("orders")[valid].fillna(0)
+    return pd.DataFrame(measures)
 
-def _find_sales_col(df):
-    """Return the best column representing sales/revenue values."""
-    for c in ("revenue", "sales", "amount", "total", "net_sales", "net sales"):
-        if c in df.columns:
-            return c
-    return None
+
+def _linechart_result(agg, dates, products=None):
+    result = {
+        "revenue_data": [float(v) for v in agg["revenue"]],
+        "profit_data": [float(v) for v in agg["profit"]],
+        "date_data": [d.strftime("%Y-%m-%d") for d in dates],
+    }
+    if products is not None:
+        result["product_data"] = [str(p) for p in products]
+    if "orders" in agg.columns:
+        result["orders_data"] = [float(v) for v in agg["orders"]]
+    return result
 
 
-def _find_dimension_col(df):
-    """Return the best grouping dimension: product > category > location."""
-    for c in ("product name", "product_name", "productname", "product"):
-        if c in df.columns:
-            return c
-    for c in ("category", "sub-category", "sub_category", "subcategory"):
-        if c in df.columns:
-            return c
-    for c in ("region", "state", "country", "location", "city"):
-        if c in df.columns:
-            return c
-    # Fallback: first bar-chart-suitable column
-    for col in df.columns:
-        if analytics_utils.is_bar_chart_categorical(df, col):
-            return col
-    return None
+def _linechart_bucketed(ds, max_points):
+    valid = ds.dates.notna()
+    frame = _linechart_measures(ds, valid)
+    frame["_day"] = ds.dates[valid].dt.normalize()
+    product_col = ds.schema.product
+    keys = ["_day"]
+    if product_col is not None:
+        frame["_product"] = ds.dimension(product_col)[valid]
+        keys.append("_product")
+
+    # One pass over the rows; coarser buckets are derived from the daily table.
+    daily = frame.groupby(keys, sort=True, observed=True).sum().reset_index()
+    if product_col is not None:
+        # The per-day table is small; plain labels let "Other" be added later.
+        daily["_product"] = daily["_product"].astype(object)
+    return _bucketed_series(daily, max_points)
+
+
+def _bucketed_series(daily, max_points):
+    """
+    Finish the bucketed line chart from per-day sums.
+
+    daily has a "_day" column, an optional "_product" column, and revenue /
+    profit (/ orders) sums per key.
+    """
+    has_product = "_product" in daily.columns
+    keys = ["_day", "_product"] if has_product else ["_day"]
+    for granularity, alias in LINECHART_BUCKETS:
+        agg = daily.assign(_day=daily["_day"].dt.to_period(alias).dt.start_time)
+        agg = agg.groupby(keys, sort=True).sum().reset_index()
+        if len(agg) <= max_points:
+            break
+        if not has_product:
+            continue
+        # Prefer finer time buckets: fold low-revenue products into "Other"
+        # as long as the top products shown by composition charts survive.
+        keep_n = max_points // agg["_day"].nunique() - 1
+        if keep_n >= TOP_PRODUCTS_MAX or granularity == LINECHART_BUCKETS[-1][0]:
+            totals = agg.groupby("_product")["revenue"].sum()
+            top = totals.nlargest(max(1, keep_n)).index
+            agg = agg.assign(_product=agg["_product"].where(agg["_product"].isin(top), "Other"))
+            agg = agg.groupby(keys, sort=True).sum().reset_index()
+            break
+
+    result = _linechart_result(agg, agg["_day"], agg["_product"] if has_product else None)
+    result["linechart_mode"] = "bucketed"
+    result["linechart_granularity"] = granularity
+    return result
+
+
+def _linechart_lttb(ds, max_points):
+    valid = ds.dates.notna()
+    frame = _linechart_measures(ds, valid)
+    daily = frame.groupby(ds.dates[valid].dt.normalize(), sort=True).sum()
+    return _lttb_series(daily, max_points)
+
 
+def _lttb_series(daily, max_points):
+    """Finish the LTTB line chart from per-day totals indexed by day."""
+    x = daily.index.to_numpy(dtype="datetime64[D]").astype("int64")
+    idx = analytics_utils.lttb_indices(x, daily["revenue"].fillna(0).to_numpy(), max_points)
+    picked = daily.iloc[idx]
+    result = _linechart_result(picked, picked.index)
+    result["linechart_mode"] = "lttb"
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Comparing Bar Chart — Current vs Previous Period Sales
+# ---------------------------------------------------------------------------
 
 def comparison_bar_chart(df):
     """
@@ -118,52 +211,53 @@ def comparison_bar_chart(df):
         }
     or None if required columns are missing.
     """
-    date_col = find_date_col(df)
-    if date_col is None:
+    ds = as_prepared(df)
+    if ds.dates is None:
         return {"error": "Date column missing or not detected"}
 
-    sales_col = _find_sales_col(df)
+    sales_col = ds.schema.sales
     if sales_col is None:
         return {"error": "Sales / revenue column missing or not detected"}
 
-    dim_col = _find_dimension_col(df)
+    dim_col = ds.schema.dimension
     if dim_col is None:
         return {"error": "No suitable grouping dimension (product / category / location) found"}
 
-    df = df.copy()
-    df["_dt"] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
-    df[sales_col] = pd.to_numeric(df[sales_col], errors="coerce")
-    df[dim_col] = df[dim_col].astype(str).str.strip()
+    df = pd.DataFrame({
+        "_dt": ds.dates,
+        sales_col: ds.measure(sales_col),
+        dim_col: ds.dimension(dim_col),
+    })
 
     # Drop rows with invalid dates, null/NaN dimension, or non-positive sales
     df = df.dropna(subset=["_dt", sales_col])
     df = df[df[dim_col].str.lower() != "nan"]
     df = df[df[sales_col] > 0]
 
-    if df.empty:
+    return _comparison_payload(df.groupby(["_dt", dim_col], observed=True)[sales_col].sum())
+
+
+def _comparison_payload(sums):
+    """
+    Finish comparison_bar_chart from cleaned sales sums indexed by (timestamp, label).
+
+    Sums for the same (timestamp, label) may come from several chunks; they add up.
+    """
+    if sums.empty:
         return {"error": "No valid rows after cleaning"}
 
-    date_min = df["_dt"].min()
-    date_max = df["_dt"].max()
+    stamps = sums.index.get_level_values(0)
+    date_min = stamps.min()
+    date_max = stamps.max()
     mid_point = date_min + (date_max - date_min) / 2
 
-    current_df = df[df["_dt"] > mid_point]
-    previous_df = df[df["_dt"] <= mid_point]
-
-    current_agg = (
-        current_df.groupby(dim_col)[sales_col]
-        .sum()
-        .sort_index()
-    )
-    has_previous = not previous_df.empty
+    current_agg = sums[stamps > mid_point].groupby(level=1, observed=True).sum().sort_index()
+    previous_sums = sums[stamps <= mid_point]
+    has_previous = not previous_sums.empty
 
     # Build label union from current (and previous if available)
     if has_previous:
-        previous_agg = (
-            previous_df.groupby(dim_col)[sales_col]
-            .sum()
-            .sort_index()
-        )
+        previous_agg = previous_sums.groupby(level=1, observed=True).sum().sort_index()
         all_labels = sorted(set(current_agg.index) | set(previous_agg.index))
     else:
         all_labels = sorted(current_agg.index.tolist())
@@ -191,21 +285,14 @@ def comparison_bar_chart(df):
 # Multi-Line Line Chart — Revenue, Orders, AOV
 # ---------------------------------------------------------------------------
 
-def _find_order_id_col(df):
-    """Return an order-ID column if present."""
-    for c in ("order id", "order_id", "orderid", "order number", "order_number", "transaction_id"):
-        if c in df.columns:
-            return c
-    return None
-
-
 def multiline_chart(df, granularity="monthly"):
     """
     Aggregate data over time into Revenue, Orders, and AOV (Average Order Value).
 
     AOV = Revenue / Orders (per bucket); 0 when orders == 0.
 
-    Granularity options: 'daily', 'weekly', 'monthly' (default).
+    Granularity options: 'daily', 'weekly', 'monthly' (default), 'quarterly',
+    'yearly'. Periods are summed from the dataset's daily base (see timeseries).
 
     Sparse time periods are filled with 0 (not fabricated).
 
@@ -218,51 +305,32 @@ def multiline_chart(df, granularity="monthly"):
         }
     or {"error": str} if required columns are missing.
     """
-    date_col = find_date_col(df)
-    if date_col is None:
+    ds = as_prepared(df)
+    if ds.dates is None:
         return {"error": "Date column missing or not detected"}
 
-    revenue_col = find_column_by_keywords(df, ["revenue", "sales", "amount", "total"])
+    revenue_col = ds.schema.amount
     if revenue_col is None:
         return {"error": "Revenue / sales column missing or not detected"}
 
-    df = df.copy()
-    df["_dt"] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
-    df[revenue_col] = pd.to_numeric(df[revenue_col], errors="coerce").fillna(0)
-    df = df.dropna(subset=["_dt"])
-
-    if df.empty:
+    base = daily_base(ds)
+    if base is None:
         return {"error": "No valid date rows found"}
 
-    # Granularity → (pandas period alias, label format string)
-    granularity_map = {
-        "daily":   ("D", "%Y-%m-%d"),
-        "weekly":  ("W", "W%W %Y"),
-        "monthly": ("M", "%b %Y"),
-    }
-    period_alias, label_fmt = granularity_map.get(granularity, ("M", "%b %Y"))
-
-    df["_bucket"] = df["_dt"].dt.to_period(period_alias)
+    label_fmt = MULTILINE_GRANULARITIES.get(granularity, MULTILINE_GRANULARITIES["monthly"])[1]
+    # Orders: the orders measure, else distinct order ids, else rows.
+    agg = base.bucket(granularity)
+    return _multiline_payload(agg["revenue"], agg["orders"], label_fmt)
 
-    revenue_agg = df.groupby("_bucket")[revenue_col].sum()
-
-    # Count orders per bucket
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        orders_agg = df.groupby("_bucket")["orders"].sum()
-    else:
-        order_id_col = _find_order_id_col(df)
-        if order_id_col is not None:
-            orders_agg = df.groupby("_bucket")[order_id_col].nunique()
-        else:
-            orders_agg = df.groupby("_bucket").size()
 
+def _multiline_payload(revenue_agg, orders_agg, label_fmt):
+    """Finish multiline_chart from revenue and order totals indexed by period."""
     # Build full period range so sparse gaps are represented with 0
     all_periods = revenue_agg.index.union(orders_agg.index).sort_values()
     revenue_agg = revenue_agg.reindex(all_periods, fill_value=0)
     orders_agg = orders_agg.reindex(all_periods, fill_value=0)
 
-    labels = [str(p.start_time.strftime(label_fmt)) for p in all_periods]
+    labels = period_labels(all_periods, label_fmt)
     revenues = [float(v) for v in revenue_agg.values]
     orders = [int(v) for v in orders_agg.values]
 
@@ -295,48 +363,39 @@ def profit_by_product_chart(df):
         {"profit_by_product_column": str, "profit_by_product_data": [{"name": str, "value": float}, ...]}
     or None if no product or profit column found.
     """
-    # Find product column (same priority order as top_products_by_revenue_chart)
-    product_col = None
-    for c in ("product name", "product_name", "productname", "product"):
-        if c in df.columns:
-            product_col = c
-            break
-    if product_col is None:
-        for c in ("category", "sub-category", "sub_category"):
-            if c in df.columns:
-                product_col = c
-                break
+    ds = as_prepared(df)
+    product_col = ds.schema.product
     if product_col is None:
         return None
 
-    if "profit" not in df.columns:
+    if ds.schema.profit is None:
         return None
 
-    df = df.copy()
-    df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
-    df[product_col] = df[product_col].astype(str).str.strip()
+    profit = ds.measure("profit")
+    names = ds.dimension(product_col)
 
     # Drop rows with invalid/null profit or empty product names
-    df = df.dropna(subset=["profit"])
-    df = df[df[product_col].str.lower() != "nan"]
-    df = df[df[product_col] != ""]
+    keep = profit.notna() & (names.str.lower() != "nan") & (names != "")
 
-    agg = df.groupby(product_col, sort=False)["profit"].sum()
-
-    # Exclude products with zero or negative profit
-    agg = agg[agg > 0]
-    if agg.empty:
+    data = _top_products_data(profit[keep].groupby(names[keep], sort=False, observed=True).sum())
+    if data is None:
         return None
+    return {"profit_by_product_column": product_col, "profit_by_product_data": data}
+
 
-    # Sort descending; stable sort (mergesort) preserves insertion order for products with equal profit
-    agg = agg.sort_values(ascending=False, kind="mergesort")
-    agg = agg.head(TOP_PRODUCTS_MAX)
+def _top_products_data(agg):
+    """
+    Top TOP_PRODUCTS_MAX positive totals as [{"name", "value"}], or None.
 
-    if len(agg) < 1:
+    agg is indexed by product in first-seen order; equal values keep that order.
+    """
+    # Exclude products with zero or negative totals
+    agg = agg[agg > 0]
+    if agg.empty:
         return None
 
-    data = [{"name": str(n), "value": float(v)} for n, v in agg.items()]
-    return {"profit_by_product_column": product_col, "profit_by_product_data": data}
+    agg = agg.iloc[analytics_utils.top_k_positions(agg, TOP_PRODUCTS_MAX)]
+    return [{"name": str(n), "value": float(v)} for n, v in agg.items()]
 
 
 def top_products_by_revenue_chart(df):
@@ -350,53 +409,24 @@ def top_products_by_revenue_chart(df):
         {"bar_column": str, "bar_data": [{"name": str, "value": float}, ...]}
     or None if no product or revenue column found.
     """
-    # Find product column
-    product_col = None
-    for c in ("product name", "product_name", "productname", "product"):
-        if c in df.columns:
-            product_col = c
-            break
-    if product_col is None:
-        for c in ("category", "sub-category", "sub_category"):
-            if c in df.columns:
-                product_col = c
-                break
+    ds = as_prepared(df)
+    product_col = ds.schema.product
     if product_col is None:
         return None
 
-    # Find revenue column
-    revenue_col = None
-    for c in ("revenue", "sales", "amount", "total"):
-        if c in df.columns:
-            revenue_col = c
-            break
+    revenue_col = ds.schema.sales
     if revenue_col is None:
         return None
 
-    df = df.copy()
-    df[revenue_col] = pd.to_numeric(df[revenue_col], errors="coerce")
-    df[product_col] = df[product_col].astype(str).str.strip()
+    revenue = ds.measure(revenue_col)
+    names = ds.dimension(product_col)
 
     # Drop rows with invalid/null revenue or empty product names
-    df = df.dropna(subset=[revenue_col])
-    df = df[df[product_col].str.lower() != "nan"]
-    df = df[df[product_col] != ""]
-
-    agg = df.groupby(product_col, sort=False)[revenue_col].sum()
-
-    # Exclude products with zero or negative revenue
-    agg = agg[agg > 0]
-    if agg.empty:
-        return None
-
-    # Sort descending; stable sort preserves insertion order for equal values
-    agg = agg.sort_values(ascending=False, kind="mergesort")
-    agg = agg.head(TOP_PRODUCTS_MAX)
+    keep = revenue.notna() & (names.str.lower() != "nan") & (names != "")
 
-    if len(agg) < 1:
+    bar_data = _top_products_data(revenue[keep].groupby(names[keep], sort=False, observed=True).sum())
+    if bar_data is None:
         return None
-
-    bar_data = [{"name": str(n), "value": float(v)} for n, v in agg.items()]
     return {"bar_column": product_col, "bar_data": bar_data}
 
 
@@ -409,29 +439,17 @@ def pie_chart_column(df):
     Pick a categorical column for pie chart; return column name and value counts.
     Max PIE_MAX_SEGMENTS segments + "Other".
     """
-    df = df.copy()
-    best_col = None
-
-    for candidate in ["category", "campaign"]:
-        if candidate in df.columns and analytics_utils.is_good_categorical(df, candidate):
-            best_col = candidate
-            break
-
-    if best_col is None:
-        cols_reversed = list(df.columns)[::-1]
-        for col in cols_reversed:
-            if analytics_utils.is_geography_column(col) or analytics_utils.is_payment_column(col):
-                continue
-            if analytics_utils.is_good_categorical(df, col):
-                best_col = col
-                break
-
+    ds = as_prepared(df)
+    best_col = ds.schema.pie
     if best_col is None:
         return None
 
-    counts = df[best_col].dropna().astype(str).str.strip()
-    counts = counts[counts != ""].value_counts()
+    counts = ds.dimension(best_col)[ds.frame[best_col].notna()]
+    return _pie_payload(best_col, analytics_utils.count_values(counts[counts != ""]))
+
 
+def _pie_payload(best_col, counts):
+    """Finish pie_chart_column from value counts sorted descending."""
     items = [{"name": str(label), "value": int(count)} for label, count in counts.items()]
     if len(items) > PIE_MAX_SEGMENTS:
         top = items[:PIE_MAX_SEGMENTS]
@@ -483,28 +501,29 @@ def map_orders_by_region(df):
         }
     or {"error": str} if region column is missing.
     """
-    geo_col = None
-    for col in ("region", "state", "country", "location", "city", "province"):
-        if col in df.columns:
-            geo_col = col
-            break
+    ds = as_prepared(df)
+    df = ds.frame
+    geo_col = ds.schema.geo
     if geo_col is None:
         return {"error": "Region / geographic column missing or not detected"}
 
-    df = df.copy()
     # Normalise region values: trim and remove extra internal spaces
-    df[geo_col] = df[geo_col].astype(str).str.strip().str.replace(r"\s+", " ", regex=True)
+    places = ds.dimension(geo_col).str.replace(r"\s+", " ", regex=True)
 
     # Count orders per region
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        agg = df.groupby(df[geo_col], dropna=True)["orders"].sum()
-    elif any(c in df.columns for c in ("order id", "order_id", "orderid")):
-        order_id_col = _find_order_id_col(df)
-        agg = df.groupby(df[geo_col], dropna=True)[order_id_col].nunique()
+    order_id_col = ds.schema.order_id
+    if ds.schema.orders is not None:
+        agg = ds.measure("orders").fillna(0).groupby(places, dropna=True).sum()
+    elif order_id_col in ("order id", "order_id", "orderid"):
+        agg = df[order_id_col].groupby(places, dropna=True).nunique()
     else:
-        agg = df.groupby(df[geo_col], dropna=True).size()
+        agg = places.groupby(places, dropna=True).size()
+
+    return _map_payload(geo_col, agg)
+
 
+def _map_payload(geo_col, agg):
+    """Finish map_orders_by_region from order totals indexed by normalized place name."""
     # Remove empty / nan labels
     agg = agg[~agg.index.str.lower().isin({"nan", ""})]
     if agg.empty:
@@ -0,0 +1,134 @@
+"""
+Columnar (Parquet) copies of uploaded datasets.
+
+read_uploaded_file has to parse CSV/Excel and normalize currency text on every
+call. At upload time we also write the normalized frame as Parquet (text
+dimensions dictionary-encoded) so later recomputes can load it straight back
+with read_columnar and skip both steps.
+
+The date column is stored as uploaded, with the format it is parsed with
+recorded in the metadata. read_columnar puts that format in
+df.attrs["date_format"], and prepare_dataset parses with it, so rows read
+back show the dates as uploaded and appended parts parse like the original.
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from .compact import compact_frame
+from .prepared import guess_date_format
+from .utils import find_date_col, to_datetime_column
+
+# Key under which Businalyst metadata is stored in the Parquet schema.
+METADATA_KEY = b"businalyst"
+
+
+def _columnar_frame(df, date_format=None, parse_dates=False):
+    """
+    Return a copy of df with types Parquet can store losslessly for our
+    components. The date column keeps its values unless parse_dates, which
+    parses it with date_format (dayfirst), to combine with copies written
+    before dates were kept as uploaded.
+    """
+    out = df.copy()
+    date_col = find_date_col(out)
+    if parse_dates and date_col is not None and isinstance(out[date_col], pd.Series):
+        out[date_col] = to_datetime_column(out[date_col], date_format, dayfirst=True)
+    for col in out.columns:
+        if out[col].dtype == object:
+            # Mixed object columns (e.g. ints and text) must become one Arrow type.
+            series = out[col]
+            out[col] = series.where(series.isna(), series.astype(str))
+    return out, date_col
+
+
+def write_columnar(df, date_format=None):
+    """
+    Serialize df (as returned by read_uploaded_file) to Parquet bytes.
+
+    date_format is the format the date column is parsed with (e.g. the
+    dataset's for an appended part); by default it is inferred from the first
+    value, as prepare_dataset does. Requires pyarrow. Column names must be unique.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out, date_col = _columnar_frame(df)
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    meta = {
+        "source_currency": df.attrs.get("source_currency", "USD"),
+        "date_col": date_col,
+        "date_format": date_format or guess_date_format(df),
+    }
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(meta).encode("utf-8"),
+    })
+    dimension_cols = [c for c in out.columns if out[c].dtype == object]
+    buf = io.BytesIO()
+    pq.write_table(table, buf, use_dictionary=dimension_cols, compression="snappy")
+    return buf.getvalue()
+
+
+def read_columnar(source, columns=None):
+    """
+    Load a Parquet copy written by write_columnar.
+
+    source may be a filesystem path (memory-mapped) or a binary file object.
+    Restores df.attrs["source_currency"] (and df.attrs["date_format"]) and NaN
+    for missing text values, so the frame matches what read_uploaded_file
+    returns. Copies written before dates were kept as uploaded have a parsed
+    date column. Categorical and downcast columns come back as written; copies
+    written before compact_frame existed are compacted on load.
+    """
+    import pyarrow.parquet as pq
+
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        table = pq.read_table(source, columns=columns, memory_map=True)
+    else:
+        table = pq.read_table(source, columns=columns)
+
+    df = table.to_pandas()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+
+    df = compact_frame(df)
+
+    raw_meta = (table.schema.metadata or {}).get(METADATA_KEY)
+    meta = json.loads(raw_meta) if raw_meta else {}
+    df.attrs["source_currency"] = meta.get("source_currency", "USD")
+    if meta.get("date_format"):
+        df.attrs["date_format"] = meta["date_format"]
+    return df
+
+
+def concat_columnar(frames, date_format=None):
+    """
+    Concatenate normalized frames of the same columns (read_uploaded_file or
+    read_columnar output, e.g. a dataset and its appended parts) in order.
+    Each part is brought to the Parquet representation first; the result is
+    compacted again.
+
+    date_format (by default the first one recorded in a part's attrs) becomes
+    the result's attrs["date_format"], so every row is parsed like the first
+    part. When a part has a parsed date column (an older copy), the others
+    are parsed with it so the column combines.
+    """
+    if date_format is None:
+        date_format = next((f.attrs["date_format"] for f in frames if f.attrs.get("date_format")), None)
+    parse_dates = any(_has_parsed_dates(frame) for frame in frames)
+    parts = [_columnar_frame(frame, date_format, parse_dates)[0] for frame in frames]
+    df = compact_frame(pd.concat(parts, ignore_index=True))
+    df.attrs = dict(frames[0].attrs)
+    if date_format:
+        df.attrs["date_format"] = date_format
+    return df
+
+
+def _has_parsed_dates(df):
+    date_col = find_date_col(df)
+    return date_col is not None and pd.api.types.is_datetime64_any_dtype(df[date_col].dtype)
@@ -0,0 +1,75 @@
+"""
+Compact in-memory representation of uploaded frames.
+
+read_csv keeps every text column as Python str objects and every number as
+64-bit. Sales exports repeat a handful of regions, statuses and products over
+millions of rows, so compact_frame stores low-cardinality text columns as
+`category` (one small int code per row plus the distinct values once) and
+downcasts numeric columns where no value changes. Groupbys on a categorical
+dimension then run on the integer codes instead of hashing strings.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_float_dtype, is_integer_dtype
+
+# Text columns become categorical only when distinct values are at most this share of non-null rows.
+MAX_CATEGORY_RATIO = 0.5
+# Leading rows checked before converting a whole column, to skip ID-like columns cheaply.
+CATEGORY_SAMPLE_SIZE = 10_000
+
+
+def _compact_text(series, max_ratio):
+    """series as a categorical if it holds only strings that repeat enough, else None."""
+    # A head that is already too distinct rules out ID-like columns without hashing all of them.
+    head = series.iloc[:CATEGORY_SAMPLE_SIZE]
+    if len(head) == CATEGORY_SAMPLE_SIZE and head.nunique() > max_ratio * head.count():
+        return None
+    compacted = series.astype("category")
+    categories = compacted.cat.categories
+    if len(categories) == 0 or len(categories) > max_ratio * compacted.count():
+        return None
+    # The categories are the distinct values, so checking them covers every row.
+    if infer_dtype(categories, skipna=False) != "string":
+        return None
+    return compacted
+
+
+def _compact_number(series):
+    """series downcast to a smaller dtype holding exactly the same values, else None."""
+    if is_integer_dtype(series.dtype):
+        smaller = pd.to_numeric(series, downcast="integer")
+        return smaller if smaller.dtype.itemsize < series.dtype.itemsize else None
+    if series.dtype == np.float64:
+        smaller = series.astype(np.float32)
+        values = series.to_numpy()
+        if np.array_equal(smaller.to_numpy().astype(np.float64), values, equal_nan=True):
+            return smaller
+    return None
+
+
+def compact_frame(df, max_category_ratio=MAX_CATEGORY_RATIO):
+    """
+    Return df with low-cardinality text columns as `category` and numeric
+    columns downcast where lossless (int64 -> int8/16/32, float64 -> float32
+    only when every value round-trips exactly).
+
+    Values, column order, index and attrs are unchanged; untouched columns are
+    shared with df, not copied. Mixed-type object columns and booleans are
+    left alone.
+    """
+    out = df.copy(deep=False)
+    for i in range(out.shape[1]):
+        series = out.iloc[:, i]
+        if is_bool_dtype(series.dtype):
+            continue
+        if series.dtype == object:
+            compacted = _compact_text(series, max_category_ratio)
+        elif is_integer_dtype(series.dtype) or is_float_dtype(series.dtype):
+            compacted = _compact_number(series)
+        else:
+            compacted = None
+        if compacted is not None:
+            out.isetitem(i, compacted)
+    out.attrs = dict(df.attrs)
+    return out
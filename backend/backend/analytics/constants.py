@@ -5,6 +5,8 @@ Shared constants for analytics: chart limits, column keywords, colors, map coord
 # Chart limits
 PIE_MAX_SEGMENTS = 5
 ORDERS_LIST_MAX = 100
+# Upper bound on points in the (non per-row) line chart series
+LINECHART_MAX_POINTS = 2000
 
 # Columns we treat as numeric / not categorical for pie/bar
 NUMERIC_OR_DATE_LIKE = {"profit", "revenue", "orders", "expense", "order date", "date"}
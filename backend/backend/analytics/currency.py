@@ -3,6 +3,7 @@ Currency detection and numeric parsing helpers for uploaded datasets.
 """
 import re
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
 
 CURRENCY_SYMBOL_PATTERNS = {
     "INR": re.compile(r"\u20b9|\binr\b", re.IGNORECASE),
@@ -14,6 +15,16 @@ CURRENCY_SYMBOL_PATTERNS = {
     "USD": re.compile(r"\$|\busd\b", re.IGNORECASE),
 }
 
+# All codes in one regex: an optional lookahead per code records whether that
+# code's pattern occurs anywhere in the value, so one pass scores every code.
+CURRENCY_PRESENCE_PATTERN = re.compile(
+    "".join(f"(?=.*?(?P<{code}>{pattern.pattern}))?" for code, pattern in CURRENCY_SYMBOL_PATTERNS.items()),
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Non-empty values per money-like column inspected by detect_source_currency.
+CURRENCY_SAMPLE_SIZE = 500
+
 MONEY_COLUMN_HINTS = {
     "profit",
     "revenue",
@@ -34,32 +45,46 @@ def _is_money_like_column(col_name):
 
 
 
+def _currency_hits(values):
+    """Per code, how many of values (a Series of str) mention it."""
+    found = values.str.extract(CURRENCY_PRESENCE_PATTERN, expand=True)
+    return found.notna().sum()
+
+
+def _head_non_null(series, n):
+    """First n non-null values without scanning the whole column when they come early."""
+    head = series.head(4 * n).dropna()
+    if len(head) >= n or len(series) <= 4 * n:
+        return head.head(n)
+    return series.dropna().head(n)
+
+
 def detect_source_currency(df):
     """
     Detect the dominant source currency code from text in money-like columns.
     Defaults to USD when no signal is found.
+
+    Headers score 2 per code they mention; each of the first
+    CURRENCY_SAMPLE_SIZE non-null values of a money-like text column scores 1.
+    Numeric columns carry no symbols and are skipped.
     """
     scores = {code: 0 for code in CURRENCY_SYMBOL_PATTERNS}
 
-    for col in df.columns:
-        header = str(col)
-        for code, pattern in CURRENCY_SYMBOL_PATTERNS.items():
-            if pattern.search(header):
-                scores[code] += 2
+    headers = pd.Series([str(col) for col in df.columns], dtype=object)
+    for code, hits in _currency_hits(headers).items():
+        scores[code] += 2 * int(hits)
 
+    for i, col in enumerate(df.columns):
         if not _is_money_like_column(col):
             continue
-        series = df[col].dropna().astype(str)
-        if series.empty:
+        series = df.iloc[:, i]
+        if is_numeric_dtype(series) and not is_bool_dtype(series):
+            continue
+        sample = _head_non_null(series, CURRENCY_SAMPLE_SIZE)
+        if sample.empty:
             continue
-        sample = series.head(500)
-        for value in sample:
-            text = value.strip()
-            if not text:
-                continue
-            for code, pattern in CURRENCY_SYMBOL_PATTERNS.items():
-                if pattern.search(text):
-                    scores[code] += 1
+        for code, hits in _currency_hits(sample.astype(str)).items():
+            scores[code] += int(hits)
 
     ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
     if ranked[0][1] == 0:
@@ -104,13 +129,62 @@ def parse_currency_number(value):
 
 
 
+# What float() accepts once parse_currency_number has kept only [0-9.-].
+_NUMBER_TEXT = r"^-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)$"
+
+
+def parse_currency_series(series):
+    """
+    Vectorized parse_currency_number over a Series (same results; NaN where it
+    returns None).
+
+    Runs on pyarrow compute kernels; without pyarrow, or for values Arrow cannot
+    hold as UTF-8, falls back to Series.apply(parse_currency_number).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return series.apply(parse_currency_number)
+
+    values = series.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) != "string":
+        # Non-string cells (e.g. numbers in an Excel text column) go through str() first.
+        values = series.where(series.isna(), series.astype(str)).to_numpy(dtype=object)
+    try:
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowException, UnicodeError):
+        return series.apply(parse_currency_number)
+
+    text = pc.utf8_trim_whitespace(text)
+    negative = pc.and_(pc.starts_with(text, "("), pc.ends_with(text, ")"))
+    text = pc.if_else(negative, pc.utf8_slice_codeunits(text, 1, -1), text)
+    # Commas are thousands separators in every case, so drop them with the rest.
+    text = pc.replace_substring_regex(text, r"[^0-9.-]", "")
+    text = pc.if_else(pc.match_substring_regex(text, _NUMBER_TEXT), text, None)
+    numbers = pc.cast(text, pa.float64())
+    numbers = pc.if_else(negative, pc.negate(numbers), numbers)
+    return pd.Series(numbers.to_numpy(zero_copy_only=False), index=series.index, name=series.name)
+
+
+
 def normalize_money_columns(df):
     """
     Coerce money-like columns to numeric values where possible.
+
+    Columns already read as numbers are left as they are. Returns a new frame;
+    df is not modified.
     """
-    out = df.copy()
-    for col in out.columns:
+    out = df.copy(deep=False)
+    for i, col in enumerate(out.columns):
         if not _is_money_like_column(col):
             continue
-        out[col] = out[col].apply(parse_currency_number)
+        series = out.iloc[:, i]
+        if is_numeric_dtype(series) and not is_bool_dtype(series):
+            continue
+        parsed = parse_currency_series(series)
+        if parsed.isna().all():
+            # Match Series.apply, which yields an object column of None here.
+            parsed = pd.Series(None, index=series.index, dtype=object, name=series.name)
+        out.isetitem(i, parsed)
     return out
@@ -0,0 +1,216 @@
+"""
+Excel uploads: engine selection, data-sheet choice and multi-sheet reads.
+
+pd.read_excel's default openpyxl reader builds a cell object per value and
+reads only the first sheet. read_excel here:
+
+- uses pandas' "calamine" engine when python-calamine is installed (much
+  faster, and it also reads .xls);
+- otherwise reads .xlsx with openpyxl in read-only mode, taking plain values
+  row by row (values_only) and parsing them with the same TextParser pandas
+  uses, so the frame matches pd.read_excel's;
+- picks the sheet: by name or position, or by default the visible sheet whose
+  declared size is largest (the first sheet when sizes are unknown);
+- reads several sheets concurrently and stacks them into one frame. Listed
+  sheets must have the same columns; ALL_SHEETS takes every visible sheet
+  with the same columns as the default sheet (e.g. one sheet per month) and
+  skips the rest.
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+try:
+    import python_calamine
+except ImportError:  # pragma: no cover - optional dependency
+    python_calamine = None
+
+# pandas reads with python-calamine from 2.2 on.
+_PANDAS_CALAMINE = tuple(int(part) for part in pd.__version__.split(".")[:2]) >= (2, 2)
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+# sheet value selecting every visible sheet with the default sheet's columns
+ALL_SHEETS = "*"
+# Sheets read at the same time when several are combined
+EXCEL_SHEET_WORKERS = 4
+# Error values pandas' openpyxl reader turns into NaN (values_only returns them as text).
+_EXCEL_ERRORS = ["#DIV/0!", "#N/A", "#NAME?", "#NULL!", "#NUM!", "#REF!", "#VALUE!"]
+
+
+def excel_engine(filename):
+    """
+    Reader for an Excel file name: "calamine" when python-calamine is
+    installed (and pandas >= 2.2), "openpyxl" (read-only values) for .xlsx,
+    else None (pandas' default engine for .xls).
+    """
+    if python_calamine is not None and _PANDAS_CALAMINE:
+        return "calamine"
+    if filename.lower().endswith(".xlsx"):
+        return "openpyxl"
+    return None
+
+
+def _sheet_list(sheet):
+    """sheet argument as a list of requested names/positions; [] means auto-detect."""
+    if sheet is None:
+        return []
+    if isinstance(sheet, (str, int)):
+        sheet = [sheet]
+    return [s.strip() if isinstance(s, str) else s for s in sheet if s is not None and s != ""]
+
+
+def select_sheets(sizes, sheet=None):
+    """
+    Names of the sheets to read, from [(name, declared cell count or None)]
+    of the visible sheets in workbook order.
+
+    Raises:
+        ValueError: If a requested sheet does not exist or the workbook has no visible sheet.
+    """
+    names = [name for name, _ in sizes]
+    if not names:
+        raise ValueError("Workbook has no visible sheets")
+    requested = _sheet_list(sheet)
+    if not requested:
+        # max() keeps the first of equal sizes, so unsized workbooks read their first sheet.
+        return [max(sizes, key=lambda item: item[1] or 0)[0]]
+    if ALL_SHEETS in requested:
+        return names
+
+    selected = []
+    for item in requested:
+        if isinstance(item, str) and item in names:
+            name = item
+        elif str(item).isdigit() and int(item) < len(names):
+            name = names[int(item)]
+        else:
+            raise ValueError(f"Sheet {item!r} not found; sheets: {', '.join(names)}")
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def _values_frame(rows):
+    """
+    DataFrame from sheet rows (header first) as pandas' Excel readers build it:
+    trailing empty cells and rows trimmed, short rows padded, types inferred
+    by TextParser.
+    """
+    data, last = [], -1
+    for i, values in enumerate(rows):
+        row = list(values)
+        while row and row[-1] is None:
+            row.pop()
+        if row:
+            last = i
+        data.append(row)
+    data = data[: last + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [None] * (width - len(row)) if len(row) < width else row for row in data]
+    # Empty header cells become "Unnamed: n", as with pd.read_excel.
+    data[0] = ["" if v is None else v for v in data[0]]
+    return TextParser(data, header=0, na_values=_EXCEL_ERRORS).read()
+
+
+def _openpyxl_sheet(ws):
+    # Declared dimensions can be wrong, so read every row (as pandas does).
+    ws.reset_dimensions()
+    return _values_frame(ws.iter_rows(values_only=True))
+
+
+def _calamine_sizes(book, sized):
+    """
+    [(name, cells or None)] of the visible worksheets of a CalamineWorkbook.
+    Sizing loads each sheet, so it is only done when sized and there is a choice.
+    """
+    from python_calamine import SheetTypeEnum, SheetVisibleEnum
+
+    names = [
+        meta.name for meta in book.sheets_metadata
+        if meta.typ == SheetTypeEnum.WorkSheet and meta.visible == SheetVisibleEnum.Visible
+    ]
+    if not sized or len(names) < 2:
+        return [(name, None) for name in names]
+    sizes = []
+    for name in names:
+        sheet = book.get_sheet_by_name(name)
+        sizes.append((name, sheet.height * sheet.width))
+    return sizes
+
+
+def _combine(frames, reference=None):
+    """
+    Stack per-sheet (name, frame) pairs. With reference, sheets whose
+    (case-insensitive) columns differ from that sheet's are left out;
+    otherwise they must all match the first non-empty sheet.
+    """
+    frames = [(name, df) for name, df in frames if len(df.columns)]
+    if not frames:
+        return pd.DataFrame()
+    first_name, first = next(((n, df) for n, df in frames if n == reference), frames[0])
+    expected = [str(c).lower().strip() for c in first.columns]
+    parts = []
+    for name, df in frames:
+        if [str(c).lower().strip() for c in df.columns] != expected:
+            if reference is not None:
+                continue
+            raise ValueError(f"Sheet {name!r} has different columns than sheet {first_name!r}")
+        df.columns = first.columns
+        parts.append(df)
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+def _map_sheets(read, names, workers):
+    if len(names) == 1 or workers <= 1:
+        return [read(name) for name in names]
+    with ThreadPoolExecutor(max_workers=min(workers, len(names)), thread_name_prefix="excel-sheet") as pool:
+        return list(pool.map(read, names))
+
+
+def read_excel(file, sheet=None, engine="auto", workers=EXCEL_SHEET_WORKERS):
+    """
+    Read the selected sheet(s) of an uploaded .xlsx/.xls file into one
+    DataFrame (see select_sheets for sheet). engine "auto" uses
+    excel_engine(file.name); "pandas" forces plain pd.read_excel.
+
+    Raises:
+        ValueError: If a requested sheet does not exist or sheets' columns differ.
+    """
+    filename = getattr(file, "name", "") or ""
+    data = file.read()
+    engine = excel_engine(filename) if engine == "auto" else engine
+
+    if engine == "openpyxl":
+        from openpyxl import load_workbook
+
+        book = load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+        try:
+            visible = [ws for ws in book.worksheets if ws.sheet_state == "visible"]
+            sizes = [
+                (ws.title, ws.max_row * ws.max_column if ws.max_row and ws.max_column else None)
+                for ws in visible
+            ]
+            names = select_sheets(sizes, sheet)
+            # Read-only sheets each open their own stream from the shared archive.
+            frames = _map_sheets(lambda name: _openpyxl_sheet(book[name]), names, workers)
+        finally:
+            book.close()
+    else:
+        pandas_engine = None if engine == "pandas" else engine
+        with pd.ExcelFile(io.BytesIO(data), engine=pandas_engine) as book:
+            if engine == "calamine":
+                requested = _sheet_list(sheet)
+                sizes = _calamine_sizes(book.book, sized=not requested or ALL_SHEETS in requested)
+            else:
+                sizes = [(name, None) for name in book.sheet_names]
+        names = select_sheets(sizes, sheet)
+        frames = _map_sheets(
+            lambda name: pd.read_excel(io.BytesIO(data), sheet_name=name, engine=pandas_engine), names, workers
+        )
+    reference = select_sheets(sizes)[0] if ALL_SHEETS in _sheet_list(sheet) else None
+    return _combine(list(zip(names, frames)), reference)
@@ -1,32 +1,76 @@
 """
-File I/O: read uploaded CSV/Excel and return a normalized DataFrame.
+File I/O: read uploaded CSV/Excel and return a normalized DataFrame (or CSV chunks).
 """
 
 import pandas as pd
+from .compact import compact_frame
 from .currency import detect_source_currency, normalize_money_columns
+from .excel import EXCEL_EXTENSIONS, read_excel
+from .timing import timed
 
+SUPPORTED_UPLOAD_EXTENSIONS = (".csv",) + EXCEL_EXTENSIONS
 
-def read_uploaded_file(file):
+
+def read_uploaded_file(file, sheet=None):
     """
     Read uploaded CSV or Excel file and return a DataFrame.
 
     - Supports .csv, .xlsx, .xls.
+    - Excel files are read by backend.analytics.excel.read_excel; sheet names
+      the sheet(s) to read (default: the largest visible sheet).
     - Column names are lowercased and stripped.
+    - Repetitive text columns are stored as category and numbers downcast
+      where lossless (see compact_frame).
 
     Raises:
-        ValueError: If file type is not supported.
+        ValueError: If file type is not supported, or a requested Excel sheet
+            is missing or has other columns than the rest.
     """
     filename = file.name.lower()
 
-    if filename.endswith(".csv"):
-        df = pd.read_csv(file)
-    elif filename.endswith(".xlsx") or filename.endswith(".xls"):
-        df = pd.read_excel(file)
-    else:
-        raise ValueError("Unsupported file type")
+    with timed("parse_file"):
+        if filename.endswith(".csv"):
+            df = pd.read_csv(file)
+        elif filename.endswith(EXCEL_EXTENSIONS):
+            df = read_excel(file, sheet)
+        else:
+            raise ValueError("Unsupported file type")
 
     df.columns = df.columns.str.lower().str.strip()
-    source_currency = detect_source_currency(df)
-    df = normalize_money_columns(df)
+    with timed("detect_source_currency"):
+        source_currency = detect_source_currency(df)
+    with timed("normalize_money_columns"):
+        df = normalize_money_columns(df)
+    with timed("compact_frame"):
+        df = compact_frame(df)
     df.attrs['source_currency'] = source_currency
     return df
+
+
+def iter_uploaded_chunks(file, chunk_rows):
+    """
+    Read an uploaded CSV in chunks of chunk_rows rows, normalized like
+    read_uploaded_file. The source currency is detected on the first chunk
+    and set on every chunk.
+
+    Raises:
+        ValueError: If file is not a CSV (Excel cannot be read in chunks).
+    """
+    if not file.name.lower().endswith(".csv"):
+        raise ValueError("Unsupported file type")
+
+    source_currency = None
+    reader = iter(pd.read_csv(file, chunksize=chunk_rows))
+    while True:
+        with timed("parse_file"):
+            chunk = next(reader, None)
+        if chunk is None:
+            return
+        chunk.columns = chunk.columns.str.lower().str.strip()
+        if source_currency is None:
+            with timed("detect_source_currency"):
+                source_currency = detect_source_currency(chunk)
+        with timed("normalize_money_columns"):
+            chunk = normalize_money_columns(chunk)
+        chunk.attrs['source_currency'] = source_currency
+        yield chunk
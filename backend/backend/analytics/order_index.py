@@ -0,0 +1,250 @@
+"""
+Sorted row index for paging through a dataset's orders.
+
+The Orders page used to get its rows from orders_list_component, which sorts
+the whole frame and keeps the first ORDERS_LIST_MAX. An OrderIndex is built
+once per dataset (at upload, at the end of a streamed upload from a second
+chunked read, or on first use for appended datasets) and stored next to the
+columnar copy. For the date column and each
+measure column it holds the row positions in ascending order of that column,
+so a page is found by binary search from a keyset cursor and costs
+O(log n + page size) instead of a sort.
+
+Order for a sort column: rows by (value, row position), ascending or
+descending, then the rows where the value is missing, by position. Cursors
+carry the last row's (value, position) rather than an offset, so pages stay
+consistent when appended rows change the index.
+"""
+
+import base64
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Dict
+
+import numpy as np
+
+from .prepared import MEASURE_COLUMNS, as_prepared
+from .utils import dataframe_to_rows
+
+# Bump when the stored layout changes; older files are rebuilt on use.
+ORDER_INDEX_VERSION = 1
+
+ORDERS_PAGE_DEFAULT = 50
+ORDERS_PAGE_MAX = 500
+
+
+@dataclass(frozen=True)
+class SortOrder:
+    """Ascending (value, row) order of one column, plus the rows without a value."""
+
+    values: np.ndarray  # sorted sort keys (float64, or int64 nanoseconds for dates)
+    rows: np.ndarray  # row positions, aligned with values
+    nulls: np.ndarray  # ascending positions of rows whose value is missing
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.rows.nbytes + self.nulls.nbytes
+
+    def page(self, descending, after, limit):
+        """
+        Up to limit (row position, cursor key) pairs following the cursor key
+        after ((value, row), (None, row) inside the missing values, or None
+        for the first page), and whether more rows follow.
+        """
+        n = len(self.rows)
+        if after is None:
+            start, null_start = (n if descending else 0), 0
+        elif after[0] is None:
+            start, null_start = (0 if descending else n), int(np.searchsorted(self.nulls, after[1], "right"))
+        else:
+            value, row = after
+            lo = int(np.searchsorted(self.values, value, "left"))
+            hi = int(np.searchsorted(self.values, value, "right"))
+            side = "left" if descending else "right"
+            start, null_start = lo + int(np.searchsorted(self.rows[lo:hi], row, side)), 0
+
+        if descending:
+            # start is exclusive: walk down from start - 1.
+            taken = np.arange(start - 1, max(start - limit, 0) - 1, -1)
+            remaining = start
+        else:
+            taken = np.arange(start, min(start + limit, n))
+            remaining = n - start
+        page = [(int(self.rows[i]), (self.values[i].item(), int(self.rows[i]))) for i in taken]
+
+        nulls = self.nulls[null_start:null_start + limit - len(page)]
+        page += [(int(row), (None, int(row))) for row in nulls]
+        more = remaining + len(self.nulls) - null_start > len(page)
+        return page, more
+
+
+@dataclass(frozen=True)
+class OrderIndex:
+    """SortOrder per sortable column ("" is the stored row order) of a dataset with row_count rows."""
+
+    row_count: int
+    orders: Dict[str, SortOrder] = field(default_factory=dict)
+
+    @property
+    def columns(self):
+        return [c for c in self.orders if c]
+
+    @property
+    def nbytes(self):
+        return sum(order.nbytes for order in self.orders.values())
+
+    def order(self, column):
+        """SortOrder of column ("" for row order)."""
+        if column == "":
+            return self.orders.get("") or SortOrder(
+                np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64), np.arange(self.row_count)
+            )
+        return self.orders[column]
+
+
+def _sort_order(values):
+    """SortOrder of a float64 or datetime64 array."""
+    if np.issubdtype(values.dtype, np.datetime64):
+        missing = np.isnat(values)
+        values = values.astype("datetime64[ns]").view(np.int64)
+    else:
+        missing = np.isnan(values)
+    rows = np.flatnonzero(~missing)
+    # Stable, so equal values keep ascending row positions.
+    order = np.argsort(values[rows], kind="stable")
+    return SortOrder(values[rows][order], rows[order].astype(np.int64), np.flatnonzero(missing).astype(np.int64))
+
+
+def sort_columns(data):
+    """Columns an OrderIndex of data sorts by: the date column, then the measure columns."""
+    ds = as_prepared(data)
+    schema = ds.schema
+    candidates = [ds.date_col if ds.dates is not None else None]
+    candidates += [schema.amount, schema.sales, *MEASURE_COLUMNS]
+    columns = []
+    for col in candidates:
+        if col is not None and col in ds.columns and col not in columns:
+            columns.append(col)
+    return columns
+
+
+def _sort_values(ds, col):
+    """Sort keys of col: datetime64 for the date column, else float64 (NaN where missing)."""
+    if col == ds.date_col and ds.dates is not None:
+        return ds.dates.to_numpy(dtype="datetime64[ns]")
+    return ds.measure(col).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def build_order_index(data):
+    """OrderIndex over the date and measure columns of a DataFrame or PreparedDataset."""
+    ds = as_prepared(data)
+    return OrderIndex(len(ds), {col: _sort_order(_sort_values(ds, col)) for col in sort_columns(ds)})
+
+
+def build_order_index_chunks(chunks):
+    """
+    build_order_index over consecutive PreparedDataset chunks of one dataset
+    (e.g. a streamed CSV), holding only their sort keys rather than every row.
+    """
+    columns, keys, row_count = None, {}, 0
+    for ds in chunks:
+        if columns is None:
+            columns = sort_columns(ds)
+        for col in columns:
+            keys.setdefault(col, []).append(_sort_values(ds, col))
+        row_count += len(ds)
+    return OrderIndex(row_count, {col: _sort_order(np.concatenate(parts)) for col, parts in keys.items()})
+
+
+def write_order_index(index):
+    """Serialize an OrderIndex to .npz bytes (no pickled objects)."""
+    arrays = {
+        "version": np.array(ORDER_INDEX_VERSION),
+        "row_count": np.array(index.row_count),
+        "columns": np.array(list(index.orders), dtype=str),
+    }
+    for i, order in enumerate(index.orders.values()):
+        arrays[f"values_{i}"] = order.values
+        arrays[f"rows_{i}"] = order.rows
+        arrays[f"nulls_{i}"] = order.nulls
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def read_order_index(source):
+    """OrderIndex from write_order_index() bytes or a file object; None for another version."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with np.load(source, allow_pickle=False) as npz:
+        if int(npz["version"]) != ORDER_INDEX_VERSION:
+            return None
+        orders = {
+            str(col): SortOrder(npz[f"values_{i}"], npz[f"rows_{i}"], npz[f"nulls_{i}"])
+            for i, col in enumerate(npz["columns"])
+        }
+        return OrderIndex(int(npz["row_count"]), orders)
+
+
+def encode_cursor(sort, key):
+    """Opaque cursor for the row after key = (value, row) in sort order."""
+    raw = json.dumps([sort, key[0], key[1]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    """
+    (value, row) key of a cursor from encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, row = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort")
+    if not isinstance(row, int) or not (value is None or isinstance(value, (int, float))):
+        raise ValueError("Invalid cursor")
+    return value, row
+
+
+def default_sort(index):
+    """Newest first when the data has dates, else the first sortable column descending, else row order."""
+    columns = index.columns
+    return f"-{columns[0]}" if columns else ""
+
+
+def orders_page(data, index, sort=None, cursor=None, limit=ORDERS_PAGE_DEFAULT):
+    """
+    One page of rows of data in the order given by sort ("<column>" ascending,
+    "-<column>" descending, "" for row order; default_sort(index) when None).
+
+    Returns {"orders", "columns", "sort", "sortable", "limit", "next_cursor"};
+    next_cursor is None on the last page.
+
+    Raises:
+        ValueError: If sort is not a sortable column or the cursor is invalid.
+    """
+    ds = as_prepared(data)
+    sort = default_sort(index) if sort is None else sort
+    descending = sort.startswith("-")
+    column = sort[1:] if descending else sort
+    if column and column not in index.orders:
+        raise ValueError(f"sort must be one of: {', '.join(index.columns)} (prefix - for descending)")
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    page, more = index.order(column).page(descending, after, limit)
+    columns = list(ds.columns)
+    rows = dataframe_to_rows(ds.frame.iloc[[row for row, _ in page]], columns)
+    return {
+        "orders": rows,
+        "columns": columns,
+        "sort": sort,
+        "sortable": index.columns,
+        "limit": limit,
+        "next_cursor": encode_cursor(sort, page[-1][1]) if more and page else None,
+    }
@@ -4,8 +4,10 @@ Orders overview: trend, by status, by channel, by region, top products.
 
 import pandas as pd
 
-from .utils import find_date_col, find_column_by_keywords
+from .prepared import as_prepared
+from .timeseries import daily_base
 from .constants import STATUS_COLORS, CHANNEL_COLORS
+from .utils import count_values, top_k_positions
 
 
 def orders_trend_daily(df):
@@ -13,26 +15,15 @@ def orders_trend_daily(df):
     Aggregate orders by date for the Orders Overview line chart.
     Returns {"orders_trend": [{"date": str, "orders": number}, ...]} or None.
     """
-    df = df.copy()
-    date_col = find_date_col(df)
-    if date_col is None or date_col not in df.columns:
+    base = daily_base(df)
+    if base is None:
         return None
-    df["_dt"] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
-    df = df.dropna(subset=["_dt"])
-    if len(df) == 0:
-        return None
-    df["_date_str"] = df["_dt"].dt.strftime("%Y-%m-%d")
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        agg = df.groupby("_date_str")["orders"].sum()
-    else:
-        agg = df.groupby("_date_str").size()
-    agg = agg.sort_index()
-    if len(agg) > 60:
-        agg = agg.tail(60)
+    # Per-day totals come from the shared daily base; only the last 60 days are labelled.
+    totals = base.totals
+    agg = (totals["orders"] if "orders" in totals.columns else totals["rows"]).tail(60)
     return {
         "orders_trend": [
-            {"date": str(d), "orders": int(v)}
+            {"date": d.strftime("%Y-%m-%d"), "orders": int(v)}
             for d, v in agg.items()
         ]
     }
@@ -43,16 +34,17 @@ def orders_by_status_component(df):
     Find a status-like column and return value counts for donut chart.
     Returns {"orders_by_status": [{"name": str, "value": int, "color": str}, ...]} or None.
     """
-    col = find_column_by_keywords(
-        df, ["status", "order status", "state", "order state", "fulfillment"]
-    )
-    if col is None:
-        col = "category" if "category" in df.columns else None
+    ds = as_prepared(df)
+    col = ds.schema.status
     if col is None:
         return None
-    s = df[col].dropna().astype(str).str.strip()
+    s = ds.dimension(col)[ds.frame[col].notna()]
     s = s[s.str.lower() != "nan"]
-    counts = s.value_counts()
+    return _status_payload(count_values(s))
+
+
+def _status_payload(counts):
+    """Finish orders_by_status_component from value counts sorted descending."""
     if len(counts) == 0:
         return None
     out = []
@@ -72,17 +64,20 @@ def orders_by_channel_component(df):
     Find a channel/source column and return order counts for horizontal bar chart.
     Returns {"orders_by_channel": [{"name": str, "orders": int, "fill": str}, ...]} or None.
     """
-    col = find_column_by_keywords(
-        df, ["channel", "source", "sales channel", "platform", "payment_method", "payment method"]
-    )
+    ds = as_prepared(df)
+    col = ds.schema.channel
     if col is None:
         return None
-    df = df.copy()
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        agg = df.groupby(df[col].astype(str).str.strip(), dropna=True)["orders"].sum()
+    names = ds.dimension(col)
+    if "orders" in ds.columns:
+        agg = ds.measure("orders").fillna(0).groupby(names, dropna=True, observed=True).sum()
     else:
-        agg = df.groupby(df[col].astype(str).str.strip(), dropna=True).size()
+        agg = names.groupby(names, dropna=True, observed=True).size()
+    return _channel_payload(agg)
+
+
+def _channel_payload(agg):
+    """Finish orders_by_channel_component from order totals indexed by channel."""
     agg = agg[agg.index.str.strip().str.lower() != "nan"]
     agg = agg.sort_values(ascending=True)
     if len(agg) == 0:
@@ -102,24 +97,25 @@ def orders_by_region_component(df):
     Aggregate orders by region (or state/country) for progress bars.
     Returns {"orders_by_region": [{"name": str, "orders": int}, ...]} or None.
     """
-    geo_col = None
-    for c in ["region", "state", "country"]:
-        if c in df.columns:
-            geo_col = c
-            break
+    ds = as_prepared(df)
+    geo_col = ds.schema.region
     if geo_col is None:
         return None
-    df = df.copy()
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        agg = df.groupby(df[geo_col].astype(str).str.strip(), dropna=True)["orders"].sum()
+    names = ds.dimension(geo_col)
+    if "orders" in ds.columns:
+        agg = ds.measure("orders").fillna(0).groupby(names, dropna=True, observed=True).sum()
     else:
-        agg = df.groupby(df[geo_col].astype(str).str.strip(), dropna=True).size()
+        agg = names.groupby(names, dropna=True, observed=True).size()
+    return _region_payload(agg)
+
+
+def _region_payload(agg):
+    """Finish orders_by_region_component from order totals indexed by region."""
     agg = agg[agg.index.str.strip().str.lower() != "nan"]
-    agg = agg.sort_values(ascending=False)
     if len(agg) == 0:
         return None
-    out = [{"name": str(n).strip(), "orders": int(v)} for n, v in agg.items()][:10]
+    agg = agg.iloc[top_k_positions(agg, 10)]
+    out = [{"name": str(n).strip(), "orders": int(v)} for n, v in agg.items()]
     return {"orders_by_region": out}
 
 
@@ -128,30 +124,33 @@ def top_products_by_orders_component(df):
     Top products (or category) by order count and revenue for Orders Overview table.
     Returns {"top_products_by_orders": [{"product": str, "orders": int, "revenue": float, "avgQty": float}, ...]} or None.
     """
-    product_col = None
-    for c in ["product name", "product_name", "productname", "category", "product id", "product_id"]:
-        if c in df.columns:
-            product_col = c
-            break
+    ds = as_prepared(df)
+    product_col = ds.schema.ranking_product
     if product_col is None:
         return None
-    df = df.copy()
-    df[product_col] = df[product_col].astype(str).str.strip()
-    df = df[df[product_col].str.lower() != "nan"]
-    if "orders" in df.columns:
-        df["orders"] = pd.to_numeric(df["orders"], errors="coerce").fillna(0)
-        orders_agg = df.groupby(product_col)["orders"].sum()
+    names = ds.dimension(product_col)
+    keep = names.str.lower() != "nan"
+    names = names[keep]
+    if "orders" in ds.columns:
+        orders_agg = ds.measure("orders")[keep].fillna(0).groupby(names, observed=True).sum()
     else:
-        orders_agg = df.groupby(product_col).size()
-    if "revenue" in df.columns:
-        df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce").fillna(0)
-        revenue_agg = df.groupby(product_col)["revenue"].sum()
+        orders_agg = names.groupby(names, observed=True).size()
+    if "revenue" in ds.columns:
+        revenue_agg = ds.measure("revenue")[keep].fillna(0).groupby(names, observed=True).sum()
     else:
         revenue_agg = pd.Series(dtype=float)
-    count_agg = df.groupby(product_col).size()
+    count_agg = names.groupby(names, observed=True).size()
+    return _top_products_payload(orders_agg, revenue_agg, count_agg)
+
+
+def _top_products_payload(orders_agg, revenue_agg, count_agg):
+    """Finish top_products_by_orders_component from per-product totals."""
+    # Rank on the whole order counts the payload reports; only the top 10 are built.
+    orders_int = orders_agg.astype("int64")
+    top = orders_int.index[top_k_positions(orders_int, 10)]
     result = []
-    for name in orders_agg.index:
-        orders_val = int(orders_agg[name])
+    for name in top:
+        orders_val = int(orders_int[name])
         revenue_val = float(revenue_agg[name]) if name in revenue_agg.index else 0
         cnt = int(count_agg[name])
         avg_qty = round(orders_val / cnt, 1) if cnt else 0
@@ -161,5 +160,4 @@ def top_products_by_orders_component(df):
             "revenue": revenue_val,
             "avgQty": avg_qty,
         })
-    result.sort(key=lambda x: x["orders"], reverse=True)
-    return {"top_products_by_orders": result[:10]}
+    return {"top_products_by_orders": result}
@@ -0,0 +1,243 @@
+"""
+Prepared dataset: parse the uploaded frame once and share it across components.
+
+Every analytics component used to copy the frame and re-run pd.to_datetime,
+pd.to_numeric and .astype(str).str.strip() on the same columns. A
+PreparedDataset holds those parsed columns so each is computed at most once
+per request.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import detect_schema
+from .utils import find_date_col, first_value_date_format, to_datetime_column
+
+logger = logging.getLogger(__name__)
+
+# Measures parsed eagerly in prepare_dataset; other numeric columns are parsed on first use.
+MEASURE_COLUMNS = ("revenue", "profit", "orders", "expense")
+
+
+@dataclass(frozen=True)
+class PreparedDataset:
+    """
+    Read-only view of an uploaded DataFrame with its parsed columns.
+
+    - frame: the DataFrame as read (never mutated by components).
+    - date_col: detected date column, or None.
+    - dates: date column parsed with dayfirst=True (NaT where invalid), or None.
+    - source_currency: detected source currency code.
+    - schema: column roles (SchemaProfile), detected on first use unless
+      given to prepare_dataset (e.g. the profile stored at upload).
+
+    Numeric measures and normalized (str + strip) dimensions are available via
+    measure(col) and dimension(col); each column is parsed once and cached.
+    Returned Series are shared, so callers must not modify them in place.
+    """
+
+    frame: pd.DataFrame
+    date_col: Optional[str]
+    dates: Optional[pd.Series]
+    source_currency: str = "USD"
+    _measures: Dict[str, pd.Series] = field(default_factory=dict, repr=False, compare=False)
+    _dimensions: Dict[str, pd.Series] = field(default_factory=dict, repr=False, compare=False)
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _key_locks: Dict[Any, threading.Lock] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def columns(self):
+        return self.frame.columns
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _cached(self, cache, key, compute):
+        """
+        Return cache[key], computing it once. Each key has its own lock, so
+        components running in parallel only wait for the column they need.
+        """
+        with self._lock:
+            if key in cache:
+                return cache[key]
+            key_lock = self._key_locks.setdefault((id(cache), key), threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in cache:
+                    return cache[key]
+            value = compute()
+            with self._lock:
+                cache[key] = value
+            return value
+
+    def derived(self, key, factory):
+        """
+        Return a value derived from this dataset (e.g. its DailyBase or
+        OrderIndex) under key, built once with factory() and kept as long as
+        the dataset (so frame-cached datasets share it across requests).
+        """
+        return self._cached(self._derived, key, factory)
+
+    @property
+    def schema(self):
+        return self.derived("schema", lambda: detect_schema(self.frame))
+
+    def measure(self, col):
+        """Return column parsed with pd.to_numeric(errors="coerce"), as int64 or float64."""
+        return self._cached(self._measures, col, lambda: _parse_measure(self.frame[col]))
+
+    def dimension(self, col):
+        """
+        Return column as stripped strings (NaN becomes "nan", as with astype(str)).
+        Categorical columns stay categorical, with sorted stripped categories;
+        group on them with observed=True.
+        """
+        return self._cached(self._dimensions, col, lambda: _parse_dimension(self.frame[col]))
+
+    def memory_usage(self):
+        """
+        Approximate bytes held: the frame (deep, measured once) plus the dates,
+        every column parsed so far (shallow: object values count as pointers,
+        which mostly reference the frame's own strings) and derived arrays that
+        report nbytes (e.g. an OrderIndex).
+        """
+        frame_bytes = self._cached(
+            self._derived, "frame_bytes", lambda: int(self.frame.memory_usage(deep=True).sum())
+        )
+        with self._lock:
+            parsed = list(self._measures.values()) + list(self._dimensions.values())
+            derived = sum(getattr(v, "nbytes", 0) for v in self._derived.values())
+        if self.dates is not None:
+            parsed.append(self.dates)
+        return frame_bytes + derived + sum(int(s.memory_usage(index=False)) for s in parsed)
+
+
+def _parse_measure(series):
+    """
+    pd.to_numeric(series, errors="coerce") for object, categorical or
+    compacted numeric columns. Narrow ints and floats are widened back to 64
+    bits so sums and differences cannot overflow.
+    """
+    if isinstance(getattr(series, "dtype", None), pd.CategoricalDtype):
+        # Parse each distinct value once; missing codes (-1) pick the trailing NaN.
+        numbers = pd.to_numeric(pd.Series(series.cat.categories, dtype=object), errors="coerce")
+        codes = series.cat.codes.to_numpy()
+        if numbers.dtype.kind in "iu" and (codes >= 0).all():
+            values = numbers.to_numpy()[codes]
+        else:
+            values = np.append(numbers.to_numpy(dtype=float), np.nan)[codes]
+        return pd.Series(values, index=series.index, name=series.name)
+    parsed = pd.to_numeric(series, errors="coerce")
+    if parsed.dtype.kind in "iu" and parsed.dtype.itemsize < 8:
+        return parsed.astype(np.int64)
+    if parsed.dtype.kind == "f" and parsed.dtype.itemsize < 8:
+        return parsed.astype(np.float64)
+    return parsed
+
+
+def _parse_dimension(series):
+    """series.astype(str).str.strip(), keeping categorical columns categorical."""
+    if not isinstance(getattr(series, "dtype", None), pd.CategoricalDtype):
+        return series.astype(str).str.strip()
+    # Strip each category once, merge the ones that become equal, map missing to "nan".
+    labels = np.append(series.cat.categories.astype(str).str.strip().to_numpy(dtype=object), "nan")
+    uniques, inverse = np.unique(labels, return_inverse=True)
+    values = pd.Categorical.from_codes(inverse[series.cat.codes.to_numpy()], categories=uniques)
+    return pd.Series(values, index=series.index, name=series.name).cat.remove_unused_categories()
+
+
+def guess_date_format(df):
+    """
+    Format pandas infers for df's date column (from its first value, dayfirst),
+    or None; df.attrs["date_format"] when set (see read_columnar). Pass it to
+    prepare_dataset for later chunks of the same file so every chunk is parsed
+    like the first.
+    """
+    if df.attrs.get("date_format"):
+        return df.attrs["date_format"]
+    date_col = find_date_col(df)
+    if date_col is None or not isinstance(df[date_col], pd.Series):
+        return None
+    return first_value_date_format(df[date_col], dayfirst=True)
+
+
+def prepare_dataset(df, date_format=None, schema=None):
+    """
+    Build a PreparedDataset from a DataFrame returned by read_uploaded_file.
+
+    Parses the date column and the standard measures up front; the frame
+    itself is not copied. date_format (by default df.attrs["date_format"],
+    set for stored copies) fixes the date format instead of inferring it from
+    the first value. schema (a SchemaProfile) skips column role detection.
+    """
+    date_format = date_format or df.attrs.get("date_format")
+    date_col = schema.date if schema is not None else find_date_col(df)
+    dates = None
+    if date_col is not None and isinstance(df[date_col], pd.Series):
+        dates = to_datetime_column(df[date_col], date_format, dayfirst=True)
+
+    prepared = PreparedDataset(
+        frame=df,
+        date_col=date_col,
+        dates=dates,
+        source_currency=df.attrs.get("source_currency", "USD"),
+    )
+    if schema is not None:
+        prepared._derived["schema"] = schema
+    for col in MEASURE_COLUMNS:
+        # Duplicate column names yield a DataFrame; leave those to fail in the component.
+        if col in df.columns and isinstance(df[col], pd.Series):
+            prepared.measure(col)
+    return prepared
+
+
+def filter_by_date(ds, start_date=None, end_date=None):
+    """
+    PreparedDataset of the rows of ds whose day (from ds.dates, so parsed as
+    for every other component) is within [start_date, end_date], both
+    optional and inclusive, as DailyRollup.between selects them. Rows without
+    a date are left out. The subset keeps ds's schema and parsed columns.
+
+    Returns ds itself without a range or a date column, or when start_date is
+    after end_date (logged, as filter_df_by_date does).
+    """
+    if (start_date is None and end_date is None) or ds.dates is None:
+        return ds
+    start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+    if start is not None and end is not None and start > end:
+        logger.warning("filter_by_date: start_date after end_date (%s > %s); not filtering", start_date, end_date)
+        return ds
+    day = ds.dates.dt.normalize()
+    keep = day.notna()
+    if start is not None:
+        keep &= day >= start
+    if end is not None:
+        keep &= day <= end
+    keep = keep.to_numpy()
+
+    subset = PreparedDataset(
+        frame=ds.frame[keep],
+        date_col=ds.date_col,
+        dates=ds.dates[keep],
+        source_currency=ds.source_currency,
+    )
+    subset._derived["schema"] = ds.schema
+    with ds._lock:
+        measures = dict(ds._measures)
+    for col, values in measures.items():
+        subset._measures[col] = values[keep]
+    return subset
+
+
+def as_prepared(data):
+    """Return data unchanged if already prepared, else prepare the DataFrame."""
+    if isinstance(data, PreparedDataset):
+        return data
+    return prepare_dataset(data)
@@ -0,0 +1,269 @@
+"""
+Daily rollup: per-day sums built once at upload, used to answer date-range queries.
+
+The rollup is one long table with a row per (day, dimension, key):
+  - dimension "total":   key "", sums over all rows of that day
+  - dimension "product": key is the product/category value
+  - dimension "region":  key is the region/state/country value
+Each row carries revenue/profit/orders/expense sums (for the columns the dataset
+has), an "amount" sum of the schema's amount column (the time series' revenue,
+as daily_base reads it), a "sales" sum of the positive values of the schema's sales column (the
+comparison bar chart's measure) and a row count, so KPIs and time/product/region
+charts for any date range cost O(days) instead of O(rows).
+"""
+
+import io
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from .charts import _bucketed_series, _comparison_payload, _map_payload, _multiline_payload, _top_products_data
+from .constants import LINECHART_MAX_POINTS
+from .orders import _region_payload
+from .prepared import as_prepared
+from .timeseries import DailyBase
+
+ROLLUP_MEASURES = ("revenue", "profit", "orders", "expense", "amount", "sales")
+
+# Key under which rollup metadata is stored in the Parquet schema.
+METADATA_KEY = b"businalyst_rollup"
+
+
+@dataclass(frozen=True)
+class DailyRollup:
+    """Long-format daily rollup plus the source columns used for each breakdown."""
+
+    table: pd.DataFrame
+    product_col: Optional[str] = None
+    region_col: Optional[str] = None
+
+    @property
+    def measures(self):
+        return [m for m in ROLLUP_MEASURES if m in self.table.columns]
+
+    def between(self, start=None, end=None):
+        """Return the rollup restricted to days in [start, end] (inclusive, either optional)."""
+        day = self.table["day"]
+        mask = pd.Series(True, index=self.table.index)
+        if start is not None:
+            mask &= day >= pd.Timestamp(start).normalize()
+        if end is not None:
+            mask &= day <= pd.Timestamp(end).normalize()
+        return DailyRollup(self.table[mask], self.product_col, self.region_col)
+
+    def totals(self):
+        """Per-day totals indexed by day."""
+        rows = self.table[self.table["dimension"] == "total"]
+        return rows.drop(columns=["dimension", "key"]).set_index("day").sort_index()
+
+    def breakdown(self, dimension):
+        """Sums per key over the whole rollup for "product" or "region", in first-seen order."""
+        rows = self.table[self.table["dimension"] == dimension]
+        cols = self.measures + ["rows"]
+        return rows.groupby("key", sort=False)[cols].sum()
+
+
+def build_daily_rollup(data):
+    """
+    Build a DailyRollup from a DataFrame or PreparedDataset.
+
+    Rows without a parseable date are left out. Returns None when the dataset
+    has no date column.
+    """
+    ds = as_prepared(data)
+    if ds.dates is None:
+        return None
+    valid = ds.dates.notna()
+    base = pd.DataFrame({"day": ds.dates[valid].dt.normalize()})
+    for col in ROLLUP_MEASURES:
+        if col in ds.columns:
+            base[col] = ds.measure(col)[valid]
+    if ds.schema.amount is not None:
+        base["amount"] = ds.measure(ds.schema.amount)[valid]
+    if ds.schema.sales is not None:
+        sales = ds.measure(ds.schema.sales)[valid]
+        base["sales"] = sales.where(sales > 0)
+    base["rows"] = 1
+    cols = [c for c in base.columns if c != "day"]
+
+    parts = []
+    totals = base.groupby("day")[cols].sum().reset_index()
+    totals.insert(1, "dimension", "total")
+    totals.insert(2, "key", "")
+    parts.append(totals)
+
+    product_col = ds.schema.product
+    region_col = ds.schema.region
+    for dimension, col in (("product", product_col), ("region", region_col)):
+        if col is None:
+            continue
+        keyed = base.assign(key=ds.dimension(col)[valid])
+        agg = keyed.groupby(["day", "key"], sort=False, observed=True)[cols].sum().reset_index()
+        agg["key"] = agg["key"].astype(object)
+        agg.insert(1, "dimension", dimension)
+        parts.append(agg)
+
+    table = pd.concat(parts, ignore_index=True)
+    table["dimension"] = table["dimension"].astype("category")
+    return DailyRollup(table, product_col, region_col)
+
+
+def merge_rollups(rollups):
+    """
+    Combine rollups built from disjoint sets of rows (e.g. CSV chunks).
+
+    All parts must come from the same columns; measures missing from some
+    parts (rollups stored before they were added) are dropped. Returns None
+    for no parts.
+    """
+    parts = [r for r in rollups if r is not None]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    table = pd.concat([r.table for r in parts], ignore_index=True)
+    partial = [m for m in ROLLUP_MEASURES if m in table.columns and not all(m in r.table.columns for r in parts)]
+    table = table.drop(columns=partial)
+    table = (
+        table.groupby(["day", "dimension", "key"], sort=True, observed=True)
+        .sum()
+        .reset_index()
+    )
+    table["dimension"] = table["dimension"].astype("category")
+    return DailyRollup(table, parts[0].product_col, parts[0].region_col)
+
+
+def write_rollup(rollup):
+    """Serialize a DailyRollup to Parquet bytes (requires pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(rollup.table, preserve_index=False)
+    meta = {"product_col": rollup.product_col, "region_col": rollup.region_col}
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(meta).encode("utf-8"),
+    })
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression="snappy")
+    return buf.getvalue()
+
+
+def read_rollup(source):
+    """Load a DailyRollup written by write_rollup from a path or binary file object."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(source)
+    raw_meta = (table.schema.metadata or {}).get(METADATA_KEY)
+    meta = json.loads(raw_meta) if raw_meta else {}
+    return DailyRollup(table.to_pandas(), meta.get("product_col"), meta.get("region_col"))
+
+
+def rollup_kpis(rollup):
+    """Same keys as calculate_kpis, computed from rollup rows."""
+    missing = [col for col in ("profit", "revenue", "orders", "expense") if col not in rollup.measures]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    totals = rollup.totals()
+    return {
+        "profit_sum": float(totals["profit"].sum()),
+        "revenue_sum": float(totals["revenue"].sum()),
+        "orders_sum": float(totals["orders"].sum()),
+        "expense_sum": float(totals["expense"].sum()),
+        "customers_sum": int(totals["rows"].sum()),
+    }
+
+
+def _valid_keys(agg):
+    keys = agg.index.astype(str)
+    return agg[(keys.str.lower() != "nan") & (keys != "")]
+
+
+def rollup_linechart(rollup, max_points=LINECHART_MAX_POINTS):
+    """Bucketed line chart (see charts.linechart) from a DailyRollup's per-day product rows or totals."""
+    measures = [m for m in ("revenue", "profit", "orders") if m in rollup.measures]
+    if rollup.product_col is not None:
+        table = rollup.table[rollup.table["dimension"] == "product"]
+        daily = table[["day", "key"] + measures].rename(columns={"day": "_day", "key": "_product"})
+    else:
+        daily = rollup.totals()[measures].rename_axis("_day").reset_index()
+    return _bucketed_series(daily, max_points)
+
+
+def rollup_comparison_bar(rollup):
+    """
+    comparison_bar_chart from the rollup's per-day product "sales" sums, or
+    None when the rollup has no products or sales. Periods are split by day.
+    """
+    if rollup.product_col is None or "sales" not in rollup.measures:
+        return None
+    rows = rollup.table[rollup.table["dimension"] == "product"]
+    rows = rows[rows["key"].astype(str).str.lower() != "nan"]
+    sums = rows.groupby(["day", "key"], observed=True)["sales"].sum()
+    return _comparison_payload(sums[sums > 0])
+
+
+def rollup_map(rollup):
+    """
+    map_orders_by_region from the rollup's region "orders" sums, or None when
+    the rollup has no regions or no orders column (the map then counts
+    distinct order ids or rows, which the rollup cannot).
+    """
+    if rollup.region_col is None or "orders" not in rollup.measures:
+        return None
+    orders = rollup.breakdown("region")["orders"]
+    places = orders.index.astype(str).str.replace(r"\s+", " ", regex=True)
+    return _map_payload(rollup.region_col, orders.groupby(places).sum())
+
+
+def rollup_payload(rollup):
+    """
+    Build the range-query payload from a (filtered) DailyRollup.
+
+    Contains KPIs, the bucketed line chart (per product when the rollup has
+    products, as for full loads), orders_trend, monthly multiline series,
+    the product and region rankings, the comparison bar and the map. Tables,
+    the orders list, the pie and the status/channel/product order breakdowns
+    need row-level columns and are omitted, as are the comparison bar and map
+    when the rollup cannot answer them (see rollup_comparison_bar, rollup_map).
+    """
+    payload = dict(rollup_kpis(rollup))
+    totals = rollup.totals()
+    order_counts = totals["orders"] if "orders" in totals.columns else totals["rows"]
+
+    payload.update(rollup_linechart(rollup))
+
+    payload["orders_trend"] = [
+        {"date": d.strftime("%Y-%m-%d"), "orders": int(v)}
+        for d, v in order_counts.tail(60).items()
+    ]
+
+    if not totals.empty:
+        monthly = DailyBase.from_totals(totals).bucket("monthly")
+        if "revenue" in monthly.columns:
+            payload.update(_multiline_payload(monthly["revenue"], monthly["orders"], "%b %Y"))
+
+    if rollup.product_col is not None:
+        products = _valid_keys(rollup.breakdown("product"))
+        bar = _top_products_data(products["revenue"])
+        if bar:
+            payload["bar_column"] = rollup.product_col
+            payload["bar_data"] = bar
+        profit_bar = _top_products_data(products["profit"])
+        if profit_bar:
+            payload["profit_by_product_column"] = rollup.product_col
+            payload["profit_by_product_data"] = profit_bar
+
+    if rollup.region_col is not None:
+        regions = rollup.breakdown("region")
+        by_region = _region_payload(regions["orders"] if "orders" in regions.columns else regions["rows"])
+        if by_region:
+            payload.update(by_region)
+
+    for result in (rollup_comparison_bar(rollup), rollup_map(rollup)):
+        if result is not None and "error" not in result:
+            payload.update(result)
+
+    return payload
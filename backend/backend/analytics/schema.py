@@ -0,0 +1,148 @@
+"""
+Schema profile: which column plays which role, detected once per dataset.
+
+Components used to look up their columns (date, product, status, ...) on every
+call, and the pie / comparison lookups can fall back to scanning every column's
+values. detect_schema runs all of those lookups once; the resulting
+SchemaProfile is stored on UserDataset (schema_json) and reaches components
+through PreparedDataset.schema.
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+from . import utils as analytics_utils
+
+PRODUCT_COLUMNS = ("product name", "product_name", "productname", "product")
+CATEGORY_COLUMNS = ("category", "sub-category", "sub_category")
+SALES_COLUMNS = ("revenue", "sales", "amount", "total", "net_sales", "net sales")
+ORDER_ID_COLUMNS = ("order id", "order_id", "orderid", "order number", "order_number", "transaction_id")
+REGION_COLUMNS = ("region", "state", "country")
+GEO_COLUMNS = ("region", "state", "country", "location", "city", "province")
+RANKING_PRODUCT_COLUMNS = ("product name", "product_name", "productname", "category", "product id", "product_id")
+STATUS_KEYWORDS = ["status", "order status", "state", "order state", "fulfillment"]
+CHANNEL_KEYWORDS = ["channel", "source", "sales channel", "platform", "payment_method", "payment method"]
+AMOUNT_KEYWORDS = ["revenue", "sales", "amount", "total"]
+
+
+@dataclass(frozen=True)
+class SchemaProfile:
+    """
+    Column name per role, or None when the dataset has no such column.
+
+    - date: date column (find_date_col).
+    - revenue / profit / orders / expense: the standard measure columns.
+    - sales: sales value for the comparison and top-products bar charts.
+    - amount: first column whose name contains revenue/sales/amount/total (multiline chart).
+    - product: product (or category) for line, bar, profit and rollup breakdowns.
+    - ranking_product: product key for the top-products-by-orders table.
+    - dimension: grouping for the comparison bar chart.
+    - region: region/state/country for orders by region and the rollup.
+    - geo: place column for the map.
+    - status / channel / order_id: orders overview lookups.
+    - pie: categorical column for the pie chart.
+    """
+
+    date: Optional[str] = None
+    revenue: Optional[str] = None
+    profit: Optional[str] = None
+    orders: Optional[str] = None
+    expense: Optional[str] = None
+    sales: Optional[str] = None
+    amount: Optional[str] = None
+    product: Optional[str] = None
+    ranking_product: Optional[str] = None
+    dimension: Optional[str] = None
+    region: Optional[str] = None
+    geo: Optional[str] = None
+    status: Optional[str] = None
+    channel: Optional[str] = None
+    order_id: Optional[str] = None
+    pie: Optional[str] = None
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from to_dict() output; unknown keys are ignored, missing roles are None."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (data or {}).items() if k in names})
+
+
+def _first_present(df, candidates):
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def find_product_col(df):
+    """Return the first product/category column found in df."""
+    return _first_present(df, PRODUCT_COLUMNS) or _first_present(df, CATEGORY_COLUMNS)
+
+
+def find_sales_col(df):
+    """Return the best column representing sales/revenue values."""
+    return _first_present(df, SALES_COLUMNS)
+
+
+def find_order_id_col(df):
+    """Return an order-ID column if present."""
+    return _first_present(df, ORDER_ID_COLUMNS)
+
+
+def find_dimension_col(df):
+    """Return the best grouping dimension: product > category > location."""
+    col = (
+        _first_present(df, PRODUCT_COLUMNS)
+        or _first_present(df, CATEGORY_COLUMNS + ("subcategory",))
+        or _first_present(df, ("region", "state", "country", "location", "city"))
+    )
+    if col is not None:
+        return col
+    # Fallback: first bar-chart-suitable column
+    for col in df.columns:
+        if analytics_utils.is_bar_chart_categorical(df, col):
+            return col
+    return None
+
+
+def find_pie_col(df):
+    """Pick a categorical column for the pie chart: category/campaign, else the last good text column."""
+    for candidate in ["category", "campaign"]:
+        if candidate in df.columns and analytics_utils.is_good_categorical(df, candidate):
+            return candidate
+    for col in list(df.columns)[::-1]:
+        if analytics_utils.is_geography_column(col) or analytics_utils.is_payment_column(col):
+            continue
+        if analytics_utils.is_good_categorical(df, col):
+            return col
+    return None
+
+
+def find_status_col(df):
+    """Status-like column, else "category" when present."""
+    col = analytics_utils.find_column_by_keywords(df, STATUS_KEYWORDS)
+    if col is None and "category" in df.columns:
+        col = "category"
+    return col
+
+
+def detect_schema(df):
+    """Run every column-role lookup on df (columns already lowercased) once."""
+    return SchemaProfile(
+        date=analytics_utils.find_date_col(df),
+        revenue=_first_present(df, ("revenue",)),
+        profit=_first_present(df, ("profit",)),
+        orders=_first_present(df, ("orders",)),
+        expense=_first_present(df, ("expense",)),
+        sales=find_sales_col(df),
+        amount=analytics_utils.find_column_by_keywords(df, AMOUNT_KEYWORDS),
+        product=find_product_col(df),
+        ranking_product=_first_present(df, RANKING_PRODUCT_COLUMNS),
+        dimension=find_dimension_col(df),
+        region=_first_present(df, REGION_COLUMNS),
+        geo=_first_present(df, GEO_COLUMNS),
+        status=find_status_col(df),
+        channel=analytics_utils.find_column_by_keywords(df, CHANNEL_KEYWORDS),
+        order_id=find_order_id_col(df),
+        pie=find_pie_col(df),
+    )
@@ -0,0 +1,656 @@
+"""
+Streaming ingestion: build the analytics payload from a CSV read in fixed-size chunks.
+
+read_uploaded_file loads the whole file (and normalize_money_columns copies it
+again), so peak memory grows with file size. aggregate_csv instead reads
+DEFAULT_CHUNK_ROWS rows at a time and folds each chunk into a
+StreamingAggregator: KPI sums, a daily rollup (per day / product / region),
+per-status, per-channel, per-place and per-product totals, and top-K row
+candidates for the tables. Partials are mergeable (merge()), and the finished
+components are built from them with the same helpers the in-memory components
+use, so memory is bounded by the number of distinct keys rather than rows.
+An aggregator can be saved (to_bytes: JSON for roles, sums and table rows,
+Parquet for the partial Series/DataFrames and the rollup; no pickled
+objects) and later resumed with more rows (aggregate_chunks), which is how
+appends to a stored dataset avoid recomputing its history.
+
+Differences from the in-memory pipeline:
+  - Column roles (date, product, status, pie column, ...) and the date format
+    are resolved on the first chunk.
+  - Distinct order-id counts are summed per chunk, so an order whose rows span
+    two chunks is counted twice.
+  - The "per_row" line chart mode is not available; "bucketed" is used instead.
+"""
+
+import io
+import json
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from .charts import (
+    MULTILINE_GRANULARITIES,
+    _bucketed_series,
+    _comparison_payload,
+    _lttb_series,
+    _map_payload,
+    _multiline_payload,
+    _pie_payload,
+    _top_products_data,
+)
+from .constants import LINECHART_MAX_POINTS, ORDERS_LIST_MAX
+from .io import iter_uploaded_chunks
+from .orders import _channel_payload, _region_payload, _status_payload, _top_products_payload
+from .prepared import filter_by_date, guess_date_format, prepare_dataset
+from .rollup import build_daily_rollup, merge_rollups, read_rollup, rollup_linechart, write_rollup
+from .schema import SchemaProfile
+from . import utils as analytics_utils
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Bump when StreamingAggregator's attributes change: saved states of other
+# versions are rebuilt instead of loaded (see to_bytes / from_bytes).
+STATE_VERSION = 2
+
+# Partial Series/DataFrames saved as Parquet by to_bytes.
+_PARTIALS = (
+    "status_counts", "channel", "region", "places", "pie_counts",
+    "product_orders", "product_revenue", "product_rows",
+    "bar_revenue", "bar_profit", "multiline",
+)
+
+# Merge buffered rollup / comparison parts once this many have accumulated.
+_COMPACT_EVERY = 16
+
+# Hidden sort key carried by table candidate rows (dropped when rows are rendered).
+_SORT_KEY = "__sort_key"
+
+
+def _combine(a, b):
+    """Add two partial Series/DataFrames by index, keeping first-seen key order."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    levels = list(range(a.index.nlevels))
+    return pd.concat([a, b]).groupby(level=levels, sort=False).sum()
+
+
+def _top_rows(a, b, n):
+    """Keep the n candidate rows with the largest sort key (rows without one are dropped)."""
+    rows = b if a is None else pd.concat([a, b], ignore_index=True)
+    if rows is None:
+        return None
+    return rows.iloc[analytics_utils.top_k_positions(rows[_SORT_KEY], n)].reset_index(drop=True)
+
+
+class _Roles:
+    """Columns each component uses, resolved once from the first chunk."""
+
+    def __init__(self, ds):
+        self.schema = ds.schema
+        self.columns = list(ds.frame.columns)
+        self.date_format = guess_date_format(ds.frame)
+        self.has_dates = ds.dates is not None
+        self.has_orders = self.schema.orders is not None
+        self.has_profit = self.schema.profit is not None
+
+    def to_dict(self):
+        return {**vars(self), "schema": self.schema.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        roles = cls.__new__(cls)
+        vars(roles).update(data, schema=SchemaProfile.from_dict(data["schema"]))
+        return roles
+
+
+def _write_partial(value):
+    """
+    (Parquet bytes, layout) of a partial Series/DataFrame: index levels and
+    values become plain columns; their names go in the JSON layout.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    series = isinstance(value, pd.Series)
+    frame = value.to_frame() if series else value
+    levels = [f"index_{i}" for i in range(frame.index.nlevels)]
+    table = frame.set_axis([f"value_{i}" for i in range(frame.shape[1])], axis=1).reset_index(names=levels)
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(table, preserve_index=False), buf, compression="snappy")
+    layout = {
+        "series": series,
+        "name": value.name if series else None,
+        "columns": None if series else list(frame.columns),
+        "index_names": list(frame.index.names),
+    }
+    return buf.getvalue(), layout
+
+
+def _read_partial(data, layout):
+    """Series/DataFrame written by _write_partial."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(io.BytesIO(data)).to_pandas()
+    frame = table.set_index([f"index_{i}" for i in range(len(layout["index_names"]))])
+    frame.index.names = layout["index_names"]
+    if layout["series"]:
+        return frame.iloc[:, 0].rename(layout["name"])
+    frame.columns = layout["columns"]
+    return frame
+
+
+def _rows_to_dict(rows):
+    """JSON form of table candidate rows: rendered values, plus the sort key when present."""
+    columns = [c for c in rows.columns if c != _SORT_KEY]
+    data = {"columns": columns, "rows": analytics_utils.dataframe_to_rows(rows, columns)}
+    if _SORT_KEY in rows.columns:
+        key = rows[_SORT_KEY]
+        data["dates"] = pd.api.types.is_datetime64_any_dtype(key.dtype)
+        data["sort_key"] = (key.to_numpy(dtype="datetime64[ns]").view(np.int64) if data["dates"] else key).tolist()
+    return data
+
+
+def _rows_from_dict(data):
+    rows = pd.DataFrame(data["rows"], columns=data["columns"])
+    if "sort_key" in data:
+        key = np.array(data["sort_key"], dtype=np.int64 if data["dates"] else np.float64)
+        rows[_SORT_KEY] = key.view("datetime64[ns]") if data["dates"] else key
+    return rows
+
+
+class StreamingAggregator:
+    """
+    Mergeable partial aggregates for the analytics payload.
+
+    Feed chunks (as returned by iter_uploaded_chunks) with update(); combine
+    aggregators built over disjoint chunks with merge(). The component methods
+    (kpis, linechart, table, ..., map) return the same dicts as the
+    corresponding in-memory components.
+    """
+
+    def __init__(self, roles=None):
+        self.roles = roles
+        self.rows = 0
+        self.source_currency = "USD"
+        self.sums = {}
+        self._rollups = []
+        self._comparison = []
+        self.status_counts = None
+        self.channel = None
+        self.region = None
+        self.places = None
+        self.pie_counts = None
+        self.product_orders = None
+        self.product_revenue = None
+        self.product_rows = None
+        self.bar_revenue = None
+        self.bar_profit = None
+        self.multiline = None
+        self.top_profit = None
+        self.latest = None
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Aggregator saved with to_bytes(), or None if it was saved by an
+        incompatible version, in an older format (e.g. a pickle) or is
+        unreadable; callers then rebuild it from the stored rows.
+        """
+        try:
+            return cls._from_archive(data)
+        except (zipfile.BadZipFile, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def _from_archive(cls, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            state = json.loads(archive.read("state.json"))
+            if state.get("version") != STATE_VERSION:
+                return None
+            aggregator = cls(_Roles.from_dict(state["roles"]))
+            aggregator.rows = state["rows"]
+            aggregator.source_currency = state["source_currency"]
+            aggregator.sums = state["sums"]
+            for attr, layout in state["partials"].items():
+                setattr(aggregator, attr, _read_partial(archive.read(f"{attr}.parquet"), layout))
+            if "_comparison" in state["partials"]:
+                aggregator._comparison = [aggregator._comparison]
+            if "rollup.parquet" in archive.namelist():
+                aggregator._rollups = [read_rollup(io.BytesIO(archive.read("rollup.parquet")))]
+            for attr, rows in state["rows_tables"].items():
+                setattr(aggregator, attr, _rows_from_dict(rows))
+        return aggregator
+
+    def to_bytes(self):
+        """
+        Serialized state (compacted), to resume later with from_bytes() and
+        more rows: a zip of state.json and one Parquet file per partial.
+        """
+        # Reading .rollup merges the buffered rollup parts into one.
+        rollup = self.rollup
+        if len(self._comparison) > 1:
+            self._comparison = [pd.concat(self._comparison).groupby(level=[0, 1], sort=False).sum()]
+        partials = {attr: getattr(self, attr) for attr in _PARTIALS if getattr(self, attr) is not None}
+        if self._comparison:
+            partials["_comparison"] = self._comparison[0]
+        state = {
+            "version": STATE_VERSION,
+            "roles": self.roles.to_dict(),
+            "rows": self.rows,
+            "source_currency": self.source_currency,
+            "sums": self.sums,
+            "partials": {},
+            "rows_tables": {
+                attr: _rows_to_dict(getattr(self, attr))
+                for attr in ("top_profit", "latest") if getattr(self, attr) is not None
+            },
+        }
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            for attr, value in partials.items():
+                data, state["partials"][attr] = _write_partial(value)
+                archive.writestr(f"{attr}.parquet", data)
+            if rollup is not None:
+                archive.writestr("rollup.parquet", write_rollup(rollup))
+            archive.writestr("state.json", json.dumps(state))
+        return buf.getvalue()
+
+    @property
+    def schema(self):
+        """SchemaProfile resolved from the first chunk (None before any chunk)."""
+        return self.roles.schema if self.roles is not None else None
+
+    # -- accumulation -------------------------------------------------------
+
+    def resolve_roles(self, chunk):
+        """Pick component columns from chunk (normally the first one read)."""
+        ds = prepare_dataset(chunk)
+        self.roles = _Roles(ds)
+        self.source_currency = ds.source_currency
+
+    def prepare(self, chunk):
+        """PreparedDataset for chunk, with dates parsed in the first chunk's format."""
+        return prepare_dataset(chunk, date_format=self.roles.date_format, schema=self.roles.schema)
+
+    def update(self, chunk):
+        """Fold one normalized chunk into the aggregates."""
+        if self.roles is None:
+            self.resolve_roles(chunk)
+        ds = self.prepare(chunk)
+        if len(ds):
+            self.merge(self._partial(ds))
+        return self
+
+    def merge(self, other):
+        """Add another aggregator's partials (built from different rows) into this one."""
+        if self.roles is None:
+            self.roles = other.roles
+            self.source_currency = other.source_currency
+        self.rows += other.rows
+        for col, value in other.sums.items():
+            self.sums[col] = self.sums.get(col, 0.0) + value
+        self._rollups.extend(other._rollups)
+        self._comparison.extend(other._comparison)
+        for attr in _PARTIALS:
+            setattr(self, attr, _combine(getattr(self, attr), getattr(other, attr)))
+        self.top_profit = _top_rows(self.top_profit, other.top_profit, 5)
+        if self.roles is not None and (self.roles.has_dates or self.roles.has_profit):
+            self.latest = _top_rows(self.latest, other.latest, ORDERS_LIST_MAX)
+        elif other.latest is not None:
+            rows = other.latest if self.latest is None else pd.concat([self.latest, other.latest])
+            self.latest = rows.head(ORDERS_LIST_MAX).reset_index(drop=True)
+        self._compact()
+        return self
+
+    def _compact(self):
+        if len(self._rollups) >= _COMPACT_EVERY:
+            self._rollups = [merge_rollups(self._rollups)]
+        if len(self._comparison) >= _COMPACT_EVERY:
+            self._comparison = [pd.concat(self._comparison).groupby(level=[0, 1], sort=False).sum()]
+
+    def _partial(self, ds):
+        """Aggregates for a single prepared chunk."""
+        roles = self.roles
+        part = StreamingAggregator(roles)
+        frame = ds.frame
+        part.rows = len(ds)
+
+        for col in ("profit", "revenue", "orders", "expense"):
+            if col in frame.columns:
+                part.sums[col] = float(ds.measure(col).sum(skipna=True))
+
+        rollup = build_daily_rollup(ds)
+        if rollup is not None:
+            part._rollups.append(rollup)
+
+        orders = ds.measure("orders").fillna(0) if roles.has_orders else None
+
+        if roles.schema.status is not None:
+            s = ds.dimension(roles.schema.status)[frame[roles.schema.status].notna()]
+            s = s[s.str.lower() != "nan"]
+            part.status_counts = s.value_counts(sort=False)
+
+        if roles.schema.channel is not None:
+            names = ds.dimension(roles.schema.channel)
+            part.channel = orders.groupby(names).sum() if orders is not None else names.groupby(names).size()
+
+        if roles.schema.region is not None:
+            names = ds.dimension(roles.schema.region)
+            part.region = orders.groupby(names).sum() if orders is not None else names.groupby(names).size()
+
+        if roles.schema.geo is not None:
+            places = ds.dimension(roles.schema.geo).str.replace(r"\s+", " ", regex=True)
+            if orders is not None:
+                part.places = orders.groupby(places).sum()
+            elif roles.schema.order_id in ("order id", "order_id", "orderid"):
+                part.places = frame[roles.schema.order_id].groupby(places).nunique()
+            else:
+                part.places = places.groupby(places).size()
+
+        if roles.schema.ranking_product is not None:
+            names = ds.dimension(roles.schema.ranking_product)
+            keep = names.str.lower() != "nan"
+            names = names[keep]
+            part.product_orders = (
+                orders[keep].groupby(names).sum() if orders is not None else names.groupby(names).size()
+            )
+            if "revenue" in frame.columns:
+                part.product_revenue = ds.measure("revenue")[keep].fillna(0).groupby(names).sum()
+            part.product_rows = names.groupby(names).size()
+
+        if roles.schema.pie is not None:
+            counts = ds.dimension(roles.schema.pie)[frame[roles.schema.pie].notna()]
+            part.pie_counts = counts[counts != ""].value_counts(sort=False)
+
+        if roles.schema.product is not None:
+            names = ds.dimension(roles.schema.product)
+            named = (names.str.lower() != "nan") & (names != "")
+            if roles.schema.sales is not None:
+                revenue = ds.measure(roles.schema.sales)
+                keep = named & revenue.notna()
+                part.bar_revenue = revenue[keep].groupby(names[keep], sort=False).sum()
+            if roles.has_profit:
+                profit = ds.measure("profit")
+                keep = named & profit.notna()
+                part.bar_profit = profit[keep].groupby(names[keep], sort=False).sum()
+
+        if ds.dates is not None:
+            self._partial_dated(ds, part, orders)
+
+        if roles.has_profit:
+            profit = ds.measure("profit")
+            top = analytics_utils.top_k_positions(profit, 5)
+            rows = frame.iloc[top].reset_index(drop=True)
+            rows["profit"] = profit.iloc[top].to_numpy()
+            rows[_SORT_KEY] = rows["profit"]
+            part.top_profit = rows
+
+        if ds.dates is not None:
+            top = analytics_utils.top_k_positions(ds.dates, ORDERS_LIST_MAX)
+            rows = frame.iloc[top].reset_index(drop=True)
+            rows[_SORT_KEY] = ds.dates.iloc[top].to_numpy()
+            part.latest = rows
+        elif roles.has_profit:
+            profit = ds.measure("profit").reset_index(drop=True)
+            top = analytics_utils.top_k_positions(profit, ORDERS_LIST_MAX)
+            rows = frame.iloc[top].reset_index(drop=True)
+            rows["profit"] = profit.iloc[top].to_numpy()
+            rows[_SORT_KEY] = rows["profit"]
+            part.latest = rows
+        else:
+            part.latest = frame.head(ORDERS_LIST_MAX).reset_index(drop=True)
+        return part
+
+    def _partial_dated(self, ds, part, orders):
+        roles = self.roles
+        valid = ds.dates.notna()
+        if not valid.any():
+            return
+        frame = ds.frame
+        day = ds.dates[valid].dt.normalize()
+
+        if roles.schema.amount is not None:
+            daily = pd.DataFrame({
+                "revenue": ds.measure(roles.schema.amount)[valid].fillna(0),
+            })
+            if orders is not None:
+                daily["orders"] = orders[valid]
+                part.multiline = daily.groupby(day).sum()
+            elif roles.schema.order_id is not None:
+                ids = frame[roles.schema.order_id][valid]
+                part.multiline = pd.DataFrame({
+                    "revenue": daily["revenue"].groupby(day).sum(),
+                    "orders": ids.groupby(day).nunique(),
+                })
+            else:
+                daily["orders"] = 1
+                part.multiline = daily.groupby(day).sum()
+
+        if roles.schema.sales is not None and roles.schema.dimension is not None:
+            sales = ds.measure(roles.schema.sales)
+            labels = ds.dimension(roles.schema.dimension)
+            keep = ds.dates.notna() & sales.notna() & (labels.str.lower() != "nan") & (sales > 0)
+            if keep.any():
+                part._comparison.append(
+                    sales[keep].groupby([ds.dates[keep], labels[keep]], sort=False).sum()
+                )
+
+    # -- finished components ------------------------------------------------
+
+    @property
+    def rollup(self):
+        """Daily rollup of every row fed so far, or None for undated data."""
+        self._rollups = [r for r in [merge_rollups(self._rollups)] if r is not None]
+        return self._rollups[0] if self._rollups else None
+
+    def kpis(self):
+        missing = [col for col in ("profit", "revenue", "orders", "expense") if col not in self.roles.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        return {
+            "profit_sum": self.sums.get("profit", 0.0),
+            "revenue_sum": self.sums.get("revenue", 0.0),
+            "orders_sum": self.sums.get("orders", 0.0),
+            "expense_sum": self.sums.get("expense", 0.0),
+            "customers_sum": self.rows,
+        }
+
+    def linechart(self, mode="bucketed", max_points=LINECHART_MAX_POINTS):
+        """Bucketed or LTTB line chart from the daily rollup ("per_row" falls back to bucketed)."""
+        missing = [c for c, ok in (
+            ("date", self.roles.has_dates),
+            ("revenue", "revenue" in self.roles.columns),
+            ("profit", self.roles.has_profit),
+        ) if not ok]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        rollup = self.rollup
+        if rollup is None:
+            return self._empty_linechart(mode, max_points)
+        if mode == "lttb":
+            measures = [m for m in ("revenue", "profit", "orders") if m in rollup.measures]
+            return _lttb_series(rollup.totals()[measures], max_points)
+        return rollup_linechart(rollup, max_points)
+
+    def _empty_linechart(self, mode, max_points):
+        """Line chart for a stream with no rows (e.g. an empty date range)."""
+        measures = ["revenue", "profit"] + (["orders"] if self.roles.has_orders else [])
+        daily = pd.DataFrame({m: pd.Series(dtype=float) for m in measures})
+        daily.index = pd.DatetimeIndex([], name="_day")
+        if mode == "lttb":
+            return _lttb_series(daily, max_points)
+        daily = daily.reset_index()
+        if self.roles.schema.product is not None:
+            daily["_product"] = pd.Series(dtype=object)
+        return _bucketed_series(daily, max_points)
+
+    def table(self):
+        if not self.roles.has_profit:
+            return None
+        columns = list(self.roles.columns)
+        rows = self.top_profit if self.top_profit is not None else pd.DataFrame(columns=columns)
+        return {"top5_profit": analytics_utils.dataframe_to_rows(rows, columns), "top5_columns": columns}
+
+    def orders_list(self):
+        columns = list(self.roles.columns)
+        rows = self.latest if self.latest is not None else pd.DataFrame(columns=columns)
+        return {"orders_list": analytics_utils.dataframe_to_rows(rows, columns), "orders_columns": columns}
+
+    def orders_trend(self):
+        rollup = self.rollup
+        if rollup is None:
+            return None
+        totals = rollup.totals()
+        if totals.empty:
+            return None
+        agg = totals["orders"] if "orders" in totals.columns else totals["rows"]
+        return {
+            "orders_trend": [
+                {"date": d.strftime("%Y-%m-%d"), "orders": int(v)}
+                for d, v in agg.tail(60).items()
+            ]
+        }
+
+    def orders_by_status(self):
+        if self.roles.schema.status is None or self.status_counts is None:
+            return None
+        return _status_payload(self.status_counts.sort_values(ascending=False, kind="mergesort"))
+
+    def orders_by_channel(self):
+        if self.channel is None:
+            return None
+        return _channel_payload(self.channel)
+
+    def orders_by_region(self):
+        if self.region is None:
+            return None
+        return _region_payload(self.region)
+
+    def top_products(self):
+        if self.roles.schema.ranking_product is None:
+            return None
+        if self.product_orders is None:
+            return {"top_products_by_orders": []}
+        revenue = self.product_revenue if self.product_revenue is not None else pd.Series(dtype=float)
+        return _top_products_payload(self.product_orders.sort_index(), revenue, self.product_rows)
+
+    def pie(self):
+        counts = self.pie_counts
+        if counts is None:
+            # No rows in range: the in-memory path still names the column.
+            return None if self.roles.schema.pie is None else _pie_payload(self.roles.schema.pie, pd.Series(dtype=int))
+        if not 2 <= len(counts) <= 50:
+            return None
+        return _pie_payload(self.roles.schema.pie, counts.sort_values(ascending=False, kind="mergesort"))
+
+    def comparison_bar(self):
+        if not self.roles.has_dates:
+            return {"error": "Date column missing or not detected"}
+        if self.roles.schema.sales is None:
+            return {"error": "Sales / revenue column missing or not detected"}
+        if self.roles.schema.dimension is None:
+            return {"error": "No suitable grouping dimension (product / category / location) found"}
+        if not self._comparison:
+            return _comparison_payload(pd.Series(dtype=float))
+        sums = pd.concat(self._comparison).groupby(level=[0, 1]).sum()
+        return _comparison_payload(sums)
+
+    def multiline(self, granularity="monthly"):
+        if not self.roles.has_dates:
+            return {"error": "Date column missing or not detected"}
+        if self.roles.schema.amount is None:
+            return {"error": "Revenue / sales column missing or not detected"}
+        if self.multiline is None:
+            return {"error": "No valid date rows found"}
+        period_alias, label_fmt = MULTILINE_GRANULARITIES.get(granularity, ("M", "%b %Y"))
+        bucket = self.multiline.index.to_period(period_alias)
+        agg = self.multiline.groupby(bucket).sum()
+        return _multiline_payload(agg["revenue"], agg["orders"], label_fmt)
+
+    def bar(self):
+        if self.roles.schema.product is None or self.bar_revenue is None:
+            return None
+        data = _top_products_data(self.bar_revenue)
+        if data is None:
+            return None
+        return {"bar_column": self.roles.schema.product, "bar_data": data}
+
+    def profit_by_product(self):
+        if self.roles.schema.product is None or self.bar_profit is None:
+            return None
+        data = _top_products_data(self.bar_profit)
+        if data is None:
+            return None
+        return {"profit_by_product_column": self.roles.schema.product, "profit_by_product_data": data}
+
+    def map(self):
+        if self.roles.schema.geo is None:
+            return {"error": "Region / geographic column missing or not detected"}
+        if self.places is None:
+            return {"error": "No valid region data found"}
+        return _map_payload(self.roles.schema.geo, self.places)
+
+
+def aggregate_csv(file, start_date=None, end_date=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream a CSV upload through a StreamingAggregator.
+
+    With start_date/end_date, only rows in the range are aggregated (as
+    filter_by_date selects them for the in-memory pipeline). Returns
+    (aggregator, rollup) where rollup is the daily rollup over all rows, for
+    later date-range queries.
+    """
+    return aggregate_chunks(iter_uploaded_chunks(file, chunk_rows), start_date, end_date)
+
+
+def aggregate_chunks(chunks, start_date=None, end_date=None, aggregator=None, rollup=None):
+    """
+    aggregate_csv over any iterable of normalized chunks.
+
+    Pass the aggregator and full-range rollup of earlier rows (e.g. from
+    StreamingAggregator.from_bytes and the stored rollup) to fold new rows
+    into them; the earlier rows' column roles and date format are kept.
+    """
+    aggregator = aggregator if aggregator is not None else StreamingAggregator()
+    filtering = start_date is not None or end_date is not None
+    full_rollups = [rollup] if filtering and rollup is not None else []
+    for chunk in chunks:
+        if aggregator.roles is None:
+            # Resolve from unfiltered rows so an empty first range still picks columns.
+            aggregator.resolve_roles(chunk)
+        if filtering:
+            if aggregator.roles.schema.date is not None:
+                ds = aggregator.prepare(chunk)
+                full_rollups.append(build_daily_rollup(ds))
+                if len(full_rollups) >= _COMPACT_EVERY:
+                    full_rollups = [merge_rollups(full_rollups)]
+                filtered = filter_by_date(ds, start_date, end_date).frame
+                filtered.attrs = chunk.attrs
+                chunk = filtered
+        aggregator.update(chunk)
+    if aggregator.roles is None:
+        raise ValueError("Uploaded file has no rows")
+    # Reading .rollup compacts the partials, so later (possibly concurrent)
+    # component calls only look it up.
+    in_range = aggregator.rollup
+    rollup = merge_rollups(full_rollups) if filtering else in_range
+    return aggregator, rollup
+
+
+def iter_frame_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Slices of an in-memory frame (as read_uploaded_file returns it) shaped like
+    iter_uploaded_chunks output: categorical columns back to object, attrs kept.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        categorical = [i for i, dtype in enumerate(chunk.dtypes) if isinstance(dtype, pd.CategoricalDtype)]
+        if categorical:
+            chunk = chunk.copy(deep=False)
+            for i in categorical:
+                chunk.isetitem(i, chunk.iloc[:, i].astype(object))
+        chunk.attrs = dict(df.attrs)
+        yield chunk
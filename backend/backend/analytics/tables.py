@@ -2,9 +2,8 @@
 Table components: top 5 by profit, orders list.
 """
 
-import pandas as pd
-
-from .utils import find_date_col, dataframe_to_rows
+from .utils import dataframe_to_rows, top_k_positions
+from .prepared import as_prepared
 from .constants import ORDERS_LIST_MAX
 
 
@@ -13,11 +12,14 @@ def table_component(df):
     Top 5 rows by profit for dashboard table.
     Returns {"top5_profit": list of row dicts, "top5_columns": list of column names}.
     """
-    if "profit" not in df.columns:
+    ds = as_prepared(df)
+    if "profit" not in ds.columns:
         return None
-    df = df.copy()
-    df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
-    df_sorted = df.sort_values(by="profit", ascending=False).reset_index(drop=True).head(5)
+    profit = ds.measure("profit").reset_index(drop=True)
+    top = top_k_positions(profit, 5)
+    # Copy only the selected rows, not the whole frame.
+    df_sorted = ds.frame.iloc[top].reset_index(drop=True)
+    df_sorted["profit"] = profit.iloc[top].to_numpy()
     columns = list(df_sorted.columns)
     rows = dataframe_to_rows(df_sorted, columns)
     return {"top5_profit": rows, "top5_columns": columns}
@@ -29,17 +31,19 @@ def orders_list_component(df):
     Sort by date descending if a date column exists, else by profit descending.
     Returns {"orders_list": list of row dicts, "orders_columns": list of column names}.
     """
-    df = df.copy()
+    ds = as_prepared(df)
+    df = ds.frame
     columns = list(df.columns)
-    date_col = find_date_col(df)
-    if date_col and date_col in df.columns:
-        df["_sort_date"] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
-        df = df.dropna(subset=["_sort_date"]).sort_values(by="_sort_date", ascending=False)
+    if ds.dates is not None:
+        top = top_k_positions(ds.dates, ORDERS_LIST_MAX)
+        df = df.iloc[top]
     elif "profit" in df.columns:
-        df["profit"] = pd.to_numeric(df["profit"], errors="coerce")
-        df = df.dropna(subset=["profit"]).sort_values(by="profit", ascending=False)
+        profit = ds.measure("profit").reset_index(drop=True)
+        top = top_k_positions(profit, ORDERS_LIST_MAX)
+        df = df.iloc[top].copy()
+        df["profit"] = profit.iloc[top].to_numpy()
     else:
         df = df.head(ORDERS_LIST_MAX)
-    df = df.head(ORDERS_LIST_MAX).reset_index(drop=True)
+    df = df.reset_index(drop=True)
     rows = dataframe_to_rows(df, columns)
     return {"orders_list": rows, "orders_columns": columns}
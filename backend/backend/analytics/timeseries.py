@@ -0,0 +1,144 @@
+"""
+Time aggregation: one groupby on integer day ordinals, every granularity derived from it.
+
+daily_base(ds) groups revenue, profit, orders and row counts by day once per
+PreparedDataset (cached on it, so multiline_chart, orders_trend_daily and
+time_series share it). Weekly, monthly, quarterly and yearly totals are sums
+of the daily rows and never touch row-level data again. Stored datasets build
+the same base from their daily rollup (DailyBase.from_totals).
+
+Distinct order-id counts cannot be summed across days, so the base also keeps
+the unique (day, order id) pairs and counts them per period.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .prepared import as_prepared
+
+# granularity → (pandas period alias, label format; %q is the quarter number)
+GRANULARITIES = {
+    "daily": ("D", "%Y-%m-%d"),
+    "weekly": ("W", "W%W %Y"),
+    "monthly": ("M", "%b %Y"),
+    "quarterly": ("Q", "Q%q %Y"),
+    "yearly": ("Y", "%Y"),
+}
+
+
+def period_labels(periods, label_fmt):
+    """Labels of a PeriodIndex: each period's start formatted with label_fmt."""
+    if "%q" in label_fmt:
+        # Only Period formatting knows the quarter directive.
+        return list(periods.strftime(label_fmt))
+    return list(periods.start_time.strftime(label_fmt))
+
+
+@dataclass(frozen=True)
+class DailyBase:
+    """
+    Per-day totals for the time series of one dataset.
+
+    - totals: indexed by day (sorted), with "rows" and whichever of
+      "revenue" (the schema's amount column), "profit" and "orders" (the
+      orders measure) the data has.
+    - order_ids: unique (day, id) pairs when orders are counted as distinct
+      order ids (no orders column), else None.
+    """
+
+    totals: pd.DataFrame
+    order_ids: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_totals(cls, totals):
+        """
+        Base from DailyRollup.totals(), with its "amount" sums (the schema's
+        amount column, as _build_daily_base reads it) as revenue. Rollups
+        stored before "amount" was added only have the revenue column's sums.
+        """
+        if "amount" in totals.columns:
+            totals = totals.drop(columns="revenue", errors="ignore").rename(columns={"amount": "revenue"})
+        return cls(totals[[c for c in ("revenue", "profit", "orders", "rows") if c in totals.columns]])
+
+    def bucket(self, granularity="monthly"):
+        """
+        Totals per period of granularity (see GRANULARITIES), indexed by Period,
+        with "orders" always present: the orders measure, else distinct order
+        ids, else rows.
+        """
+        alias = GRANULARITIES.get(granularity, GRANULARITIES["monthly"])[0]
+        periods = self.totals.index.to_period(alias)
+        agg = self.totals.groupby(periods).sum()
+        if "orders" not in agg.columns:
+            if self.order_ids is not None:
+                days = pd.DatetimeIndex(self.order_ids["day"]).to_period(alias)
+                agg["orders"] = self.order_ids["id"].groupby(days).nunique().reindex(agg.index, fill_value=0)
+            else:
+                agg["orders"] = agg["rows"]
+        return agg
+
+
+def _day_ordinals(dates):
+    """datetime64 values as int64 days since the epoch."""
+    return dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+
+def daily_base(data):
+    """DailyBase of a DataFrame or PreparedDataset, or None without valid dates."""
+    ds = as_prepared(data)
+    if ds.dates is None:
+        return None
+    return ds.derived("daily_base", lambda: _build_daily_base(ds))
+
+
+def _build_daily_base(ds):
+    valid = ds.dates.notna()
+    if not valid.any():
+        return None
+    days = _day_ordinals(ds.dates[valid])
+    measures = {}
+    if ds.schema.amount is not None:
+        measures["revenue"] = ds.measure(ds.schema.amount)[valid].fillna(0).to_numpy()
+    if ds.schema.profit is not None:
+        measures["profit"] = ds.measure("profit")[valid].fillna(0).to_numpy()
+    if ds.schema.orders is not None:
+        measures["orders"] = ds.measure("orders")[valid].fillna(0).to_numpy()
+    measures["rows"] = np.ones(len(days), dtype=np.int64)
+    totals = pd.DataFrame(measures).groupby(days, sort=True).sum()
+    totals.index = pd.to_datetime(totals.index, unit="D")
+
+    order_ids = None
+    if ds.schema.orders is None and ds.schema.order_id is not None:
+        ids = ds.frame[ds.schema.order_id][valid]
+        pairs = pd.DataFrame({"day": days, "id": ids.to_numpy()}).dropna().drop_duplicates()
+        pairs["day"] = pd.to_datetime(pairs["day"], unit="D")
+        order_ids = pairs.reset_index(drop=True)
+    return DailyBase(totals, order_ids)
+
+
+def time_series(base, granularity="monthly"):
+    """
+    Revenue, orders, profit and AOV per period of granularity, from a DailyBase
+    (None gives empty series). AOV = revenue / orders, 0 when there are no orders.
+
+    Returns {"granularity", "labels", "revenue", "orders", "profit", "aov"}.
+    """
+    label_fmt = GRANULARITIES[granularity][1]
+    if base is None:
+        return {"granularity": granularity, "labels": [], "revenue": [], "orders": [], "profit": [], "aov": []}
+    agg = base.bucket(granularity)
+    revenue = agg["revenue"] if "revenue" in agg.columns else pd.Series(0.0, index=agg.index)
+    profit = agg["profit"] if "profit" in agg.columns else pd.Series(0.0, index=agg.index)
+    orders = agg["orders"]
+    aov = np.where(orders > 0, revenue / orders.where(orders > 0, 1), 0.0)
+    return {
+        "granularity": granularity,
+        "labels": period_labels(agg.index, label_fmt),
+        "revenue": [float(v) for v in revenue],
+        "orders": [float(v) for v in orders],
+        "profit": [float(v) for v in profit],
+        "aov": [round(float(v), 2) for v in aov],
+    }
@@ -0,0 +1,86 @@
+"""
+Stage timings: wall-clock time per pipeline stage, for Server-Timing headers and logs.
+
+collect_timings() opens a collector for the current context (a request or an
+upload job); timed(name) adds the duration of its block to the active
+collector and is a no-op without one, so analytics code can be timed without
+passing a timer around. A collector opened inside another one also reports its
+stages to the outer collector when it closes.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("analytics_stage_timings", default=None)
+
+
+class StageTimings:
+    """
+    Seconds per stage name, in first-seen order; repeated stages (e.g. CSV
+    chunks) add up. Safe to add to from component worker threads.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        for name, seconds in other.as_seconds().items():
+            self.add(name, seconds)
+
+    def as_seconds(self):
+        with self._lock:
+            return dict(self.stages)
+
+    def as_ms(self):
+        return {name: round(seconds * 1000, 1) for name, seconds in self.as_seconds().items()}
+
+    def server_timing(self):
+        """Server-Timing header value, e.g. "parse_file;dur=12.5, component.map;dur=3.1"."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_ms().items())
+
+
+def current_timings():
+    """The active StageTimings, or None."""
+    return _current.get()
+
+
+@contextmanager
+def collect_timings():
+    """Collect timed() stages run in this context; yields the StageTimings."""
+    parent = _current.get()
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.merge(timings)
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the active collector under name."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def log_timings(logger, event, timings, **fields):
+    """One structured INFO line: event name, then fields and per-stage milliseconds as JSON."""
+    record = {**fields, "stages_ms": timings.as_ms()}
+    logger.info("%s %s", event, json.dumps(record, default=str), extra={"timings": record})
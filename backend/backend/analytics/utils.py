@@ -4,7 +4,9 @@ Shared utilities: column detection, JSON serialization, type checks.
 
 import logging
 
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,7 @@ def filter_df_by_date(df, start_date=None, end_date=None, date_column=None):
     if date_col is None:
         return df.copy()
     df = df.copy()
-    df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
+    df[date_col] = to_datetime_column(df[date_col])
     start_ts = pd.to_datetime(start_date) if start_date is not None else None
     end_ts = pd.to_datetime(end_date) if end_date is not None else None
     if start_ts is not None and end_ts is not None and start_ts > end_ts:
@@ -58,6 +60,40 @@ def find_date_col(df):
     return None
 
 
+def first_value_date_format(column, dayfirst=False):
+    """Date format guessed from the first non-null value of a text column, or None."""
+    if column.dtype != object and not isinstance(column.dtype, pd.CategoricalDtype):
+        return None
+    values = column.dropna()
+    if values.empty:
+        return None
+    return guess_datetime_format(str(values.iloc[0]), dayfirst=dayfirst)
+
+
+def to_datetime_column(column, date_format=None, dayfirst=False):
+    """
+    pd.to_datetime(column, errors="coerce") with date_format, else with
+    dayfirst and the format inferred from the first value.
+
+    Categorical columns are parsed one category at a time. pandas would infer
+    the format from the first category and may return a categorical; here the
+    format comes from the first row, as for a plain column, and the result is
+    always a plain datetime column.
+    """
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        if date_format is not None:
+            return pd.to_datetime(column, errors="coerce", format=date_format)
+        return pd.to_datetime(column, errors="coerce", dayfirst=dayfirst)
+    date_format = date_format or first_value_date_format(column, dayfirst)
+    categories = pd.Series(column.cat.categories, dtype=object)
+    if date_format is not None:
+        parsed = pd.to_datetime(categories, errors="coerce", format=date_format)
+    else:
+        parsed = pd.to_datetime(categories, errors="coerce", format="mixed", dayfirst=dayfirst)
+    values = parsed.array.take(column.cat.codes.to_numpy(), allow_fill=True)
+    return pd.Series(values, index=column.index, name=column.name)
+
+
 def to_json_value(val):
     """Convert a pandas/cell value to a JSON-serializable value."""
     if pd.isna(val):
@@ -95,15 +131,64 @@ def is_payment_column(col):
     return any(kw in key for kw in PAYMENT_KEYWORDS)
 
 
+NUMERIC_SAMPLE_SIZE = 1000
+_FIRST_BLOCK_ROWS = 1024
+
+
+def _value_blocks(series):
+    """
+    Yield the non-null values of series in blocks of growing size (1024, 2048, ...)
+    so checks that can decide early never read the rest of the column.
+    """
+    start, size = 0, _FIRST_BLOCK_ROWS
+    while start < len(series):
+        block = series.iloc[start:start + size].dropna()
+        if len(block):
+            yield block
+        start += size
+        size *= 2
+
+
+def _clean_text(values):
+    """Stripped string form of values, empty strings dropped."""
+    text = pd.Series(values).astype(str).str.strip()
+    return text[text != ""]
+
+
+def count_distinct_text(series, limit):
+    """
+    Number of distinct non-empty stripped values in series, exact up to limit.
+
+    Returns limit + 1 as soon as more than limit values have been seen, so a
+    high-cardinality column costs one block instead of a full nunique(). Each
+    block is deduplicated on the raw values before stripping, and the running
+    set never holds more than limit + block-size entries.
+    """
+    seen = set()
+    for block in _value_blocks(series):
+        seen.update(_clean_text(pd.unique(block)))
+        if len(seen) > limit:
+            return limit + 1
+    return len(seen)
+
+
 def is_numeric_column(df, col):
-    """True if the column is numeric dtype or its values are mostly numeric when parsed."""
+    """
+    True if the column is numeric dtype or its values are mostly numeric when parsed.
+    Text columns are judged on their first NUMERIC_SAMPLE_SIZE non-empty values.
+    """
     if pd.api.types.is_numeric_dtype(df[col]):
         return True
-    s = df[col].dropna().astype(str).str.strip()
-    s = s[s != ""]
-    if len(s) == 0:
+    sample, count = [], 0
+    for block in _value_blocks(df[col]):
+        text = _clean_text(block)
+        sample.append(text)
+        count += len(text)
+        if count >= NUMERIC_SAMPLE_SIZE:
+            break
+    if count == 0:
         return True
-    numeric_parsed = pd.to_numeric(s, errors="coerce")
+    numeric_parsed = pd.to_numeric(pd.concat(sample).head(NUMERIC_SAMPLE_SIZE), errors="coerce")
     return numeric_parsed.notna().mean() >= 0.8
 
 
@@ -115,11 +200,7 @@ def is_bar_chart_categorical(df, col):
         return False
     if is_numeric_column(df, col):
         return False
-    s = df[col].dropna().astype(str).str.strip()
-    s = s[s != ""]
-    if s.nunique() < 2:
-        return False
-    return True
+    return count_distinct_text(df[col], 1) >= 2
 
 
 def is_good_categorical(df, col, min_categories=2, max_categories=50):
@@ -130,15 +211,90 @@ def is_good_categorical(df, col, min_categories=2, max_categories=50):
         return False
     if is_numeric_column(df, col):
         return False
-    s = df[col].dropna().astype(str).str.strip()
-    s = s[s != ""]
-    n = s.nunique()
+    n = count_distinct_text(df[col], max_categories)
     return min_categories <= n <= max_categories
 
 
+def count_values(series):
+    """
+    series.value_counts() that also suits categorical dimensions: counts
+    sorted descending, ties in first-seen order, unobserved categories left out.
+    """
+    return series.groupby(series, sort=False, observed=True).size().sort_values(ascending=False)
+
+
+def top_k_positions(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) non-missing values, best first,
+    with equal values in order of appearance: what a stable sort followed by
+    head(k) returns, without the sort.
+
+    values is a Series or array of numbers or datetimes. np.partition finds the
+    k-th value in O(n) and only the k winners are sorted, so the cost is
+    O(n + k log k) instead of O(n log n).
+    """
+    if np.issubdtype(getattr(values, "dtype", np.dtype(object)), np.datetime64):
+        arr = np.asarray(values, dtype="datetime64[ns]")
+        keep = np.flatnonzero(~np.isnat(arr))
+        arr = arr.view(np.int64)
+    else:
+        if isinstance(values, pd.Series):
+            arr = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            arr = np.asarray(values, dtype=np.float64)
+        keep = np.flatnonzero(~np.isnan(arr))
+    vals = arr[keep] if len(keep) < len(arr) else arr
+    k = min(k, len(vals))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if not largest:
+        vals = -vals
+    if k < len(vals):
+        kth = np.partition(vals, len(vals) - k)[len(vals) - k]
+        above = np.flatnonzero(vals > kth)
+        ties = np.flatnonzero(vals == kth)[: k - len(above)]
+        chosen = np.sort(np.concatenate([above, ties]))
+    else:
+        chosen = np.arange(len(vals))
+    # chosen is in order of appearance, so the stable sort keeps ties that way.
+    chosen = chosen[np.argsort(-vals[chosen], kind="stable")]
+    return keep[chosen] if len(keep) < len(arr) else chosen
+
+
 def dataframe_to_rows(df, columns=None):
     """Convert DataFrame to list of dicts with JSON-serializable values."""
     columns = columns or list(df.columns)
     subset = df.reindex(columns=columns)
     records = subset.to_dict(orient="records")
     return [{col: to_json_value(rec[col]) for col in columns} for rec in records]
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns sorted positions of at most n_out points of (x, y) that preserve the
+    visual shape of the series; first and last points are always kept.
+    """
+    n = len(x)
+    n_out = max(n_out, 3)
+    if n_out >= n:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    picked = [0]
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(area.argmax())
+        picked.append(prev)
+    picked.append(n - 1)
+    return np.array(picked)
@@ -0,0 +1,131 @@
+"""
+Incremental appends: add new rows to a stored dataset without recomputing its history.
+
+POST /api/datasets/<id>/append/ parses only the uploaded increment and folds
+it into the dataset's saved StreamingAggregator (KPI sums, the daily /
+product / region rollups, per-status, channel and product totals and top-K
+table candidates), then rewrites the stored components, the daily rollup and
+the saved state, and keeps the rows as a Parquet part for load_frame().
+
+Streamed uploads save their aggregator as they are processed. Other datasets
+build it once, from the stored file, on their first append. Appended analytics
+follow the streaming pipeline (see backend.analytics.streaming), and the
+dataset keeps the date range and line chart mode it was uploaded with.
+"""
+
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from backend.analytics.charts import LINECHART_DEFAULT_MODE
+from backend.analytics.columnar import write_columnar
+from backend.analytics.io import read_uploaded_file
+from backend.analytics.streaming import DEFAULT_CHUNK_ROWS, aggregate_chunks, aggregate_csv, iter_frame_chunks
+from backend.analytics.timing import timed
+from backend.models import DatasetAppend, UserDataset
+
+logger = logging.getLogger(__name__)
+
+
+def claim(dataset):
+    """Atomically mark a ready dataset as processing; False if it is not ready (e.g. another append)."""
+    claimed = UserDataset.objects.filter(pk=dataset.pk, status=UserDataset.STATUS_READY).update(
+        status=UserDataset.STATUS_PROCESSING
+    )
+    if not claimed:
+        dataset.refresh_from_db(fields=["status"])
+    return bool(claimed)
+
+
+def release(dataset):
+    UserDataset.objects.filter(pk=dataset.pk).update(status=UserDataset.STATUS_READY)
+    dataset.status = UserDataset.STATUS_READY
+
+
+def _upload_params(dataset):
+    """start_date, end_date, linechart_mode (and Excel sheet) the dataset's analytics were computed with."""
+    params = dataset.jobs.order_by("-created_at").values_list("params", flat=True).first()
+    return params or {}
+
+
+def _chunk_rows():
+    return getattr(settings, "ANALYTICS_STREAMING_CHUNK_ROWS", DEFAULT_CHUNK_ROWS)
+
+
+def _initial_state(dataset, start_date, end_date, sheet=None):
+    """(aggregator, full rollup) over the stored upload, for datasets without a saved state."""
+    if not dataset.csv_file:
+        raise ValueError("Dataset has no stored file")
+    with timed("build_state"), dataset.csv_file.open("rb") as fh:
+        if dataset.csv_file.name.lower().endswith(".csv"):
+            return aggregate_csv(fh, start_date, end_date, chunk_rows=_chunk_rows())
+        frame = read_uploaded_file(fh, sheet=sheet)
+        return aggregate_chunks(iter_frame_chunks(frame, _chunk_rows()), start_date, end_date)
+
+
+def append_rows(dataset, file):
+    """
+    Fold the rows of file into dataset and store the results; returns the new
+    analytics payload.
+
+    Raises:
+        ValueError: If the file has no rows or its columns differ from the dataset's.
+    """
+    from backend.api.dataset_views import _aggregate_payload, _attach_rollup, _attach_state, split_payload
+
+    params = _upload_params(dataset)
+    start_date, end_date = params.get("start_date"), params.get("end_date")
+    increment = read_uploaded_file(file)
+    if increment.empty:
+        raise ValueError("Appended file has no rows")
+
+    aggregator = dataset.load_state()
+    if aggregator is None:
+        aggregator, rollup = _initial_state(dataset, start_date, end_date, params.get("sheet"))
+    else:
+        # Without a date range the aggregator's own rollup covers every row.
+        rollup = dataset.load_rollup() if start_date or end_date else None
+
+    columns = list(aggregator.roles.columns)
+    if sorted(increment.columns) != sorted(columns):
+        raise ValueError(f"Appended columns must match the dataset's: {columns}")
+    increment = increment[columns]
+
+    with timed("aggregate_increment"):
+        aggregator, rollup = aggregate_chunks(
+            iter_frame_chunks(increment, _chunk_rows()), start_date, end_date, aggregator, rollup
+        )
+    payload = _aggregate_payload(aggregator, params.get("linechart_mode", LINECHART_DEFAULT_MODE))
+
+    old_files = {name: getattr(dataset, name).name for name in ("rollup_file", "state_file", "order_index_file")}
+    with timed("store_files"):
+        part = DatasetAppend(dataset=dataset, name=file.name, row_count=len(increment))
+        stem = os.path.splitext(file.name)[0]
+        # Parse the part's dates like the dataset's, not from its own first value.
+        data = write_columnar(increment, date_format=aggregator.roles.date_format)
+        part.columnar_file.save(f"{stem}.parquet", ContentFile(data), save=False)
+        _attach_rollup(dataset, None, dataset.name, rollup=rollup)
+        _attach_state(dataset, aggregator, dataset.name)
+
+    dataset.row_count = aggregator.rows
+    # The sorted order index is rebuilt over all rows the next time orders are paged.
+    dataset.order_index_file = None
+    # The content no longer matches the uploaded file, so re-uploads must not reuse it.
+    dataset.content_hash = ""
+    dataset.analytics_key = ""
+    with timed("db_save"), transaction.atomic():
+        part.save()
+        dataset.save(update_fields=[
+            "rollup_file", "state_file", "order_index_file", "row_count", "content_hash", "analytics_key",
+            "updated_at",
+        ])
+        dataset.save_components(split_payload(payload))
+
+    for field_name, old_name in old_files.items():
+        if old_name != getattr(dataset, field_name).name:
+            dataset.delete_unshared_file(field_name, old_name)
+    logger.info("Appended %s rows to dataset %s", len(increment), dataset.pk)
+    return payload
@@ -13,6 +13,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from backend import dataset_cache, frame_cache
+
 
 def _user_payload(user):
     return {
@@ -86,8 +88,6 @@ def login(request):
     """
     from django.contrib.auth import authenticate
 
-    from backend.models import UserDataset
-
     email = (request.data.get("email") or "").strip().lower()
     password = request.data.get("password", "")
 
@@ -104,7 +104,7 @@ def login(request):
             status=status.HTTP_401_UNAUTHORIZED,
         )
 
-    has_dataset = UserDataset.objects.filter(user=user, is_active=True).exists()
+    has_dataset = dataset_cache.active_dataset(user.id) is not None
 
     refresh = RefreshToken.for_user(user)
     return Response(
@@ -121,18 +121,16 @@ def login(request):
 @permission_classes([IsAuthenticated])
 def me(request):
     """Return the authenticated user's profile + dataset metadata."""
-    from backend.models import UserDataset
-
     user = request.user
-    active_ds = UserDataset.objects.filter(user=user, is_active=True).first()
+    active_ds = dataset_cache.active_dataset(user.id)
     dataset_info = None
     if active_ds:
         dataset_info = {
-            "id": active_ds.id,
-            "name": active_ds.name,
-            "source_currency": active_ds.source_currency,
-            "row_count": active_ds.row_count,
-            "uploaded_at": active_ds.uploaded_at.isoformat(),
+            "id": active_ds["id"],
+            "name": active_ds["name"],
+            "source_currency": active_ds["source_currency"],
+            "row_count": active_ds["row_count"],
+            "uploaded_at": active_ds["uploaded_at"].isoformat(),
         }
 
     return Response(
@@ -226,7 +224,10 @@ def delete_account(request):
 
     user = request.user
     for dataset in UserDataset.objects.filter(user=user):
-        if dataset.csv_file:
-            dataset.csv_file.delete(save=False)
+        dataset.delete_files()
+        frame_cache.invalidate(dataset.id)
+    user_id = user.id
     user.delete()
+    # The cascade deletes datasets without calling UserDataset.delete().
+    dataset_cache.invalidate(user_id)
     return Response(status=status.HTTP_204_NO_CONTENT)
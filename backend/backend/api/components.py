@@ -0,0 +1,110 @@
+"""
+Concurrent analytics components with per-component time budgets.
+
+run_components hands every component to a shared thread pool and waits for
+them, dropping any that runs past its budget (ANALYTICS_COMPONENT_TIMEOUT,
+overridable per name in ANALYTICS_COMPONENT_TIMEOUTS). A budget starts when
+the component starts running, not while it waits for a worker. Threads cannot
+be interrupted: a dropped component keeps its worker busy until it returns and
+its result is discarded. pandas/numpy release the GIL in most kernels, so
+components overlap on multi-core hosts.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from backend.analytics.timing import timed
+
+logger = logging.getLogger(__name__)
+
+# How often to re-check budgets while some components are still queued.
+_POLL_SECONDS = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Shared pool sized by ANALYTICS_COMPONENT_WORKERS; None runs components inline."""
+    global _executor
+    workers = getattr(settings, "ANALYTICS_COMPONENT_WORKERS", 4)
+    if workers <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="analytics-component",
+            )
+        return _executor
+
+
+def component_budget(name):
+    """Seconds component name may run, or None for no limit."""
+    overrides = getattr(settings, "ANALYTICS_COMPONENT_TIMEOUTS", {})
+    budget = overrides.get(name, getattr(settings, "ANALYTICS_COMPONENT_TIMEOUT", None))
+    return budget if budget and budget > 0 else None
+
+
+def _call(name, fn, data):
+    try:
+        with timed(f"component.{name}"):
+            return fn(data)
+    except Exception as e:
+        logger.warning("Analytics component %s failed: %s", name, e, exc_info=True)
+        return None
+
+
+def run_components(data, components):
+    """
+    Call fn(data) for each (name, fn) in components.
+
+    Returns (results, overruns): results maps each finished component's name to
+    its return value (None when it raised; the error is logged), overruns lists
+    the names dropped for exceeding their budget, in components order. Callers
+    merge in their own order, so the payload never depends on completion order.
+    With ANALYTICS_COMPONENT_WORKERS <= 1 components run one by one in the
+    calling thread and budgets are not enforced.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return {name: _call(name, fn, data) for name, fn in components}, []
+
+    started = {}
+
+    def run(name, fn):
+        started[name] = time.monotonic()
+        return _call(name, fn, data)
+
+    # Each task runs in a copy of this context so timed() reaches the request's collector.
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, run, name, fn)
+        for name, fn in components
+    }
+    budgets = {name: component_budget(name) for name in futures}
+    pending = set(futures.values())
+    overruns = set()
+    while pending:
+        running = [name for name, f in futures.items() if f in pending and name in started]
+        deadlines = [started[name] + budgets[name] for name in running if budgets[name]]
+        timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        if len(running) < len(pending) and any(budgets.values()):
+            timeout = _POLL_SECONDS if timeout is None else min(timeout, _POLL_SECONDS)
+        _, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for name, future in futures.items():
+            budget = budgets[name]
+            if future in pending and budget and name in started and now - started[name] >= budget:
+                future.cancel()
+                pending.discard(future)
+                overruns.add(name)
+                logger.warning("Analytics component %s exceeded its %gs budget; dropped", name, budget)
+
+    results = {name: f.result() for name, f in futures.items() if name not in overruns}
+    return results, [name for name, _ in components if name in overruns]
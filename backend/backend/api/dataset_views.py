@@ -2,16 +2,28 @@
 Dataset API: authenticated upload, retrieve saved analytics, delete dataset.
 """
 
+import hashlib
+import json
 import logging
+import os
+from functools import partial
 
+import pandas as pd
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from backend.analytics import (
-    read_uploaded_file,
+    ANALYTICS_VERSION,
+    as_prepared,
+    filter_by_date,
     calculate_kpis,
     linechart,
     comparison_bar_chart,
@@ -28,87 +40,457 @@ from backend.analytics import (
     orders_by_region_component,
     top_products_by_orders_component,
 )
-from backend.analytics.utils import find_date_col, filter_df_by_date
-from backend.models import UserDataset
+from backend.analytics.charts import LINECHART_DEFAULT_MODE, LINECHART_MODES
+from backend.analytics.excel import EXCEL_EXTENSIONS
+from backend.analytics.io import SUPPORTED_UPLOAD_EXTENSIONS, iter_uploaded_chunks
+from backend.analytics.order_index import (
+    ORDERS_PAGE_DEFAULT,
+    ORDERS_PAGE_MAX,
+    build_order_index,
+    build_order_index_chunks,
+    orders_page,
+    write_order_index,
+)
+from backend.analytics.columnar import write_columnar
+from backend.analytics.rollup import build_daily_rollup, write_rollup, rollup_payload
+from backend.analytics.streaming import DEFAULT_CHUNK_ROWS, StreamingAggregator, aggregate_csv
+from backend.analytics.timeseries import GRANULARITIES, DailyBase, daily_base, time_series
+from backend.analytics.timing import timed
+from backend import dataset_cache, frame_cache
+from backend.api import appends, jobs
+from backend.api.components import component_budget, run_components
+from backend.models import (
+    DatasetComponent,
+    ProcessingJob,
+    UserDataset,
+    content_addressed_name,
+    user_csv_upload_path,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def _merge_component(payload, df, name, fn, merge_keys=None):
-    try:
-        result = fn(df)
-        if result is None or not isinstance(result, dict):
-            return
-        if merge_keys is None:
-            merge_keys = [k for k in result.keys() if k != "error"]
-        if "error" in result and merge_keys and not any(k in result for k in merge_keys):
-            msg = result.get("error", "unknown")
-            logger.warning("Analytics component %s returned error: %s", name, msg)
+def _merge_result(payload, name, result, merge_keys=None):
+    if result is None or not isinstance(result, dict):
+        return
+    if merge_keys is None:
+        merge_keys = [k for k in result.keys() if k != "error"]
+    if "error" in result and merge_keys and not any(k in result for k in merge_keys):
+        msg = result.get("error", "unknown")
+        logger.warning("Analytics component %s returned error: %s", name, msg)
+        payload.setdefault("analytics_warnings", []).append(
+            {"component": name, "error": str(msg)}
+        )
+        return
+    for key in merge_keys:
+        if key in result and key != "error":
+            payload[key] = result[key]
+
+
+def _merge_components(payload, data, components):
+    """
+    Run (name, fn, payload keys) components concurrently (see api/components.py)
+    and merge their results into payload in the given order. Components that
+    overran their time budget are reported in analytics_warnings instead.
+    """
+    results, overruns = run_components(data, [(name, fn) for name, fn, _ in components])
+    for name, _, merge_keys in components:
+        if name in overruns:
             payload.setdefault("analytics_warnings", []).append(
-                {"component": name, "error": str(msg)}
+                {"component": name, "error": f"Timed out after {component_budget(name):g}s"}
             )
-            return
-        for key in merge_keys:
-            if key in result and key != "error":
-                payload[key] = result[key]
-    except Exception as e:
-        logger.warning("Analytics component %s failed: %s", name, e, exc_info=True)
+            continue
+        _merge_result(payload, name, results[name], merge_keys)
+
+
+# (name, component, payload keys) for every component after KPIs and the line
+# chart; StreamingAggregator has a method of the same name for each.
+_COMPONENTS = (
+    ("table", table_component, ["top5_profit", "top5_columns"]),
+    ("orders_list", orders_list_component, ["orders_list", "orders_columns"]),
+    ("orders_trend", orders_trend_daily, ["orders_trend"]),
+    ("orders_by_status", orders_by_status_component, ["orders_by_status"]),
+    ("orders_by_channel", orders_by_channel_component, ["orders_by_channel"]),
+    ("orders_by_region", orders_by_region_component, ["orders_by_region"]),
+    ("top_products", top_products_by_orders_component, ["top_products_by_orders"]),
+    ("pie", pie_chart_column, ["pie_column", "pie_data"]),
+    (
+        "comparison_bar",
+        comparison_bar_chart,
+        ["comparison_bar_labels", "comparison_bar_current",
+         "comparison_bar_previous", "comparison_bar_has_previous"],
+    ),
+    (
+        "multiline",
+        multiline_chart,
+        ["multiline_labels", "multiline_revenue", "multiline_orders", "multiline_aov"],
+    ),
+    ("bar", top_products_by_revenue_chart, ["bar_column", "bar_data"]),
+    ("profit_by_product", profit_by_product_chart, ["profit_by_product_column", "profit_by_product_data"]),
+    ("map", map_orders_by_region, ["map_column", "map_data"]),
+)
+
+# Stored analytics are split into one DatasetComponent row per component
+# ("linechart" and the _COMPONENTS above) plus "summary", which holds every
+# other key (KPIs, message, source_currency, analytics_warnings).
+SUMMARY_COMPONENT = "summary"
+_LINECHART_KEYS = [
+    "revenue_data", "profit_data", "date_data", "product_data", "orders_data",
+    "linechart_mode", "linechart_granularity",
+]
+_COMPONENT_KEYS = {"linechart": _LINECHART_KEYS, **{name: keys for name, _, keys in _COMPONENTS}}
+_KEY_COMPONENT = {key: name for name, keys in _COMPONENT_KEYS.items() for key in keys}
+COMPONENT_NAMES = (SUMMARY_COMPONENT, *_COMPONENT_KEYS)
 
 
-def _build_analytics_payload(df, start_date=None, end_date=None):
-    """Run the full analytics pipeline on a DataFrame, return the JSON-ready dict."""
-    date_col = find_date_col(df)
+def split_payload(payload):
+    """An analytics payload as {component name: payload part}, in payload order."""
+    parts = {}
+    for key, value in payload.items():
+        parts.setdefault(_KEY_COMPONENT.get(key, SUMMARY_COMPONENT), {})[key] = value
+    return parts
+
+
+def _build_analytics_payload(df, start_date=None, end_date=None, linechart_mode=LINECHART_DEFAULT_MODE):
+    """
+    Run the full analytics pipeline on a DataFrame or PreparedDataset,
+    return the JSON-ready dict.
+
+    linechart_mode is passed to linechart ("bucketed", "lttb" or "per_row").
+    A date-range subset is filtered on the dataset's parsed dates and keeps
+    its schema profile, so it matches the daily rollup for the same range.
+    """
+    ds = as_prepared(df)
+    date_col = ds.date_col
     if (start_date or end_date) and date_col:
-        df = filter_df_by_date(df, start_date=start_date, end_date=end_date, date_column=date_col)
+        ds = filter_by_date(ds, start_date, end_date)
 
-    kpis = calculate_kpis(
-        df,
-        start_date=None if (start_date or end_date) and date_col else start_date,
-        end_date=None if (start_date or end_date) and date_col else end_date,
-        date_column=date_col or "date",
-    )
+    with timed("kpis"):
+        kpis = calculate_kpis(
+            ds,
+            start_date=None if (start_date or end_date) and date_col else start_date,
+            end_date=None if (start_date or end_date) and date_col else end_date,
+            date_column=date_col or "date",
+        )
     payload = {
         "message": "File processed successfully",
-        "source_currency": df.attrs.get("source_currency", "USD"),
+        "source_currency": ds.source_currency,
         **kpis,
     }
 
+    components = (("linechart", partial(linechart, mode=linechart_mode), None),) + _COMPONENTS
+    _merge_components(payload, ds, components)
+
+    return payload, len(ds)
+
+
+def _build_streaming_payload(file, start_date=None, end_date=None, linechart_mode=LINECHART_DEFAULT_MODE):
+    """
+    Same payload as _build_analytics_payload, computed from a CSV read in chunks
+    (see backend.analytics.streaming). Returns (payload, aggregator, rollup);
+    the aggregator carries the row count, columns and schema profile.
+    """
+    with timed("aggregate_csv"):
+        aggregator, rollup = aggregate_csv(
+            file, start_date, end_date,
+            chunk_rows=getattr(settings, "ANALYTICS_STREAMING_CHUNK_ROWS", DEFAULT_CHUNK_ROWS),
+        )
+    return _aggregate_payload(aggregator, linechart_mode), aggregator, rollup
+
+
+def _aggregate_payload(aggregator, linechart_mode=LINECHART_DEFAULT_MODE):
+    """The analytics payload of a filled StreamingAggregator."""
+    payload = {
+        "message": "File processed successfully",
+        "source_currency": aggregator.source_currency,
+        **aggregator.kpis(),
+    }
+
+    if linechart_mode == "per_row":
+        payload.setdefault("analytics_warnings", []).append(
+            {"component": "linechart", "error": "per_row is not available for streamed uploads; using bucketed"}
+        )
+        linechart_mode = "bucketed"
+    components = (("linechart", partial(StreamingAggregator.linechart, mode=linechart_mode), None),) + tuple(
+        (name, getattr(StreamingAggregator, name), merge_keys) for name, _, merge_keys in _COMPONENTS
+    )
+    _merge_components(payload, aggregator, components)
+    return payload
+
+
+def _attach_columnar_copy(dataset, df, filename):
+    """Store a Parquet copy of the normalized frame; uploads still succeed without it."""
     try:
-        chart = linechart(df)
-        payload["revenue_data"] = chart["revenue_data"]
-        payload["profit_data"] = chart["profit_data"]
-        payload["date_data"] = chart["date_data"]
-        if "orders_data" in chart:
-            payload["orders_data"] = chart["orders_data"]
-        if "product_data" in chart:
-            payload["product_data"] = chart["product_data"]
+        data = write_columnar(df)
     except Exception as e:
-        logger.warning("Line chart failed: %s", e, exc_info=True)
-
-    _merge_component(payload, df, "table", table_component, ["top5_profit", "top5_columns"])
-    _merge_component(payload, df, "orders_list", orders_list_component, ["orders_list", "orders_columns"])
-    _merge_component(payload, df, "orders_trend", orders_trend_daily, ["orders_trend"])
-    _merge_component(payload, df, "orders_by_status", orders_by_status_component, ["orders_by_status"])
-    _merge_component(payload, df, "orders_by_channel", orders_by_channel_component, ["orders_by_channel"])
-    _merge_component(payload, df, "orders_by_region", orders_by_region_component, ["orders_by_region"])
-    _merge_component(payload, df, "top_products", top_products_by_orders_component, ["top_products_by_orders"])
-    _merge_component(payload, df, "pie", pie_chart_column, ["pie_column", "pie_data"])
-    _merge_component(
-        payload, df, "comparison_bar",
-        comparison_bar_chart,
-        ["comparison_bar_labels", "comparison_bar_current",
-         "comparison_bar_previous", "comparison_bar_has_previous"],
-    )
-    _merge_component(
-        payload, df, "multiline",
-        multiline_chart,
-        ["multiline_labels", "multiline_revenue", "multiline_orders", "multiline_aov"],
-    )
-    _merge_component(payload, df, "bar", top_products_by_revenue_chart, ["bar_column", "bar_data"])
-    _merge_component(payload, df, "profit_by_product", profit_by_product_chart, ["profit_by_product_column", "profit_by_product_data"])
-    _merge_component(payload, df, "map", map_orders_by_region, ["map_column", "map_data"])
+        logger.warning("Columnar copy skipped for %s: %s", filename, e)
+        return
+    stem = os.path.splitext(filename)[0]
+    dataset.columnar_file.save(f"{stem}.parquet", ContentFile(data), save=False)
+
+
+def _attach_rollup(dataset, prepared, filename, rollup=None):
+    """
+    Store the daily rollup used by date-range queries; skipped for undated data.
+    Pass rollup when it is already built (streamed uploads).
+    """
+    try:
+        if rollup is None:
+            rollup = build_daily_rollup(prepared)
+        if rollup is None:
+            return
+        data = write_rollup(rollup)
+    except Exception as e:
+        logger.warning("Daily rollup skipped for %s: %s", filename, e)
+        return
+    stem = os.path.splitext(filename)[0]
+    dataset.rollup_file.save(f"{stem}.rollup.parquet", ContentFile(data), save=False)
+
+
+def _attach_state(dataset, aggregator, filename):
+    """Store the aggregator that later appends resume; appends rebuild it when missing."""
+    try:
+        data = aggregator.to_bytes()
+    except Exception as e:
+        logger.warning("Aggregator state skipped for %s: %s", filename, e)
+        return
+    stem = os.path.splitext(filename)[0]
+    dataset.state_file.save(f"{stem}.state", ContentFile(data), save=False)
+
+
+def _attach_order_index(dataset, prepared, filename, index=None):
+    """
+    Store the sorted row index used to page through orders; uploads still
+    succeed without it (it is then built on first use). Returns the index.
+    """
+    try:
+        if index is None:
+            index = build_order_index(prepared)
+        data = write_order_index(index)
+    except Exception as e:
+        logger.warning("Order index skipped for %s: %s", filename, e)
+        return index
+    stem = os.path.splitext(filename)[0]
+    dataset.order_index_file.save(f"{stem}.orders.npz", ContentFile(data), save=False)
+    return index
+
+
+def _attach_streamed_order_index(dataset, aggregator, filename):
+    """
+    _attach_order_index for a streamed upload, built from a second chunked
+    read of the stored CSV (only the sort keys are kept), so the first orders
+    request does not have to load the whole file. Returns the index.
+    """
+    try:
+        with timed("build_order_index"), dataset.csv_file.open("rb") as fh:
+            chunks = iter_uploaded_chunks(
+                fh, getattr(settings, "ANALYTICS_STREAMING_CHUNK_ROWS", DEFAULT_CHUNK_ROWS)
+            )
+            index = build_order_index_chunks(aggregator.prepare(chunk) for chunk in chunks)
+    except Exception as e:
+        logger.warning("Order index skipped for %s: %s", filename, e)
+        return None
+    return _attach_order_index(dataset, None, filename, index=index)
+
+
+def _order_index(dataset, prepared):
+    """
+    The dataset's OrderIndex, kept on its (frame-cached) PreparedDataset. Read
+    from order_index_file, or built and stored when the dataset has none
+    (appends, or uploads whose index could not be stored) or the stored one
+    no longer covers every row.
+    """
+    def load():
+        with timed("load_order_index"):
+            index = dataset.load_order_index()
+        if index is not None and index.row_count == len(prepared):
+            return index
+        old = dataset.order_index_file.name
+        with timed("build_order_index"):
+            index = _attach_order_index(dataset, prepared, dataset.name, index=build_order_index(prepared))
+        if dataset.order_index_file.name != old:
+            # update(), not save(): the analytics are unchanged, so updated_at (ETags, frame cache) stays.
+            UserDataset.objects.filter(pk=dataset.pk).update(order_index_file=dataset.order_index_file.name)
+            dataset.delete_unshared_file("order_index_file", old)
+        return index
+
+    return prepared.derived("order_index", load)
+
+
+def _linechart_mode(request):
+    """Line chart series mode from the request ("bucketed" / "lttb" cap the series size)."""
+    mode = request.POST.get("linechart_mode") or request.GET.get("linechart_mode") or LINECHART_DEFAULT_MODE
+    return mode.strip().lower()
+
+
+def _csv_param(request, name):
+    values = [v.strip() for v in request.GET.get(name, "").split(",")]
+    return [v for v in values if v]
+
+
+def _projection(request):
+    """
+    Parts of the analytics payload selected by ?components=a,b and/or
+    ?fields=key1,key2, as {component name: None for every key, or the set of
+    keys to keep}; None when neither is given (everything). A field selects
+    only that key of its component (KPI keys and anything unmapped are in
+    "summary"). Raises ValueError for an unknown component name.
+    """
+    components = _csv_param(request, "components")
+    fields = _csv_param(request, "fields")
+    if not components and not fields:
+        return None
+    unknown = [name for name in components if name not in COMPONENT_NAMES]
+    if unknown:
+        raise ValueError(
+            f"Unknown components: {', '.join(unknown)}; expected any of {', '.join(COMPONENT_NAMES)}"
+        )
+    projection = dict.fromkeys(components)
+    for key in fields:
+        name = _KEY_COMPONENT.get(key, SUMMARY_COMPONENT)
+        if name not in projection or projection[name] is not None:
+            projection.setdefault(name, set()).add(key)
+    return projection
+
+
+def _project(parts, projection):
+    """Merge {component name: payload part} into one payload, keeping only what projection selects."""
+    payload = {}
+    for name, part in parts.items():
+        if projection is None or name in projection:
+            keys = projection[name] if projection is not None else None
+            payload.update(part if keys is None else {k: v for k, v in part.items() if k in keys})
+    return payload
+
+
+def _dataset_meta(meta):
+    """Dataset fields of API payloads, from dataset_cache metadata."""
+    return {
+        "dataset_id": meta["id"],
+        "dataset_name": meta["name"],
+        "source_currency": meta["source_currency"],
+        "uploaded_at": meta["uploaded_at"].isoformat(),
+    }
+
+
+def _range_payload(dataset, start, end, projection=None):
+    """
+    Analytics for [start, end] on a stored dataset, with the same keys as a
+    full load.
+
+    Served from the daily rollup when the dataset has one. Components the
+    rollup cannot answer (rollup_payload) are computed from the stored rows
+    in the range, only when projection (see _projection) selects them, so
+    chart-only requests stay O(days). Older datasets fall back to reloading
+    the stored rows and rerunning the full pipeline. The line chart is
+    bucketed either way, since the rollup has no rows.
+    """
+    with timed("load_rollup"):
+        rollup = dataset.load_rollup()
+    if rollup is not None:
+        with timed("rollup_payload"):
+            payload = {"message": "File processed successfully", **rollup_payload(rollup.between(start, end))}
+        row_components = [
+            component for component in _COMPONENTS
+            if (projection is None or component[0] in projection)
+            and not any(key in payload for key in component[2])
+        ]
+        if row_components:
+            with timed("load_prepared"):
+                prepared = dataset.load_prepared()
+            _merge_components(payload, filter_by_date(prepared, start, end), row_components)
+    else:
+        with timed("load_prepared"):
+            prepared = dataset.load_prepared()
+        payload, _ = _build_analytics_payload(prepared, start, end, linechart_mode="bucketed")
+    payload["source_currency"] = dataset.source_currency
+    return payload
+
+
+def _time_series_payload(dataset, granularity, start=None, end=None):
+    """
+    time_series(granularity) for [start, end] on a stored dataset: from the
+    daily rollup's totals when it has one, else from the reloaded rows.
+    """
+    with timed("load_rollup"):
+        rollup = dataset.load_rollup()
+    if rollup is not None:
+        base = DailyBase.from_totals(rollup.between(start, end).totals())
+    else:
+        with timed("load_prepared"):
+            prepared = dataset.load_prepared()
+        base = daily_base(prepared)
+        if base is not None and (start is not None or end is not None):
+            day = base.totals.index
+            keep = pd.Series(True, index=day)
+            if start is not None:
+                keep &= day >= start.normalize()
+            if end is not None:
+                keep &= day <= end.normalize()
+            order_ids = base.order_ids
+            if order_ids is not None:
+                order_ids = order_ids[order_ids["day"].isin(day[keep.to_numpy()])]
+            base = DailyBase(base.totals[keep.to_numpy()], order_ids)
+    with timed("time_series"):
+        return time_series(base, granularity)
+
+
+def _hash_upload(file):
+    """SHA-256 hex digest of an uploaded file, read chunk by chunk."""
+    digest = hashlib.sha256()
+    with timed("hash_upload"):
+        for chunk in file.chunks():
+            digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
 
-    return payload, len(df)
+def _analytics_key(params):
+    """Hash of ANALYTICS_VERSION and the upload options, identifying reusable analytics."""
+    raw = json.dumps({"analytics_version": ANALYTICS_VERSION, **params}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _store_upload(dataset, file, digest):
+    """Store file under its content hash, writing it only when this user has not stored it yet."""
+    name = content_addressed_name(digest, file.name)
+    stored = user_csv_upload_path(dataset, name)
+    if dataset.csv_file.storage.exists(stored):
+        dataset.csv_file.name = stored
+    else:
+        dataset.csv_file.save(name, file, save=False)
+
+
+def _reuse_analytics(dataset, source, params):
+    """
+    Finish dataset as a re-upload of source: share its stored files and copy
+    its schema and analytics instead of processing the file again. Returns
+    the (already done) ProcessingJob.
+    """
+    with timed("reuse_analytics"):
+        dataset.csv_file = source.csv_file.name
+        dataset.columnar_file = source.columnar_file.name
+        dataset.rollup_file = source.rollup_file.name
+        dataset.state_file = source.state_file.name
+        dataset.order_index_file = source.order_index_file.name
+        dataset.schema_json = source.schema_json
+        dataset.source_currency = source.source_currency
+        dataset.row_count = source.row_count
+        dataset.status = UserDataset.STATUS_READY
+        dataset.is_active = True
+        dataset.save()
+        dataset.save_components(source.stored_components())
+        now = timezone.now()
+        return ProcessingJob.objects.create(
+            user=dataset.user,
+            dataset=dataset,
+            params=params,
+            status=ProcessingJob.STATUS_DONE,
+            progress=100,
+            stage="reused",
+            started_at=now,
+            finished_at=now,
+        )
 
 
 @api_view(["POST"])
@@ -116,8 +498,21 @@ def _build_analytics_payload(df, start_date=None, end_date=None):
 def upload_dataset(request):
     """
     Authenticated CSV/Excel upload.
-    Processes the file, stores analytics JSON in DB tied to the user,
-    and returns the analytics payload immediately.
+    Optional form fields: start_date, end_date, linechart_mode
+    ("per_row" default, one point per row; "bucketed" or "lttb" cap the
+    series at LINECHART_MAX_POINTS), and for
+    Excel files sheet (a name or 0-based position; repeat it to stack several
+    sheets, or "*" for every sheet shaped like the largest one; default: the
+    largest visible sheet).
+
+    Stores the raw file and queues a ProcessingJob, returning 202 with the job
+    id; poll GET /api/jobs/<id>/ for progress and the analytics payload. With
+    settings.ANALYTICS_ASYNC_UPLOADS off the job runs inline and the payload is
+    returned directly (201).
+
+    A re-upload of a file this user already processed with the same options
+    (and ANALYTICS_VERSION) reuses that dataset's files and analytics: the
+    job is created already done and nothing is parsed.
     """
     file = request.FILES.get("file")
     if not file:
@@ -129,50 +524,208 @@ def upload_dataset(request):
         start_date = start_date.strip() or None
     if end_date and isinstance(end_date, str):
         end_date = end_date.strip() or None
+    linechart_mode = _linechart_mode(request)
+    if linechart_mode not in LINECHART_MODES:
+        return Response(
+            {"error": f"linechart_mode must be one of {', '.join(LINECHART_MODES)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not file.name.lower().endswith(SUPPORTED_UPLOAD_EXTENSIONS):
+        return Response({"error": "Unsupported file type"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        df = read_uploaded_file(file)
-        payload, row_count = _build_analytics_payload(df, start_date, end_date)
-
-        file.seek(0)
+    params = {"start_date": start_date, "end_date": end_date, "linechart_mode": linechart_mode}
+    sheets = [s.strip() for s in request.POST.getlist("sheet") if s.strip()]
+    if sheets and file.name.lower().endswith(EXCEL_EXTENSIONS):
+        params["sheet"] = sheets
+    digest = _hash_upload(file)
+    key = _analytics_key(params)
+    async_uploads = getattr(settings, "ANALYTICS_ASYNC_UPLOADS", True)
+    with transaction.atomic():
         dataset = UserDataset(
             user=request.user,
             name=file.name,
-            source_currency=payload.get("source_currency", "USD"),
-            analytics_json=payload,
-            row_count=row_count,
-            is_active=True,
+            is_active=False,
+            status=UserDataset.STATUS_PENDING,
+            content_hash=digest,
+            analytics_key=key,
         )
-        dataset.csv_file.save(file.name, ContentFile(file.read()), save=False)
-        dataset.save()
+        source = (
+            UserDataset.objects.filter(
+                user=request.user, content_hash=digest, analytics_key=key, status=UserDataset.STATUS_READY,
+            )
+            .order_by("-uploaded_at")
+            .first()
+        )
+        if source is not None:
+            job = _reuse_analytics(dataset, source, params)
+        else:
+            _store_upload(dataset, file, digest)
+            dataset.save()
+            job = ProcessingJob.objects.create(user=request.user, dataset=dataset, params=params)
+            if async_uploads:
+                jobs.enqueue(job)
 
-        payload["dataset_id"] = dataset.id
-        payload["dataset_name"] = dataset.name
-        payload["uploaded_at"] = dataset.uploaded_at.isoformat()
-        return Response(payload, status=status.HTTP_201_CREATED)
+    if async_uploads:
+        return Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
+    if source is not None:
+        return Response(_job_result(dataset), status=status.HTTP_201_CREATED)
 
-    except ValueError as e:
-        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-    except Exception as e:
-        logger.exception("Upload processing failed")
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    jobs.run_job(job.id)
+    job.refresh_from_db()
+    if job.status != ProcessingJob.STATUS_DONE:
+        return Response({"error": job.error or "Upload processing failed"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(_job_result(job.dataset), status=status.HTTP_201_CREATED)
+
+
+def _job_result(dataset):
+    """Analytics payload of a processed upload, shaped like the old upload response."""
+    payload = dataset.analytics()
+    payload.update(_dataset_meta(dataset_cache.dataset_metadata(dataset)))
+    return payload
+
+
+def _job_payload(job):
+    data = {
+        "job_id": job.id,
+        "dataset_id": job.dataset_id,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == ProcessingJob.STATUS_FAILED:
+        data["error"] = job.error
+    return data
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_job(request, job_id):
+    """Progress of an upload job; includes the analytics payload as "result" once done."""
+    try:
+        job = ProcessingJob.objects.select_related("dataset").get(id=job_id, user=request.user)
+    except ProcessingJob.DoesNotExist:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    data = _job_payload(job)
+    if job.status == ProcessingJob.STATUS_DONE:
+        data["result"] = _job_result(job.dataset)
+    return Response(data)
+
+
+def _dataset_etag(dataset_id, updated_at, start=None, end=None, projection=None, granularity=None):
+    """
+    Strong ETag for the analytics of one saved version of a dataset (and date
+    range, projection and time series granularity). Uploads and activations
+    save the dataset, which moves updated_at.
+    """
+    tag = f"{dataset_id}-{int(updated_at.timestamp() * 1_000_000)}"
+    if start or end or projection is not None or granularity:
+        variant = f"{start or ''}|{end or ''}|{granularity or ''}"
+        if projection is not None:
+            variant += "|" + ";".join(
+                name if keys is None else f"{name}:{','.join(sorted(keys))}"
+                for name, keys in sorted(projection.items())
+            )
+        tag += "-" + hashlib.sha256(variant.encode()).hexdigest()[:16]
+    return quote_etag(tag)
+
+
+def _etag_matches(request, etag):
+    """True when the If-None-Match header matches etag (weak comparison, per RFC 9110)."""
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    # CompressionMiddleware weakens the ETag of compressed responses.
+    return "*" in tags or etag in (t.removeprefix("W/") for t in tags)
+
+
+def _revalidate(response, etag):
+    """Mark a response for conditional GETs: ETag, private, revalidate every time."""
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_active_dataset(request):
-    """Return the user's currently active dataset analytics (auto-load on login)."""
-    dataset = UserDataset.objects.filter(user=request.user, is_active=True).first()
-    if not dataset:
+    """
+    Return the user's currently active dataset analytics (auto-load on login).
+
+    Optional ?start=YYYY-MM-DD&end=YYYY-MM-DD (either may be omitted) returns
+    analytics for that date range, computed from the stored daily rollup.
+
+    Optional ?components=linechart,pie and/or ?fields=total_revenue,map_data
+    return only those parts of the payload (see _projection); only the stored
+    components they belong to are read from the database.
+
+    Optional ?granularity=daily|weekly|monthly|quarterly|yearly adds
+    "time_series": revenue, orders, profit and AOV per period (for the date
+    range, if one is given), bucketed from the daily rollup.
+
+    Responses carry an ETag; a request whose If-None-Match still matches gets
+    304 Not Modified without loading any stored component. The dataset's
+    metadata comes from dataset_cache, so a cache hit needs no query at all.
+    """
+    start = (request.GET.get("start") or "").strip() or None
+    end = (request.GET.get("end") or "").strip() or None
+    granularity = (request.GET.get("granularity") or "").strip().lower() or None
+    if granularity is not None and granularity not in GRANULARITIES:
+        return Response(
+            {"error": f"granularity must be one of: {', '.join(GRANULARITIES)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        projection = _projection(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    meta = dataset_cache.active_dataset(request.user.id)
+    if meta is None:
         return Response({"has_dataset": False}, status=status.HTTP_200_OK)
+    etag = _dataset_etag(meta["id"], meta["updated_at"], start, end, projection, granularity)
+    if _etag_matches(request, etag):
+        return _revalidate(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+    start_ts = end_ts = dataset = None
+    if start or end or granularity:
+        try:
+            start_ts = pd.Timestamp(start) if start else None
+            end_ts = pd.Timestamp(end) if end else None
+        except ValueError:
+            return Response({"error": "Invalid start/end date"}, status=status.HTTP_400_BAD_REQUEST)
+        if start_ts is not None and end_ts is not None and start_ts > end_ts:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+        dataset = UserDataset.objects.filter(pk=meta["id"]).first()
+        if not dataset:
+            return Response({"has_dataset": False}, status=status.HTTP_200_OK)
+
+    if start or end:
+        try:
+            payload = _range_payload(dataset, start_ts, end_ts, projection)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if projection is not None:
+            payload = _project(split_payload(payload), projection)
+        payload["range_start"] = start
+        payload["range_end"] = end
+    else:
+        with timed("load_components"):
+            parts = DatasetComponent.parts(meta["id"], None if projection is None else list(projection))
+        payload = _project(parts, projection)
+
+    if granularity:
+        try:
+            payload["time_series"] = _time_series_payload(dataset, granularity, start_ts, end_ts)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    payload = dataset.analytics_json or {}
     payload["has_dataset"] = True
-    payload["dataset_id"] = dataset.id
-    payload["dataset_name"] = dataset.name
-    payload["source_currency"] = dataset.source_currency
-    payload["uploaded_at"] = dataset.uploaded_at.isoformat()
-    return Response(payload)
+    payload.update(_dataset_meta(meta))
+    return _revalidate(Response(payload), etag)
 
 
 @api_view(["GET"])
@@ -180,7 +733,7 @@ def get_active_dataset(request):
 def dataset_history(request):
     """Return a list of all datasets uploaded by this user."""
     datasets = UserDataset.objects.filter(user=request.user).values(
-        "id", "name", "source_currency", "row_count", "is_active", "uploaded_at"
+        "id", "name", "source_currency", "row_count", "is_active", "status", "uploaded_at"
     )
     return Response({"datasets": list(datasets)})
 
@@ -193,14 +746,96 @@ def activate_dataset(request, dataset_id):
         dataset = UserDataset.objects.get(id=dataset_id, user=request.user)
     except UserDataset.DoesNotExist:
         return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+    if dataset.status != UserDataset.STATUS_READY:
+        return Response(
+            {"error": f"Dataset is {dataset.status}, not ready"},
+            status=status.HTTP_409_CONFLICT,
+        )
 
     dataset.is_active = True
     dataset.save()
-    payload = dataset.analytics_json or {}
+    dataset_cache.invalidate(request.user.id)
+    payload = dataset.analytics()
+    payload.update(_dataset_meta(dataset_cache.dataset_metadata(dataset)))
+    return Response(payload)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def append_dataset(request, dataset_id):
+    """
+    Append the rows of an uploaded CSV/Excel file with the dataset's columns
+    to a ready dataset and return its updated analytics. Only the new rows
+    are parsed (see backend.api.appends).
+    """
+    file = request.FILES.get("file")
+    if not file:
+        return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+    if not file.name.lower().endswith(SUPPORTED_UPLOAD_EXTENSIONS):
+        return Response({"error": "Unsupported file type"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        dataset = UserDataset.objects.get(id=dataset_id, user=request.user)
+    except UserDataset.DoesNotExist:
+        return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+    if not appends.claim(dataset):
+        return Response(
+            {"error": f"Dataset is {dataset.status}, not ready"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    try:
+        payload = appends.append_rows(dataset, file)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    finally:
+        appends.release(dataset)
+    payload.update(_dataset_meta(dataset_cache.dataset_metadata(dataset)))
+    return Response(payload)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dataset_orders(request, dataset_id):
+    """
+    One page of a dataset's rows for the Orders page.
+
+    Optional ?sort=<column> (or -<column> for descending; default newest
+    first), ?limit= (default ORDERS_PAGE_DEFAULT, at most ORDERS_PAGE_MAX) and
+    ?cursor= (next_cursor of the previous page). Pages are read from the
+    dataset's sorted OrderIndex (see backend.analytics.order_index), so once
+    the dataset is loaded each costs O(limit) rather than a sort.
+    """
+    sort = request.GET.get("sort")
+    cursor = (request.GET.get("cursor") or "").strip() or None
+    try:
+        limit = int(request.GET.get("limit") or ORDERS_PAGE_DEFAULT)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= ORDERS_PAGE_MAX:
+        return Response(
+            {"error": f"limit must be between 1 and {ORDERS_PAGE_MAX}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        dataset = UserDataset.objects.get(id=dataset_id, user=request.user)
+    except UserDataset.DoesNotExist:
+        return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+    if dataset.status != UserDataset.STATUS_READY:
+        return Response(
+            {"error": f"Dataset is {dataset.status}, not ready"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    try:
+        with timed("load_prepared"):
+            prepared = dataset.load_prepared()
+        index = _order_index(dataset, prepared)
+        with timed("orders_page"):
+            payload = orders_page(prepared, index, sort=sort, cursor=cursor, limit=limit)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     payload["dataset_id"] = dataset.id
-    payload["dataset_name"] = dataset.name
-    payload["source_currency"] = dataset.source_currency
-    payload["uploaded_at"] = dataset.uploaded_at.isoformat()
+    payload["row_count"] = index.row_count
     return Response(payload)
 
 
@@ -213,7 +848,14 @@ def delete_dataset(request, dataset_id):
     except UserDataset.DoesNotExist:
         return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    if dataset.csv_file:
-        dataset.csv_file.delete(save=False)
+    dataset.delete_files()
     dataset.delete()
+    dataset_cache.invalidate(request.user.id)
     return Response({"message": "Dataset deleted"}, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counters of this process's caches (staff only)."""
+    return Response({"active_dataset": dataset_cache.stats(), "frames": frame_cache.stats()})
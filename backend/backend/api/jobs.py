@@ -0,0 +1,249 @@
+"""
+Background upload processing: a DB-table job queue drained by a local thread pool.
+
+upload_dataset stores the raw file, creates a ProcessingJob and returns 202. The
+job id is handed to an in-process ThreadPoolExecutor once the transaction
+commits; the worker claims the row (queued → running) with a conditional UPDATE,
+so a job runs at most once even if a second process drains the same table
+(`python manage.py process_jobs` picks up jobs left queued by a restart, and
+requeues jobs left running by a worker that died; see recover_stale).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from backend.analytics.charts import LINECHART_DEFAULT_MODE
+from backend.analytics.timing import collect_timings, log_timings, timed
+from backend.models import ProcessingJob, UserDataset
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ANALYTICS_WORKERS", 2),
+                thread_name_prefix="analytics-job",
+            )
+        return _executor
+
+
+def enqueue(job):
+    """Schedule job on the local worker pool after the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.id))
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+def _set_progress(job, progress, stage):
+    job.progress = progress
+    job.stage = stage
+    ProcessingJob.objects.filter(pk=job.pk).update(progress=progress, stage=stage)
+
+
+def _should_stream(dataset):
+    """CSV uploads of at least ANALYTICS_STREAMING_MIN_BYTES are read in chunks."""
+    threshold = getattr(settings, "ANALYTICS_STREAMING_MIN_BYTES", None)
+    if threshold is None or not dataset.csv_file.name.lower().endswith(".csv"):
+        return False
+    try:
+        return dataset.csv_file.size >= threshold
+    except OSError:
+        return False
+
+
+def _input_bytes(dataset):
+    try:
+        return dataset.csv_file.size
+    except OSError:
+        return None
+
+
+def claim(job_id):
+    """Atomically mark a queued job as running; False if another worker has it."""
+    return bool(
+        ProcessingJob.objects.filter(pk=job_id, status=ProcessingJob.STATUS_QUEUED).update(
+            status=ProcessingJob.STATUS_RUNNING, started_at=timezone.now(), stage="starting",
+            attempts=F("attempts") + 1,
+        )
+    )
+
+
+def recover_stale():
+    """
+    Handle jobs whose worker died (e.g. the process restarted mid-job): jobs
+    running for longer than ANALYTICS_JOB_TIMEOUT seconds go back to queued,
+    with their dataset back to pending, or fail (with their dataset) once
+    they have been claimed ANALYTICS_JOB_MAX_ATTEMPTS times. Returns
+    (requeued, failed).
+    """
+    timeout = getattr(settings, "ANALYTICS_JOB_TIMEOUT", 3600)
+    if not timeout:
+        return 0, 0
+    now = timezone.now()
+    stale = ProcessingJob.objects.filter(
+        status=ProcessingJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=timeout)
+    )
+    max_attempts = getattr(settings, "ANALYTICS_JOB_MAX_ATTEMPTS", 2)
+
+    exhausted = stale.filter(attempts__gte=max_attempts)
+    failed_datasets = list(exhausted.values_list("dataset_id", flat=True))
+    failed = exhausted.update(
+        status=ProcessingJob.STATUS_FAILED,
+        error="The worker stopped before the job finished",
+        stage="failed",
+        finished_at=now,
+    )
+    UserDataset.objects.filter(pk__in=failed_datasets, status=UserDataset.STATUS_PROCESSING).update(
+        status=UserDataset.STATUS_FAILED
+    )
+
+    retry = stale.filter(attempts__lt=max_attempts)
+    requeued_datasets = list(retry.values_list("dataset_id", flat=True))
+    requeued = retry.update(status=ProcessingJob.STATUS_QUEUED, progress=0, stage="requeued")
+    UserDataset.objects.filter(pk__in=requeued_datasets, status=UserDataset.STATUS_PROCESSING).update(
+        status=UserDataset.STATUS_PENDING
+    )
+    if requeued or failed:
+        logger.warning("Stale upload jobs: %s requeued, %s failed", requeued, failed)
+    return requeued, failed
+
+
+def run_job(job_id):
+    """
+    Process one queued upload: parse the stored file, run the analytics pipeline,
+    store derived files and mark the dataset ready (and active).
+
+    Failures are recorded on the job and dataset rather than raised.
+    """
+    from backend.analytics import read_uploaded_file, prepare_dataset
+    from backend.api.dataset_views import (
+        _attach_columnar_copy,
+        _attach_order_index,
+        _attach_rollup,
+        _attach_streamed_order_index,
+        _attach_state,
+        _build_analytics_payload,
+        _build_streaming_payload,
+        split_payload,
+    )
+
+    if not claim(job_id):
+        return
+    job = ProcessingJob.objects.select_related("dataset").get(pk=job_id)
+    dataset = job.dataset
+    UserDataset.objects.filter(pk=dataset.pk).update(status=UserDataset.STATUS_PROCESSING)
+    params = job.params or {}
+
+    try:
+        streamed = _should_stream(dataset)
+        with collect_timings() as timings:
+            if streamed:
+                # Chunked read: the whole file is never in memory, so no columnar copy.
+                _set_progress(job, 10, "streaming")
+                with dataset.csv_file.open("rb") as fh:
+                    payload, aggregator, rollup = _build_streaming_payload(
+                        fh,
+                        params.get("start_date"),
+                        params.get("end_date"),
+                        linechart_mode=params.get("linechart_mode", LINECHART_DEFAULT_MODE),
+                    )
+                row_count, column_count, schema = aggregator.rows, len(aggregator.roles.columns), aggregator.schema
+                _set_progress(job, 80, "storing")
+                with timed("store_files"):
+                    _attach_rollup(dataset, None, dataset.name, rollup=rollup)
+                    _attach_state(dataset, aggregator, dataset.name)
+                _set_progress(job, 90, "indexing")
+                _attach_streamed_order_index(dataset, aggregator, dataset.name)
+            else:
+                _set_progress(job, 10, "reading")
+                with dataset.csv_file.open("rb") as fh:
+                    df = read_uploaded_file(fh, sheet=params.get("sheet"))
+
+                _set_progress(job, 40, "analyzing")
+                with timed("prepare_dataset"):
+                    prepared = prepare_dataset(df)
+                payload, row_count = _build_analytics_payload(
+                    prepared,
+                    params.get("start_date"),
+                    params.get("end_date"),
+                    linechart_mode=params.get("linechart_mode", LINECHART_DEFAULT_MODE),
+                )
+                column_count, schema = len(df.columns), prepared.schema
+
+                _set_progress(job, 80, "storing")
+                with timed("store_files"):
+                    _attach_columnar_copy(dataset, df, dataset.name)
+                    _attach_rollup(dataset, prepared, dataset.name)
+                    _attach_order_index(dataset, prepared, dataset.name)
+            dataset.schema_json = schema.to_dict()
+            dataset.row_count = row_count
+            dataset.source_currency = payload.get("source_currency", "USD")
+            dataset.status = UserDataset.STATUS_READY
+            dataset.is_active = True
+            # update_fields: never re-insert a dataset the user deleted mid-processing.
+            with timed("db_save"), transaction.atomic():
+                dataset.save(update_fields=[
+                    "columnar_file", "rollup_file", "state_file", "order_index_file", "schema_json", "row_count",
+                    "source_currency", "status", "is_active", "updated_at",
+                ])
+                dataset.save_components(split_payload(payload))
+        log_timings(
+            logger, "upload_timings", timings,
+            job_id=job_id, dataset_id=dataset.pk, file=dataset.name, streamed=streamed,
+            rows=row_count, columns=column_count, input_bytes=_input_bytes(dataset),
+        )
+    except Exception as e:
+        if isinstance(e, ValueError):
+            logger.info("Upload job %s rejected: %s", job_id, e)
+        else:
+            logger.exception("Upload job %s failed", job_id)
+        UserDataset.objects.filter(pk=dataset.pk).update(status=UserDataset.STATUS_FAILED)
+        ProcessingJob.objects.filter(pk=job_id).update(
+            status=ProcessingJob.STATUS_FAILED,
+            error=str(e),
+            stage="failed",
+            finished_at=timezone.now(),
+        )
+        return
+
+    ProcessingJob.objects.filter(pk=job_id).update(
+        status=ProcessingJob.STATUS_DONE,
+        progress=100,
+        stage="done",
+        finished_at=timezone.now(),
+    )
+
+
+def run_queued(limit=None):
+    """
+    Run queued jobs in this thread, oldest first, after requeueing stale
+    running ones (recover_stale); returns how many were processed.
+    """
+    recover_stale()
+    ids = ProcessingJob.objects.filter(status=ProcessingJob.STATUS_QUEUED).values_list("pk", flat=True)
+    if limit is not None:
+        ids = ids[:limit]
+    count = 0
+    for job_id in list(ids):
+        run_job(job_id)
+        count += 1
+    return count
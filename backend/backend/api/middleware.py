@@ -0,0 +1,133 @@
+"""
+HTTP middleware: Server-Timing headers and response compression.
+"""
+
+import gzip
+import secrets
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+
+from backend.analytics.timing import collect_timings, timed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class ServerTimingMiddleware:
+    """
+    Collect timed() stages (file parsing, components, JSON rendering, ...) while
+    the request is handled and report them, plus the total, in a Server-Timing
+    header. Responses with no timed stages get no header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_timings() as timings:
+            response = self.get_response(request)
+        if timings.stages:
+            total_ms = round((time.perf_counter() - start) * 1000, 1)
+            response["Server-Timing"] = f"{timings.server_timing()}, total;dur={total_ms}"
+        return response
+
+
+def accepted_encodings(header):
+    """Content codings named in an Accept-Encoding header, mapped to their q-value (0 = refused)."""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """"br" or "gzip" for an Accept-Encoding header (br first on equal q), or None."""
+    accepted = accepted_encodings(header)
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    weights = {c: accepted.get(c, accepted.get("*", 0.0)) for c in available}
+    best = max(available, key=lambda c: weights[c])
+    return best if weights[best] > 0 else None
+
+
+def gzip_compress(content, level, max_random_bytes=100):
+    """
+    gzip content at level. Like django.utils.text.compress_string, the header
+    carries a random-length file name so response sizes do not leak secrets
+    (BREACH); unlike it, the level is configurable.
+    """
+    data = gzip.compress(content, compresslevel=level, mtime=0)
+    if not max_random_bytes:
+        return data
+    name = get_random_string(secrets.randbelow(max_random_bytes) + 1).encode() + b"\x00"
+    header = bytearray(data[:10])
+    header[3] = gzip.FNAME
+    return bytes(header) + name + data[10:]
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least RESPONSE_COMPRESSION_MIN_BYTES with brotli
+    (when the brotli package is installed) or gzip, whichever the client
+    prefers in Accept-Encoding, at RESPONSE_BROTLI_QUALITY / RESPONSE_GZIP_LEVEL.
+    Streaming responses, responses that already have a Content-Encoding and
+    responses that would not shrink are sent as they are. As with Django's
+    GZipMiddleware, gzip output is padded with random bytes against
+    BREACH-style length attacks and strong ETags become weak.
+    """
+
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def compress(self, request, response):
+        min_bytes = getattr(settings, "RESPONSE_COMPRESSION_MIN_BYTES", 1024)
+        if response.streaming or len(response.content) < min_bytes:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        with timed(f"compress_{encoding}"):
+            if encoding == "br":
+                quality = getattr(settings, "RESPONSE_BROTLI_QUALITY", 5)
+                compressed = brotli.compress(response.content, quality=quality)
+            else:
+                level = getattr(settings, "RESPONSE_GZIP_LEVEL", 4)
+                compressed = gzip_compress(response.content, level, self.max_random_bytes)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,77 @@
+"""
+Response renderers.
+
+ORJSONRenderer encodes API responses with orjson (several times faster than
+the stdlib encoder on the large numeric arrays of analytics payloads). orjson
+is optional: without it, and for anything orjson cannot encode, rendering
+falls back to DRF's JSONRenderer. The output matches JSONRenderer's for
+JSON-compliant data; NaN and Infinity are written as null, where the strict
+JSONRenderer raises.
+"""
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from backend.analytics.timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder (its ISO format); numpy values and
+    # non-str dict keys are encoded like the stdlib encoder would.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """DRF's JSONRenderer, reporting its time as the json_serialize stage (Server-Timing)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed("json_serialize"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def _default(obj):
+    """orjson fallback for types it does not encode itself (Decimal, dates, QuerySets, ...)."""
+    return JSONRenderer.encoder_class().default(obj)
+
+
+def dumps_json(data):
+    """
+    data as compact UTF-8 JSON bytes, as DRF's JSONRenderer writes it
+    (U+2028/U+2029 escaped), using orjson when installed (NaN and Infinity
+    then become null instead of raising).
+    """
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder handles.
+            pass
+        else:
+            if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+                content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+            return content
+    return JSONRenderer().render(data)
+
+
+class ORJSONRenderer(TimedJSONRenderer):
+    """
+    JSONRenderer backed by dumps_json. Indented output (browsable API,
+    ?indent) still uses the stdlib encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        with timed("json_serialize"):
+            return dumps_json(data)
+
+
+def json_response(data, status=200):
+    """JsonResponse equivalent for plain Django views, encoded with dumps_json."""
+    with timed("json_serialize"):
+        content = dumps_json(data)
+    return HttpResponse(content, status=status, content_type="application/json")
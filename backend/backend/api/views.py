@@ -4,12 +4,12 @@ Upload API: single endpoint that accepts a file and returns analytics JSON.
 
 import logging
 
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
 from backend.analytics import (
     read_uploaded_file,
+    prepare_dataset,
     calculate_kpis,
     linechart,
     comparison_bar_chart,
@@ -26,19 +26,21 @@ from backend.analytics import (
     orders_by_region_component,
     top_products_by_orders_component,
 )
+from backend.analytics.charts import LINECHART_DEFAULT_MODE
 from backend.analytics.utils import find_date_col, filter_df_by_date
+from backend.api.renderers import json_response
 
 logger = logging.getLogger(__name__)
 
 
-def _merge_component(payload, df, name, fn, merge_keys=None):
+def _merge_component(payload, ds, name, fn, merge_keys=None):
     """
     Run a component function; on success merge result into payload.
     On exception log and leave payload unchanged for that part.
     If result is an error-only dict (expected merge keys missing), log and append analytics_warnings.
     """
     try:
-        result = fn(df)
+        result = fn(ds)
         if result is None:
             return
         if not isinstance(result, dict):
@@ -63,10 +65,12 @@ def upload_dataset(request):
     """
     POST with multipart/form-data: "file" (CSV or Excel), optional "start_date" and "end_date".
     When start_date/end_date are provided, KPIs and all charts use only rows in that date range.
+    Optional "linechart_mode": "per_row" (default, one point per row), "bucketed" or "lttb".
+    Optional "sheet" for Excel files (see read_uploaded_file).
     """
     file = request.FILES.get("file")
     if not file:
-        return JsonResponse({"error": "No file uploaded"}, status=400)
+        return json_response({"error": "No file uploaded"}, status=400)
 
     start_date = request.POST.get("start_date") or request.GET.get("start_date") or None
     end_date = request.POST.get("end_date") or request.GET.get("end_date") or None
@@ -74,70 +78,65 @@ def upload_dataset(request):
         start_date = start_date.strip() or None
     if end_date and isinstance(end_date, str):
         end_date = end_date.strip() or None
+    linechart_mode = (request.POST.get("linechart_mode") or request.GET.get("linechart_mode") or LINECHART_DEFAULT_MODE).strip().lower()
 
     try:
-        df = read_uploaded_file(file)
+        df = read_uploaded_file(file, sheet=[s for s in request.POST.getlist("sheet") if s.strip()] or None)
         date_col = find_date_col(df)
         if (start_date or end_date) and date_col:
             df = filter_df_by_date(df, start_date=start_date, end_date=end_date, date_column=date_col)
         # KPIs use already-filtered df when upload applied a date range (avoid double filter)
+        ds = prepare_dataset(df)
         kpis = calculate_kpis(
-            df,
+            ds,
             start_date=None if (start_date or end_date) and date_col else start_date,
             end_date=None if (start_date or end_date) and date_col else end_date,
             date_column=date_col or "date",
         )
         payload = {
             "message": "File processed successfully",
-            "source_currency": df.attrs.get("source_currency", "USD"),
+            "source_currency": ds.source_currency,
             **kpis,
         }
 
         # Line chart (revenue, profit, date_data, product_data)
         try:
-            chart = linechart(df)
-            payload["revenue_data"] = chart["revenue_data"]
-            payload["profit_data"] = chart["profit_data"]
-            payload["date_data"] = chart["date_data"]
-            if "orders_data" in chart:
-                payload["orders_data"] = chart["orders_data"]
-            if "product_data" in chart:
-                payload["product_data"] = chart["product_data"]
+            payload.update(linechart(ds, mode=linechart_mode))
         except Exception as e:
             logger.warning("Line chart failed: %s", e, exc_info=True)
 
-        _merge_component(payload, df, "table", table_component, ["top5_profit", "top5_columns"])
-        _merge_component(payload, df, "orders_list", orders_list_component, ["orders_list", "orders_columns"])
-        _merge_component(payload, df, "orders_trend", orders_trend_daily, ["orders_trend"])
-        _merge_component(payload, df, "orders_by_status", orders_by_status_component, ["orders_by_status"])
-        _merge_component(payload, df, "orders_by_channel", orders_by_channel_component, ["orders_by_channel"])
-        _merge_component(payload, df, "orders_by_region", orders_by_region_component, ["orders_by_region"])
-        _merge_component(payload, df, "top_products", top_products_by_orders_component, ["top_products_by_orders"])
-        _merge_component(payload, df, "pie", pie_chart_column, ["pie_column", "pie_data"])
+        _merge_component(payload, ds, "table", table_component, ["top5_profit", "top5_columns"])
+        _merge_component(payload, ds, "orders_list", orders_list_component, ["orders_list", "orders_columns"])
+        _merge_component(payload, ds, "orders_trend", orders_trend_daily, ["orders_trend"])
+        _merge_component(payload, ds, "orders_by_status", orders_by_status_component, ["orders_by_status"])
+        _merge_component(payload, ds, "orders_by_channel", orders_by_channel_component, ["orders_by_channel"])
+        _merge_component(payload, ds, "orders_by_region", orders_by_region_component, ["orders_by_region"])
+        _merge_component(payload, ds, "top_products", top_products_by_orders_component, ["top_products_by_orders"])
+        _merge_component(payload, ds, "pie", pie_chart_column, ["pie_column", "pie_data"])
         # Comparing Bar Chart — current vs previous period sales
         _merge_component(
-            payload, df, "comparison_bar",
+            payload, ds, "comparison_bar",
             comparison_bar_chart,
             ["comparison_bar_labels", "comparison_bar_current",
              "comparison_bar_previous", "comparison_bar_has_previous"],
         )
         # Multi-Line Chart — Revenue, Orders, AOV (server-side AOV calculation)
         _merge_component(
-            payload, df, "multiline",
+            payload, ds, "multiline",
             multiline_chart,
             ["multiline_labels", "multiline_revenue", "multiline_orders", "multiline_aov"],
         )
         # Top 6 Products by Revenue bar chart
-        _merge_component(payload, df, "bar", top_products_by_revenue_chart, ["bar_column", "bar_data"])
+        _merge_component(payload, ds, "bar", top_products_by_revenue_chart, ["bar_column", "bar_data"])
         # Top 6 Products by Profit (used by Profit Composition chart)
-        _merge_component(payload, df, "profit_by_product", profit_by_product_chart, ["profit_by_product_column", "profit_by_product_data"])
+        _merge_component(payload, ds, "profit_by_product", profit_by_product_chart, ["profit_by_product_column", "profit_by_product_data"])
         # Geographic Map — Orders by region
-        _merge_component(payload, df, "map", map_orders_by_region, ["map_column", "map_data"])
+        _merge_component(payload, ds, "map", map_orders_by_region, ["map_column", "map_data"])
 
-        return JsonResponse(payload)
+        return json_response(payload)
 
     except ValueError as e:
-        return JsonResponse({"error": str(e)}, status=400)
+        return json_response({"error": str(e)}, status=400)
     except Exception as e:
         logger.exception("Upload processing failed")
-        return JsonResponse({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
@@ -0,0 +1,92 @@
+"""
+Per-user cache of active-dataset metadata.
+
+login, me and get_active_dataset all need the user's active dataset (id,
+name, currency, row count, timestamps) but not its analytics, so the row is
+looked up once and kept in the Django cache named by ACTIVE_DATASET_CACHE
+(local memory by default; point it at Redis/Memcached to share it between
+processes). UserDataset.save()/delete() and the dataset views drop the entry,
+and again once the surrounding transaction commits so a concurrent request
+cannot re-cache the old row.
+
+Hit/miss counters are kept per process (stats()).
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_KEY = "active_dataset:{}"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _cache():
+    return caches[getattr(settings, "ACTIVE_DATASET_CACHE", "default")]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def dataset_metadata(dataset):
+    """The cached fields of a UserDataset, as a dict."""
+    return {
+        "id": dataset.id,
+        "name": dataset.name,
+        "source_currency": dataset.source_currency,
+        "row_count": dataset.row_count,
+        "uploaded_at": dataset.uploaded_at,
+        "updated_at": dataset.updated_at,
+    }
+
+
+def active_dataset(user_id):
+    """Metadata of the user's active dataset (see dataset_metadata), or None when there is none."""
+    from backend.models import UserDataset
+
+    cache = _cache()
+    key = _KEY.format(user_id)
+    # Wrapped so that "no active dataset" is cached too.
+    entry = cache.get(key)
+    if entry is not None:
+        _count("hits")
+        return entry["dataset"]
+
+    _count("misses")
+    dataset = (
+        UserDataset.objects.filter(user_id=user_id, is_active=True)
+        .only("id", "name", "source_currency", "row_count", "uploaded_at", "updated_at")
+        .first()
+    )
+    meta = dataset_metadata(dataset) if dataset is not None else None
+    cache.set(key, {"dataset": meta}, getattr(settings, "ACTIVE_DATASET_CACHE_TIMEOUT", 60))
+    return meta
+
+
+def invalidate(user_id):
+    """Drop the user's cached entry now and again when the current transaction commits."""
+    key = _KEY.format(user_id)
+    _count("invalidations")
+    _cache().delete(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _cache().delete(key))
+
+
+def stats():
+    """Per-process counters: hits, misses, invalidations and hit_rate."""
+    with _stats_lock:
+        data = dict(_stats)
+    lookups = data["hits"] + data["misses"]
+    data["hit_rate"] = round(data["hits"] / lookups, 4) if lookups else None
+    return data
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,116 @@
+"""
+In-process LRU cache of prepared dataset frames.
+
+Recomputing analytics for a stored dataset (date ranges without a rollup,
+another granularity or top-N) starts with UserDataset.load_prepared(), which
+reads the stored Parquet/CSV copy and parses it again. This cache keeps the
+most recently used PreparedDatasets, keyed by dataset id and updated_at so a
+saved dataset (upload, append, activation) never serves its old rows, and
+evicts the least recently used ones once their total size passes
+FRAME_CACHE_MAX_BYTES (0 disables the cache).
+
+Sizes come from PreparedDataset.memory_usage() and are measured again on every
+hit, because components parse more columns as they use them. Each process has
+its own cache; cached datasets are shared between concurrent requests and, like
+any PreparedDataset, must not be modified.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class FrameCache:
+    """Thread-safe LRU of PreparedDatasets keyed by (dataset id, version), bounded by bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (dataset id, version) -> [prepared, bytes]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get_or_load(self, dataset_id, version, load):
+        """The cached dataset for (dataset_id, version), else load() stored in the cache."""
+        if self.max_bytes <= 0:
+            return load()
+        key = (dataset_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                self._resize(key, entry[0].memory_usage())
+                return entry[0]
+            self._stats["misses"] += 1
+
+        # Loading happens outside the lock; two requests missing at once both load.
+        prepared = load()
+        nbytes = prepared.memory_usage()
+        with self._lock:
+            # Older versions of the dataset can no longer be asked for.
+            self._discard(lambda k: k[0] == dataset_id and k != key)
+            if key not in self._entries:
+                self._entries[key] = [prepared, 0]
+            self._resize(key, nbytes)
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else prepared
+
+    def _resize(self, key, nbytes):
+        """Record key's size, then evict least recently used entries (key itself last) while over budget."""
+        entry = self._entries[key]
+        self._bytes += nbytes - entry[1]
+        entry[1] = nbytes
+        while self._bytes > self.max_bytes:
+            victim = next((k for k in self._entries if k != key), key)
+            self._bytes -= self._entries.pop(victim)[1]
+            self._stats["evictions"] += 1
+            if victim == key:
+                break
+
+    def _discard(self, match):
+        removed = 0
+        for key in [k for k in self._entries if match(k)]:
+            self._bytes -= self._entries.pop(key)[1]
+            removed += 1
+        return removed
+
+    def invalidate(self, dataset_id):
+        """Drop every cached version of a dataset."""
+        with self._lock:
+            self._stats["invalidations"] += self._discard(lambda k: k[0] == dataset_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """hits, misses, evictions, invalidations, hit_rate, entries, bytes and max_bytes."""
+        with self._lock:
+            data = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        lookups = data["hits"] + data["misses"]
+        data["hit_rate"] = round(data["hits"] / lookups, 4) if lookups else None
+        return data
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide FrameCache sized by FRAME_CACHE_MAX_BYTES."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FrameCache(getattr(settings, "FRAME_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        return _cache
+
+
+def invalidate(dataset_id):
+    get_cache().invalidate(dataset_id)
+
+
+def stats():
+    return get_cache().stats()
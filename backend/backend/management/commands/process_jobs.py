@@ -0,0 +1,30 @@
+"""
+Drain queued upload jobs: python manage.py process_jobs [--loop] [--interval 2]
+
+The web process runs jobs on its own thread pool; this command picks up jobs left
+queued after a restart, requeues (or fails) jobs left running by a worker that
+died (ANALYTICS_JOB_TIMEOUT), or can run as a dedicated worker process with --loop.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.api.jobs import run_queued
+
+
+class Command(BaseCommand):
+    help = "Run queued dataset processing jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_queued()
+            if count:
+                self.stdout.write(f"Processed {count} job(s)")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:47
+
+import backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='columnar_file',
+            field=models.FileField(blank=True, help_text='Normalized Parquet copy of the upload (skips CSV parsing on recompute)', null=True, upload_to=backend.models.user_csv_upload_path),
+        ),
+    ]
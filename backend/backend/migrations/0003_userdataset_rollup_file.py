@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:49
+
+import backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_userdataset_columnar_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='rollup_file',
+            field=models.FileField(blank=True, help_text='Per-day Parquet rollup used to answer date-range queries', null=True, upload_to=backend.models.user_csv_upload_path),
+        ),
+    ]
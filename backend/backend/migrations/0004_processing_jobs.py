@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_userdataset_rollup_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='Processing state of the upload; analytics_json is filled once ready', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='userdataset',
+            name='analytics_json',
+            field=models.JSONField(default=dict, help_text='Pre-computed analytics payload returned to the frontend'),
+        ),
+        migrations.CreateModel(
+            name='ProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=16)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='0-100')),
+                ('stage', models.CharField(blank=True, default='', max_length=64)),
+                ('params', models.JSONField(default=dict, help_text='Upload options: start_date, end_date, linechart_mode')),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='backend.userdataset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
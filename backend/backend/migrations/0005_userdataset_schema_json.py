@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_processing_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='schema_json',
+            field=models.JSONField(blank=True, default=dict, help_text='Column roles detected at upload (SchemaProfile.to_dict())'),
+        ),
+    ]
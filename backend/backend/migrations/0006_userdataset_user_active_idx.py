@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_userdataset_schema_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userdataset',
+            index=models.Index(fields=['user', 'is_active'], name='userdataset_user_active_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Payload key -> component, frozen from backend.api.dataset_views at the time
+# of this migration; unlisted keys belong to "summary".
+KEY_COMPONENTS = {
+    "revenue_data": "linechart", "profit_data": "linechart", "date_data": "linechart",
+    "product_data": "linechart", "orders_data": "linechart",
+    "linechart_mode": "linechart", "linechart_granularity": "linechart",
+    "top5_profit": "table", "top5_columns": "table",
+    "orders_list": "orders_list", "orders_columns": "orders_list",
+    "orders_trend": "orders_trend",
+    "orders_by_status": "orders_by_status",
+    "orders_by_channel": "orders_by_channel",
+    "orders_by_region": "orders_by_region",
+    "top_products_by_orders": "top_products",
+    "pie_column": "pie", "pie_data": "pie",
+    "comparison_bar_labels": "comparison_bar", "comparison_bar_current": "comparison_bar",
+    "comparison_bar_previous": "comparison_bar", "comparison_bar_has_previous": "comparison_bar",
+    "multiline_labels": "multiline", "multiline_revenue": "multiline",
+    "multiline_orders": "multiline", "multiline_aov": "multiline",
+    "bar_column": "bar", "bar_data": "bar",
+    "profit_by_product_column": "profit_by_product", "profit_by_product_data": "profit_by_product",
+    "map_column": "map", "map_data": "map",
+}
+
+
+def split_analytics_json(apps, schema_editor):
+    UserDataset = apps.get_model("backend", "UserDataset")
+    DatasetComponent = apps.get_model("backend", "DatasetComponent")
+    for dataset in UserDataset.objects.exclude(analytics_json={}).iterator():
+        parts = {}
+        for key, value in (dataset.analytics_json or {}).items():
+            parts.setdefault(KEY_COMPONENTS.get(key, "summary"), {})[key] = value
+        DatasetComponent.objects.bulk_create(
+            DatasetComponent(dataset=dataset, name=name, data=data) for name, data in parts.items()
+        )
+
+
+def merge_components(apps, schema_editor):
+    UserDataset = apps.get_model("backend", "UserDataset")
+    DatasetComponent = apps.get_model("backend", "DatasetComponent")
+    for dataset in UserDataset.objects.iterator():
+        payload = {}
+        for data in DatasetComponent.objects.filter(dataset=dataset).order_by("id").values_list("data", flat=True):
+            payload.update(data)
+        if payload:
+            dataset.analytics_json = payload
+            dataset.save(update_fields=["analytics_json"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_userdataset_user_active_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetComponent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('data', models.JSONField(default=dict, help_text='Payload keys of this component')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='components', to='backend.userdataset')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'name'), name='datasetcomponent_dataset_name_uniq')],
+            },
+        ),
+        migrations.RunPython(split_analytics_json, merge_components),
+        migrations.RemoveField(
+            model_name='userdataset',
+            name='analytics_json',
+        ),
+        migrations.AlterField(
+            model_name='userdataset',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='Processing state of the upload; components are stored once ready', max_length=16),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_dataset_components'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='analytics_key',
+            field=models.CharField(blank=True, default='', help_text='Hash of the analytics version and upload parameters the analytics were computed with', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='userdataset',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='userdataset',
+            index=models.Index(fields=['user', 'content_hash'], name='userdataset_user_hash_idx'),
+        ),
+    ]
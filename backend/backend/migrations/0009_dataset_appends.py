@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:46
+
+import backend.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_userdataset_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='state_file',
+            field=models.FileField(blank=True, help_text='Saved StreamingAggregator that appended rows are folded into', null=True, upload_to=backend.models.user_csv_upload_path),
+        ),
+        migrations.CreateModel(
+            name='DatasetAppend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Original filename', max_length=255)),
+                ('columnar_file', models.FileField(upload_to=backend.models.append_upload_path)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appends', to='backend.userdataset')),
+            ],
+            options={
+                'ordering': ['uploaded_at', 'id'],
+            },
+        ),
+    ]
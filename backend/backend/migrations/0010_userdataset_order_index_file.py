@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:54
+
+import backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_dataset_appends'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdataset',
+            name='order_index_file',
+            field=models.FileField(blank=True, help_text='Sorted row positions per column used to page through orders', null=True, upload_to=backend.models.user_csv_upload_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_userdataset_order_index_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Times a worker has claimed the job'),
+        ),
+    ]
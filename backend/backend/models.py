@@ -2,12 +2,34 @@ import os
 from django.conf import settings
 from django.db import models
 
+from backend import dataset_cache, frame_cache
+
 
 def user_csv_upload_path(instance, filename):
     return f"datasets/user_{instance.user.id}/{filename}"
 
 
+def append_upload_path(instance, filename):
+    return f"datasets/user_{instance.dataset.user_id}/appends/{filename}"
+
+
+def content_addressed_name(digest, filename):
+    """Upload file name under which identical content is stored once: sha256/<digest><ext>."""
+    return f"sha256/{digest}{os.path.splitext(filename)[1].lower()}"
+
+
 class UserDataset(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -15,8 +37,52 @@ class UserDataset(models.Model):
     )
     name = models.CharField(max_length=255, help_text="Original filename")
     csv_file = models.FileField(upload_to=user_csv_upload_path, blank=True, null=True)
-    analytics_json = models.JSONField(
-        help_text="Pre-computed analytics payload returned to the frontend"
+    columnar_file = models.FileField(
+        upload_to=user_csv_upload_path,
+        blank=True,
+        null=True,
+        help_text="Normalized Parquet copy of the upload (skips CSV parsing on recompute)",
+    )
+    rollup_file = models.FileField(
+        upload_to=user_csv_upload_path,
+        blank=True,
+        null=True,
+        help_text="Per-day Parquet rollup used to answer date-range queries",
+    )
+    state_file = models.FileField(
+        upload_to=user_csv_upload_path,
+        blank=True,
+        null=True,
+        help_text="Saved StreamingAggregator that appended rows are folded into",
+    )
+    order_index_file = models.FileField(
+        upload_to=user_csv_upload_path,
+        blank=True,
+        null=True,
+        help_text="Sorted row positions per column used to page through orders",
+    )
+    schema_json = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Column roles detected at upload (SchemaProfile.to_dict())",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_READY,
+        help_text="Processing state of the upload; components are stored once ready",
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="SHA-256 of the uploaded file",
+    )
+    analytics_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="Hash of the analytics version and upload parameters the analytics were computed with",
     )
     source_currency = models.CharField(max_length=10, default="USD")
     row_count = models.PositiveIntegerField(default=0)
@@ -29,13 +95,253 @@ class UserDataset(models.Model):
 
     class Meta:
         ordering = ["-uploaded_at"]
+        indexes = [
+            # The active-dataset lookup done on every dashboard load.
+            models.Index(fields=["user", "is_active"], name="userdataset_user_active_idx"),
+            # Finding a previous upload of the same file (re-upload deduplication).
+            models.Index(fields=["user", "content_hash"], name="userdataset_user_hash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} — {self.name} ({self.uploaded_at:%Y-%m-%d})"
 
+    def delete_files(self):
+        """
+        Remove the stored upload and its derived files from storage, except
+        files another dataset shares (re-uploads reuse the same files).
+        """
+        for name in ("csv_file", "columnar_file", "rollup_file", "state_file", "order_index_file"):
+            self.delete_unshared_file(name, getattr(self, name).name)
+        for part in self.appends.all():
+            part.columnar_file.delete(save=False)
+
+    def delete_unshared_file(self, field_name, file_name):
+        """Delete file_name (a former value of field_name) unless another dataset stores it."""
+        if not file_name or UserDataset.objects.exclude(pk=self.pk).filter(**{field_name: file_name}).exists():
+            return
+        getattr(self, field_name).storage.delete(file_name)
+
+    def load_frame(self):
+        """
+        Return the dataset as a DataFrame, preferring the Parquet copy.
+
+        Falls back to re-reading csv_file via read_uploaded_file for datasets
+        uploaded before columnar copies existed. Appended rows come last.
+        """
+        from backend.analytics.columnar import concat_columnar
+        from backend.analytics.io import read_uploaded_file
+
+        if self.columnar_file:
+            df = _read_columnar_file(self.columnar_file)
+        elif not self.csv_file:
+            raise ValueError("Dataset has no stored file")
+        else:
+            params = self.jobs.order_by("-created_at").values_list("params", flat=True).first() or {}
+            with self.csv_file.open("rb") as fh:
+                df = read_uploaded_file(fh, sheet=params.get("sheet"))
+        parts = [_read_columnar_file(part.columnar_file) for part in self.appends.all()]
+        if not parts:
+            return df
+        return concat_columnar([df] + parts)
+
+    def schema_profile(self):
+        """Return the stored SchemaProfile, or None for datasets uploaded before profiles existed."""
+        from backend.analytics.schema import SchemaProfile
+
+        if not self.schema_json:
+            return None
+        return SchemaProfile.from_dict(self.schema_json)
+
+    def load_prepared(self):
+        """
+        load_frame() as a PreparedDataset carrying the stored schema profile,
+        from this process's frame_cache when this version was loaded recently.
+        """
+        from backend.analytics.prepared import prepare_dataset
+
+        return frame_cache.get_cache().get_or_load(
+            self.pk,
+            self.updated_at,
+            lambda: prepare_dataset(self.load_frame(), schema=self.schema_profile()),
+        )
+
+    def load_rollup(self):
+        """Return the stored DailyRollup, or None if this dataset has none."""
+        from backend.analytics.rollup import read_rollup
+
+        if not self.rollup_file:
+            return None
+        with self.rollup_file.open("rb") as fh:
+            return read_rollup(fh)
+
+    def load_order_index(self):
+        """Return the stored OrderIndex, or None if there is none (or it is from an older layout)."""
+        from backend.analytics.order_index import read_order_index
+
+        if not self.order_index_file:
+            return None
+        with self.order_index_file.open("rb") as fh:
+            return read_order_index(fh)
+
+    def load_state(self):
+        """
+        Return the saved StreamingAggregator, or None if there is none (or it
+        was saved by an incompatible version or cannot be read).
+        """
+        from backend.analytics.streaming import StreamingAggregator
+
+        if not self.state_file:
+            return None
+        with self.state_file.open("rb") as fh:
+            return StreamingAggregator.from_bytes(fh.read())
+
+    def stored_components(self, names=None):
+        """
+        Stored analytics as {component name: payload part}, in stored order;
+        only the components in names when given. Merging the parts gives the
+        full payload.
+        """
+        return DatasetComponent.parts(self.pk, names)
+
+    def analytics(self):
+        """The full stored analytics payload."""
+        payload = {}
+        for part in self.stored_components().values():
+            payload.update(part)
+        return payload
+
+    def save_components(self, parts):
+        """Replace the stored analytics with parts ({component name: payload part})."""
+        self.components.all().delete()
+        DatasetComponent.objects.bulk_create(
+            DatasetComponent(dataset=self, name=name, data=data) for name, data in parts.items()
+        )
+
     def save(self, *args, **kwargs):
         if self.is_active:
             UserDataset.objects.filter(user=self.user, is_active=True).exclude(
                 pk=self.pk
             ).update(is_active=False)
         super().save(*args, **kwargs)
+        dataset_cache.invalidate(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        dataset_id = self.pk
+        result = super().delete(*args, **kwargs)
+        dataset_cache.invalidate(self.user_id)
+        frame_cache.invalidate(dataset_id)
+        return result
+
+
+def _read_columnar_file(field):
+    from backend.analytics.columnar import read_columnar
+
+    try:
+        return read_columnar(field.path)
+    except NotImplementedError:
+        # Storage without local paths: read through the file object instead.
+        with field.open("rb") as fh:
+            return read_columnar(fh)
+
+
+class DatasetAppend(models.Model):
+    """
+    Rows appended to a dataset after upload (see backend.api.appends), kept as
+    a normalized Parquet part so load_frame() still returns every row.
+    """
+
+    dataset = models.ForeignKey(
+        UserDataset,
+        on_delete=models.CASCADE,
+        related_name="appends",
+    )
+    name = models.CharField(max_length=255, help_text="Original filename")
+    columnar_file = models.FileField(upload_to=append_upload_path)
+    row_count = models.PositiveIntegerField(default=0)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["uploaded_at", "id"]
+
+    def __str__(self):
+        return f"{self.name} appended to dataset {self.dataset_id}"
+
+
+class DatasetComponent(models.Model):
+    """
+    One part of a dataset's pre-computed analytics payload (KPI summary, line
+    chart, orders list, ...), stored separately so requests can load only the
+    parts they need (see dataset_views.split_payload).
+    """
+
+    dataset = models.ForeignKey(
+        UserDataset,
+        on_delete=models.CASCADE,
+        related_name="components",
+    )
+    name = models.CharField(max_length=64)
+    data = models.JSONField(default=dict, help_text="Payload keys of this component")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dataset", "name"], name="datasetcomponent_dataset_name_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} for dataset {self.dataset_id}"
+
+    @classmethod
+    def parts(cls, dataset_id, names=None):
+        """{component name: payload part} of a dataset, in stored order; only names when given."""
+        rows = cls.objects.filter(dataset_id=dataset_id).order_by("id")
+        if names is not None:
+            rows = rows.filter(name__in=names)
+        return dict(rows.values_list("name", "data"))
+
+
+class ProcessingJob(models.Model):
+    """
+    DB-table queue entry for background upload processing (see backend.api.jobs).
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="processing_jobs",
+    )
+    dataset = models.ForeignKey(
+        UserDataset,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True
+    )
+    progress = models.PositiveSmallIntegerField(default=0, help_text="0-100")
+    stage = models.CharField(max_length=64, blank=True, default="")
+    params = models.JSONField(
+        default=dict,
+        help_text="Upload options: start_date, end_date, linechart_mode",
+    )
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker has claimed the job")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) for dataset {self.dataset_id}"
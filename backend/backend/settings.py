@@ -43,6 +43,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ["Server-Timing"]
 
 
 # Application definition
@@ -63,6 +64,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 from datetime import timedelta
@@ -75,6 +80,8 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'backend.api.middleware.ServerTimingMiddleware',
+    'backend.api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -156,3 +163,46 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Background upload processing (backend.api.jobs).
+# When disabled, /api/upload/ processes the file inside the request (201 + payload).
+ANALYTICS_ASYNC_UPLOADS = os.environ.get("ANALYTICS_ASYNC_UPLOADS", "True").lower() in ("true", "1", "yes")
+ANALYTICS_WORKERS = int(os.environ.get("ANALYTICS_WORKERS", "2"))
+# Jobs still "running" this many seconds after they started are taken to have
+# lost their worker (e.g. a restart): process_jobs requeues them, or marks them
+# failed after ANALYTICS_JOB_MAX_ATTEMPTS claims. 0 disables the check. Keep it
+# above the longest upload, or a slow job may be started a second time.
+ANALYTICS_JOB_TIMEOUT = int(os.environ.get("ANALYTICS_JOB_TIMEOUT", "3600"))
+ANALYTICS_JOB_MAX_ATTEMPTS = int(os.environ.get("ANALYTICS_JOB_MAX_ATTEMPTS", "2"))
+# CSV uploads at least this large are processed in chunks (bounded memory).
+ANALYTICS_STREAMING_MIN_BYTES = int(os.environ.get("ANALYTICS_STREAMING_MIN_BYTES", str(256 * 1024 * 1024)))
+ANALYTICS_STREAMING_CHUNK_ROWS = int(os.environ.get("ANALYTICS_STREAMING_CHUNK_ROWS", "100000"))
+
+# Analytics components run concurrently (backend.api.components); 0 or 1 runs
+# them one by one in the request thread. A component running longer than its
+# budget (seconds; 0 disables) is dropped and reported in analytics_warnings.
+ANALYTICS_COMPONENT_WORKERS = int(os.environ.get("ANALYTICS_COMPONENT_WORKERS", "4"))
+ANALYTICS_COMPONENT_TIMEOUT = float(os.environ.get("ANALYTICS_COMPONENT_TIMEOUT", "30"))
+# Per-component overrides, e.g. {"orders_list": 60}.
+ANALYTICS_COMPONENT_TIMEOUTS = {}
+
+# Responses at least this large are compressed (backend.api.middleware.CompressionMiddleware):
+# brotli when the client accepts it and the brotli package is installed, else gzip.
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get("RESPONSE_BROTLI_QUALITY", "5"))
+RESPONSE_GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", "4"))
+
+# Caches. Local memory is per process: with several server processes or a
+# separate `process_jobs` worker, use a shared backend (Redis, Memcached) so
+# invalidations reach every process.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "businalyst",
+    }
+}
+# Cache alias and lifetime (seconds) of per-user active-dataset metadata (backend.dataset_cache).
+ACTIVE_DATASET_CACHE = os.environ.get("ACTIVE_DATASET_CACHE", "default")
+ACTIVE_DATASET_CACHE_TIMEOUT = int(os.environ.get("ACTIVE_DATASET_CACHE_TIMEOUT", "60"))
+# In-process LRU of prepared dataset frames for recomputes (backend.frame_cache), in bytes; 0 disables it.
+FRAME_CACHE_MAX_BYTES = int(os.environ.get("FRAME_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
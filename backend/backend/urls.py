@@ -15,7 +15,11 @@ from backend.api.dataset_views import (
     get_active_dataset,
     dataset_history,
     activate_dataset,
+    append_dataset,
+    dataset_orders,
     delete_dataset,
+    get_job,
+    cache_stats,
 )
 from backend.api import views as legacy_views
 
@@ -36,7 +40,11 @@ urlpatterns = [
     path("api/dataset/", get_active_dataset, name="dataset-active"),
     path("api/datasets/", dataset_history, name="dataset-history"),
     path("api/datasets/<int:dataset_id>/activate/", activate_dataset, name="dataset-activate"),
+    path("api/datasets/<int:dataset_id>/append/", append_dataset, name="dataset-append"),
+    path("api/datasets/<int:dataset_id>/orders/", dataset_orders, name="dataset-orders"),
     path("api/datasets/<int:dataset_id>/", delete_dataset, name="dataset-delete"),
+    path("api/jobs/<int:job_id>/", get_job, name="job-status"),
+    path("api/cache/stats/", cache_stats, name="cache-stats"),
 
     # Legacy unauthenticated upload (kept for backwards compat during transition)
     path("upload/", legacy_views.upload_dataset, name="upload-legacy"),
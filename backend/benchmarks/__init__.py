@@ -0,0 +1,3 @@
+"""
+Benchmarks for the analytics pipeline (run from backend/, e.g. python -m benchmarks.bench_prepared).
+"""
@@ -0,0 +1,111 @@
+"""
+Benchmark: sampled / early-exit categorical checks vs full-column scans.
+
+Builds a wide frame of text columns (unique IDs, free text, low-cardinality
+categories, numbers stored as text, mostly-empty columns), checks that
+is_good_categorical / is_bar_chart_categorical agree with the old full-column
+versions on every column, then times the pie and dimension column choice.
+
+Usage (from backend/):
+    python -m benchmarks.bench_categorical --rows 100000 --columns 150
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics import utils
+from backend.analytics.constants import NUMERIC_OR_DATE_LIKE
+from backend.analytics.schema import find_dimension_col, find_pie_col
+
+
+def make_wide_frame(rows, columns, seed=0):
+    """Text columns of assorted cardinality, shaped like read_uploaded_file output."""
+    rng = np.random.default_rng(seed)
+    kinds = ["id", "text", "category", "number", "sparse"]
+    data = {}
+    for i in range(columns):
+        kind = kinds[i % len(kinds)]
+        if kind == "id":
+            values = np.char.add("ID-", rng.permutation(rows).astype(str)).astype(object)
+        elif kind == "text":
+            values = np.char.add("note ", rng.integers(0, rows // 2 + 1, rows).astype(str)).astype(object)
+        elif kind == "category":
+            labels = np.array([f" Group {j} " for j in range(3 + i % 40)], dtype=object)
+            values = labels[rng.integers(0, len(labels), rows)]
+        elif kind == "number":
+            values = rng.gamma(2.0, 50.0, rows).round(2).astype(str).astype(object)
+        else:
+            values = np.full(rows, None, dtype=object)
+            hit = rng.random(rows) < 0.01
+            values[hit] = np.array(["A", "B", "C"], dtype=object)[rng.integers(0, 3, hit.sum())]
+        data[f"{kind}_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def _is_numeric_full(df, col):
+    if pd.api.types.is_numeric_dtype(df[col]):
+        return True
+    s = df[col].dropna().astype(str).str.strip()
+    s = s[s != ""]
+    if len(s) == 0:
+        return True
+    return pd.to_numeric(s, errors="coerce").notna().mean() >= 0.8
+
+
+def _distinct_full(df, col):
+    s = df[col].dropna().astype(str).str.strip()
+    return s[s != ""].nunique()
+
+
+def good_categorical_full(df, col, min_categories=2, max_categories=50):
+    """is_good_categorical as it was: full dropna/astype/strip/nunique per call."""
+    if col in NUMERIC_OR_DATE_LIKE or "date" in col.lower() or _is_numeric_full(df, col):
+        return False
+    return min_categories <= _distinct_full(df, col) <= max_categories
+
+
+def bar_categorical_full(df, col):
+    """is_bar_chart_categorical as it was."""
+    if col in NUMERIC_OR_DATE_LIKE or "date" in col.lower() or _is_numeric_full(df, col):
+        return False
+    return _distinct_full(df, col) >= 2
+
+
+def _time(fn, df):
+    start = time.perf_counter()
+    for col in df.columns:
+        fn(df, col)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--columns", type=int, default=150)
+    args = parser.parse_args()
+
+    df = make_wide_frame(args.rows, args.columns)
+    for col in df.columns:
+        if utils.is_good_categorical(df, col) != good_categorical_full(df, col):
+            raise SystemExit(f"is_good_categorical mismatch on {col!r}")
+        if utils.is_bar_chart_categorical(df, col) != bar_categorical_full(df, col):
+            raise SystemExit(f"is_bar_chart_categorical mismatch on {col!r}")
+
+    print(f"rows={args.rows:,} columns={args.columns} (decisions identical)")
+    base = _time(good_categorical_full, df)
+    fast = _time(utils.is_good_categorical, df)
+    print(f"is_good_categorical, every column:      {base:.3f}s -> {fast:.3f}s  ({base / fast:.1f}x)")
+    base = _time(bar_categorical_full, df)
+    fast = _time(utils.is_bar_chart_categorical, df)
+    print(f"is_bar_chart_categorical, every column: {base:.3f}s -> {fast:.3f}s  ({base / fast:.1f}x)")
+
+    start = time.perf_counter()
+    pie, dimension = find_pie_col(df), find_dimension_col(df)
+    print(f"find_pie_col + find_dimension_col: {time.perf_counter() - start:.3f}s ({pie!r}, {dimension!r})")
+
+
+if __name__ == "__main__":
+    main()
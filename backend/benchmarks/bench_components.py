@@ -0,0 +1,57 @@
+"""
+Benchmark: analytics components run one by one vs on the component thread pool.
+
+Builds the full payload from one PreparedDataset per run (so column parsing is
+included) with ANALYTICS_COMPONENT_WORKERS=1 and =--workers, and checks both
+payloads are identical.
+
+Usage (from backend/):
+    python -m benchmarks.bench_components --rows 2000000 --workers 4
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from django.test.utils import override_settings  # noqa: E402
+
+from backend.analytics import prepare_dataset  # noqa: E402
+from backend.api import components  # noqa: E402
+from backend.api.dataset_views import _build_analytics_payload  # noqa: E402
+
+from .datagen import make_frame  # noqa: E402
+
+
+def _run(df, workers):
+    components._executor = None
+    with override_settings(ANALYTICS_COMPONENT_WORKERS=workers, ANALYTICS_COMPONENT_TIMEOUT=0):
+        ds = prepare_dataset(df)
+        start = time.perf_counter()
+        payload, _ = _build_analytics_payload(ds)
+        return time.perf_counter() - start, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    _run(df.head(1000), 1)  # warm up imports and first-call caches
+    serial, expected = _run(df, 1)
+    parallel, payload = _run(df, args.workers)
+    if payload != expected:
+        raise SystemExit("Payloads differ")
+    print(f"rows={args.rows:,} cpus={os.cpu_count()} (payloads identical)")
+    print(f"sequential:           {serial:.2f}s")
+    print(f"{args.workers} component workers: {parallel:.2f}s  ({serial / parallel:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: vectorized parse_currency_series vs per-cell parse_currency_number.
+
+Builds a column of messy money strings (symbols, codes, parentheses negatives,
+thousands separators, blanks, junk), checks that both parsers agree on every
+cell (NaN for None, sign of zero included), then times each. Also times
+normalize_money_columns against the old per-cell version on a frame whose money
+columns were already read as numbers (now skipped).
+
+Usage (from backend/):
+    python -m benchmarks.bench_currency --rows 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.currency import (
+    _is_money_like_column,
+    normalize_money_columns,
+    parse_currency_number,
+    parse_currency_series,
+)
+
+from .datagen import make_frame
+
+SAMPLES = [
+    "$1,234.50", "(€12.00)", "  42 ", "USD 7", "₹1,00,000", "£0.99", "C$ 3.10",
+    "12,345", "1,234,567.891", ".5", "1.", "-.5", "-5", "(-3)", " (7) ", " (8) ",
+    "(0)", "0", "1.2.3", "1-2", "--1", "-", "()", "(", ".", ",,,", "", "   ", "n/a", "N/A",
+    "1e5", "inf", "nan", "12 345", "¥ 1000", "AUD1,5", "3 EUR", "0001.2300",
+]
+
+
+def make_series(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.array(SAMPLES + [None, np.nan, 12.5, 7], dtype=object)
+    return pd.Series(values[rng.integers(0, len(values), rows)])
+
+
+def normalize_per_cell(df):
+    """normalize_money_columns as it was: apply(parse_currency_number) on every money column."""
+    out = df.copy()
+    for col in out.columns:
+        if _is_money_like_column(col):
+            out[col] = out[col].apply(parse_currency_number)
+    return out
+
+
+def _best(fn, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check(series):
+    expected = series.apply(parse_currency_number).astype(float).to_numpy()
+    actual = parse_currency_series(series).to_numpy()
+    same = np.array_equal(expected, actual, equal_nan=True)
+    same_sign = np.array_equal(np.signbit(expected), np.signbit(actual))
+    if not (same and same_sign):
+        bad = np.flatnonzero(~((expected == actual) | (np.isnan(expected) & np.isnan(actual))))
+        raise SystemExit(f"Mismatch on {series.iloc[bad[:5]].tolist()!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check(pd.Series(SAMPLES + [None, np.nan, 12.5, 7], dtype=object))
+    series = make_series(args.rows)
+    check(series)
+
+    base = _best(lambda s: s.apply(parse_currency_number), series, args.repeat)
+    fast = _best(parse_currency_series, series, args.repeat)
+    print(f"rows={args.rows:,} (results identical)")
+    print(f"apply(parse_currency_number): {base:.3f}s")
+    print(f"parse_currency_series:        {fast:.3f}s  ({base / fast:.1f}x)")
+
+    frame = make_frame(args.rows)
+    base = _best(normalize_per_cell, frame, args.repeat)
+    fast = _best(normalize_money_columns, frame, args.repeat)
+    print(f"normalize_money_columns, numeric money columns: {base:.3f}s -> {fast:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: Excel ingestion, pd.read_excel (the previous path) vs analytics.excel.read_excel.
+
+Writes a workbook of --sheets sheets with the same columns, splitting a
+benchmarks.datagen dataset of --rows rows between them. It checks that
+read_excel returns the frame pd.read_excel does (per sheet, stacked), then
+times:
+  - pd.read_excel, first sheet only (what uploads used to read) and every
+    sheet one after another;
+  - read_excel with --engine ("auto" is what excel_engine() picks:
+    "calamine" when python-calamine is installed, else "openpyxl" read-only
+    values), for the first sheet and for every sheet with 1 and with
+    --workers threads.
+
+The workbook is written with openpyxl's write-only mode, which (unlike Excel)
+declares no sheet dimensions, so both paths scan every sheet once to size it.
+
+Usage (from backend/):
+    python -m benchmarks.bench_excel --rows 100000 --sheets 4
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.excel import ALL_SHEETS, excel_engine, read_excel
+
+from .datagen import make_frame
+
+
+def write_workbook(rows, sheets, seed=0):
+    """.xlsx bytes: make_frame(rows) split over sheets named S1..Sn, with a header row on each."""
+    from openpyxl import Workbook
+
+    df = make_frame(rows, seed=seed)
+    book = Workbook(write_only=True)
+    for i, part in enumerate(np.array_split(np.arange(rows), sheets)):
+        sheet = book.create_sheet(f"S{i + 1}")
+        sheet.append(list(df.columns))
+        for values in df.iloc[part].itertuples(index=False):
+            sheet.append([None if isinstance(v, float) and np.isnan(v) else v for v in values])
+    buf = io.BytesIO()
+    book.save(buf)
+    return buf.getvalue()
+
+
+def _upload(data):
+    f = io.BytesIO(data)
+    f.name = "bench.xlsx"
+    return f
+
+
+def _best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sheets", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--engine", choices=("auto", "openpyxl", "calamine"), default="auto")
+    args = parser.parse_args()
+
+    engine = excel_engine("bench.xlsx") if args.engine == "auto" else args.engine
+    start = time.perf_counter()
+    data = write_workbook(args.rows, args.sheets)
+    print(
+        f"rows={args.rows:,} sheets={args.sheets} xlsx={len(data) / 1e6:.1f} MB "
+        f"(written in {time.perf_counter() - start:.1f}s), engine={engine}"
+    )
+
+    base_first, expected_first = _best(lambda: pd.read_excel(io.BytesIO(data)), args.repeat)
+    base_all, expected_all = _best(
+        lambda: pd.concat(pd.read_excel(io.BytesIO(data), sheet_name=None).values(), ignore_index=True), args.repeat
+    )
+    fast_first, first = _best(lambda: read_excel(_upload(data), sheet="S1", engine=engine), args.repeat)
+    serial_all, serial = _best(lambda: read_excel(_upload(data), sheet=ALL_SHEETS, engine=engine, workers=1), args.repeat)
+    fast_all, parallel = _best(lambda: read_excel(_upload(data), sheet=ALL_SHEETS, engine=engine, workers=args.workers), args.repeat)
+
+    pd.testing.assert_frame_equal(first, expected_first)
+    for frame in (serial, parallel):
+        pd.testing.assert_frame_equal(frame, expected_all)
+
+    print(f"first sheet: pd.read_excel {base_first:.2f}s -> read_excel {fast_first:.2f}s ({base_first / fast_first:.1f}x)")
+    print(
+        f"all sheets:  pd.read_excel {base_all:.2f}s -> read_excel {serial_all:.2f}s with 1 worker "
+        f"({base_all / serial_all:.1f}x), {fast_all:.2f}s with {args.workers} ({base_all / fast_all:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: shared PreparedDataset vs per-component parsing.
+
+Runs every analytics component twice on the same synthetic frame: once handing
+each component the raw DataFrame (so each parses dates/measures/dimensions on its
+own, as before), and once with a single prepare_dataset() shared by all.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prepared --rows 2000000
+"""
+
+import argparse
+import time
+
+from backend.analytics import (
+    prepare_dataset,
+    calculate_kpis,
+    linechart,
+    comparison_bar_chart,
+    multiline_chart,
+    top_products_by_revenue_chart,
+    profit_by_product_chart,
+    pie_chart_column,
+    map_orders_by_region,
+    table_component,
+    orders_list_component,
+    orders_trend_daily,
+    orders_by_status_component,
+    orders_by_channel_component,
+    orders_by_region_component,
+    top_products_by_orders_component,
+)
+
+from .datagen import make_frame
+
+COMPONENTS = [
+    calculate_kpis,
+    linechart,
+    table_component,
+    orders_list_component,
+    orders_trend_daily,
+    orders_by_status_component,
+    orders_by_channel_component,
+    orders_by_region_component,
+    top_products_by_orders_component,
+    pie_chart_column,
+    comparison_bar_chart,
+    multiline_chart,
+    top_products_by_revenue_chart,
+    profit_by_product_chart,
+    map_orders_by_region,
+]
+
+
+def _run(data):
+    for fn in COMPONENTS:
+        fn(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    timings = {"per-component": [], "prepared": []}
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        _run(df)
+        timings["per-component"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _run(prepare_dataset(df))
+        timings["prepared"].append(time.perf_counter() - start)
+
+    base = min(timings["per-component"])
+    fast = min(timings["prepared"])
+    print(f"rows={args.rows:,}")
+    print(f"per-component parsing: {base:.3f}s")
+    print(f"shared prepared:       {fast:.3f}s  ({base / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: JSON encoding and response compression of a large analytics payload.
+
+Builds the full payload with linechart_mode="per_row" (one point per row, the
+largest numeric arrays the API sends), encodes it with DRF's stdlib-based
+JSONRenderer and with ORJSONRenderer, checks both decode to the same data,
+then compresses the orjson output with gzip and brotli (when installed) at a
+few levels, as CompressionMiddleware would, and reports bytes on the wire.
+
+Usage (from backend/):
+    python -m benchmarks.bench_render --rows 200000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from backend.analytics import prepare_dataset  # noqa: E402
+from backend.api import middleware  # noqa: E402
+from backend.api.dataset_views import _build_analytics_payload  # noqa: E402
+from backend.api.renderers import ORJSONRenderer, orjson  # noqa: E402
+
+from .datagen import make_frame  # noqa: E402
+
+
+def _best(fn, repeat):
+    """(best seconds over repeat calls, last result)."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload, _ = _build_analytics_payload(prepare_dataset(make_frame(args.rows)), linechart_mode="per_row")
+    stdlib_s, stdlib_body = _best(lambda: JSONRenderer().render(payload), args.repeat)
+    fast_s, fast_body = _best(lambda: ORJSONRenderer().render(payload), args.repeat)
+    if json.loads(stdlib_body) != json.loads(fast_body):
+        raise SystemExit("Encoded payloads differ")
+
+    print(f"rows={args.rows:,} (decoded payloads identical; orjson {'installed' if orjson else 'missing'})")
+    print(f"{'encoder':<22} {'time':>9} {'bytes':>13}")
+    print(f"{'stdlib JSONRenderer':<22} {stdlib_s:8.3f}s {len(stdlib_body):13,}")
+    print(f"{'ORJSONRenderer':<22} {fast_s:8.3f}s {len(fast_body):13,}  ({stdlib_s / fast_s:.1f}x)")
+
+    print(f"\n{'wire encoding':<22} {'time':>9} {'bytes':>13}")
+    print(f"{'identity':<22} {0:8.3f}s {len(fast_body):13,}")
+    for level in (1, 4, 6):
+        gzip_s, gzipped = _best(lambda: middleware.gzip_compress(fast_body, level), args.repeat)
+        label = f"gzip level={level}"
+        print(f"{label:<22} {gzip_s:8.3f}s {len(gzipped):13,}  ({len(fast_body) / len(gzipped):.1f}x smaller)")
+    if middleware.brotli is not None:
+        for quality in (4, 5, 8):
+            br_s, br = _best(lambda: middleware.brotli.compress(fast_body, quality=quality), args.repeat)
+            label = f"brotli q={quality}"
+            print(f"{label:<22} {br_s:8.3f}s {len(br):13,}  ({len(fast_body) / len(br):.1f}x smaller)")
+    else:
+        print("brotli                 (not installed)")
+
+
+if __name__ == "__main__":
+    main()
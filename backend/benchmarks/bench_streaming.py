@@ -0,0 +1,76 @@
+"""
+Benchmark: whole-file read vs chunked streaming ingestion (time and peak memory).
+
+Writes a synthetic CSV, then builds the analytics components twice: once with
+read_uploaded_file + prepare_dataset (whole file in memory), and once with
+aggregate_csv reading --chunk-rows rows at a time. Peak memory is measured with
+tracemalloc (numpy/pandas buffers included).
+
+Usage (from backend/):
+    python -m benchmarks.bench_streaming --rows 2000000 --chunk-rows 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from backend.analytics import prepare_dataset, read_uploaded_file
+from backend.analytics.streaming import DEFAULT_CHUNK_ROWS, StreamingAggregator, aggregate_csv
+
+from .bench_prepared import COMPONENTS
+from .datagen import make_frame
+
+STREAMING_COMPONENTS = [
+    "kpis", "linechart", "table", "orders_list", "orders_trend", "orders_by_status",
+    "orders_by_channel", "orders_by_region", "top_products", "pie", "comparison_bar",
+    "multiline", "bar", "profit_by_product", "map",
+]
+
+
+def _in_memory(path):
+    with open(path, "rb") as fh:
+        ds = prepare_dataset(read_uploaded_file(fh))
+    for fn in COMPONENTS:
+        fn(ds)
+
+
+def _streaming(path, chunk_rows):
+    with open(path, "rb") as fh:
+        aggregator, _ = aggregate_csv(fh, chunk_rows=chunk_rows)
+    for name in STREAMING_COMPONENTS:
+        getattr(StreamingAggregator, name)(aggregator)
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        make_frame(args.rows).to_csv(path, index=False)
+        size_mb = os.path.getsize(path) / 1e6
+
+        full_time, full_peak = _measure(_in_memory, path)
+        stream_time, stream_peak = _measure(_streaming, path, args.chunk_rows)
+
+    print(f"rows={args.rows:,} csv={size_mb:.0f} MB chunk_rows={args.chunk_rows:,}")
+    print(f"whole file: {full_time:.2f}s  peak {full_peak / 1e6:.0f} MB")
+    print(f"streaming:  {stream_time:.2f}s  peak {stream_peak / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
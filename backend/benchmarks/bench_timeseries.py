@@ -0,0 +1,82 @@
+"""
+Benchmark: time series from the rows (daily_base) vs from the daily rollup.
+
+Builds a synthetic frame whose "net revenue" column comes before "revenue", so
+the schema's amount column (the time series' revenue) is not the column the
+KPIs sum. Checks that time_series gives the same result at every granularity,
+for the whole data and a sub-range, whether its DailyBase comes from the rows
+or from a DailyRollup (DailyBase.from_totals), then times both paths.
+
+Usage (from backend/):
+    python -m benchmarks.bench_timeseries --rows 1000000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from backend.analytics import filter_by_date, prepare_dataset
+from backend.analytics.rollup import build_daily_rollup
+from backend.analytics.timeseries import GRANULARITIES, DailyBase, daily_base, time_series
+
+from .datagen import make_frame
+
+RANGE = ("2022-03-10", "2023-02-20")
+
+
+def make_dataset(rows):
+    """PreparedDataset with "net revenue" (90% of revenue) placed before "revenue"."""
+    df = make_frame(rows)
+    df.insert(df.columns.get_loc("revenue"), "net revenue", (df["revenue"] * 0.9).round(2))
+    return prepare_dataset(df)
+
+
+def _best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ds = make_dataset(args.rows)
+    if ds.schema.amount != "net revenue":
+        raise SystemExit(f"expected the amount column to be 'net revenue', got {ds.schema.amount!r}")
+    rollup = build_daily_rollup(ds)
+    subset = filter_by_date(ds, *RANGE)
+    for granularity in GRANULARITIES:
+        for label, rows_base, rollup_base in (
+            ("all", daily_base(ds), DailyBase.from_totals(rollup.totals())),
+            ("range", daily_base(subset), DailyBase.from_totals(rollup.between(*RANGE).totals())),
+        ):
+            if time_series(rows_base, granularity) != time_series(rollup_base, granularity):
+                raise SystemExit(f"time_series mismatch: {granularity}, {label}")
+
+    def from_rows():
+        fresh = prepare_dataset(ds.frame, schema=ds.schema)
+        base = daily_base(fresh)
+        return [time_series(base, g) for g in GRANULARITIES]
+
+    def from_rollup():
+        base = DailyBase.from_totals(rollup.totals())
+        return [time_series(base, g) for g in GRANULARITIES]
+
+    rows_time = _best(from_rows, args.repeat)
+    rollup_time = _best(from_rollup, args.repeat)
+    days = len(pd.unique(rollup.table["day"]))
+    print(
+        f"rows={args.rows:,} days={days:,}: every granularity from rows {rows_time:.3f}s"
+        f" -> from rollup {rollup_time:.4f}s  {rows_time / rollup_time:.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
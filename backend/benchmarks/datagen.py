@@ -0,0 +1,164 @@
+"""
+Deterministic synthetic sales datasets for benchmarks.
+
+DatasetSpec describes the shape (rows, cardinalities, date format, currency
+formatting); generate_frame builds it as a DataFrame shaped like
+read_uploaded_file output, and write_csv streams it to a CSV in chunks so
+10M-row files never sit in memory at once. The same spec and seed always
+give the same data.
+
+Usage (from backend/):
+    python -m benchmarks.datagen --rows 1000000 --currency EUR --date-format %Y-%m-%d -o sales.csv
+"""
+
+import argparse
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.constants import REGION_COORDS
+
+CURRENCY_SYMBOLS = {
+    "USD": "$", "EUR": "€", "GBP": "£", "INR": "₹",
+    "JPY": "¥", "CAD": "C$", "AUD": "A$",
+}
+CATEGORY_NAMES = ["Office", "Tech", "Furniture", "Garden", "Toys", "Grocery", "Sports", "Beauty"]
+STATUS_NAMES = ["Delivered", "Shipped", "Pending", "Returned", "Cancelled", "Processing"]
+CHANNEL_NAMES = ["Online", "Retail", "Partner", "Marketplace", "Phone", "Wholesale"]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """
+    Shape of a synthetic sales dataset.
+
+    - rows / seed: size and random seed.
+    - products / categories / regions / statuses / channels: distinct values per column.
+    - days / start / date_format: order dates drawn from `days` days from `start`,
+      written with date_format (strftime).
+    - currency: None writes money columns as numbers; a code (USD, EUR, ...)
+      writes them as text, "$1,234.50" (currency_style="symbol") or
+      "1,234.50 USD" ("code"), negatives in parentheses.
+    - order_ids: add a unique "order id" column.
+    - missing_rate: share of blanks in each text column.
+    """
+
+    rows: int = 100_000
+    seed: int = 0
+    products: int = 200
+    categories: int = 4
+    regions: int = 4
+    statuses: int = 4
+    channels: int = 3
+    days: int = 730
+    start: str = "2022-01-01"
+    date_format: str = "%d-%m-%Y"
+    currency: Optional[str] = None
+    currency_style: str = "symbol"
+    order_ids: bool = False
+    missing_rate: float = 0.0
+
+
+def _labels(names, n, prefix):
+    """n distinct labels: names first, then "<prefix> <i>"."""
+    return np.array(list(names[:n]) + [f"{prefix} {i}" for i in range(len(names), n)], dtype=object)
+
+
+def _pick(rng, labels, rows, missing_rate):
+    values = labels[rng.integers(0, len(labels), rows)]
+    if missing_rate:
+        values[rng.random(rows) < missing_rate] = None
+    return values
+
+
+def _format_money(values, currency, style):
+    text = pd.Series(np.abs(values)).map("{:,.2f}".format)
+    if style == "code":
+        text = text + f" {currency}"
+    else:
+        text = CURRENCY_SYMBOLS[currency] + text
+    negative = values < 0
+    text[negative] = "(" + text[negative] + ")"
+    return text.to_numpy(dtype=object)
+
+
+def generate_frame(spec, offset=0):
+    """
+    DataFrame for spec. offset numbers the rows (order ids) and seeds the
+    block, so write_csv can build a file block by block.
+    """
+    rng = np.random.default_rng([spec.seed, offset])
+    rows = spec.rows
+    days = pd.date_range(spec.start, periods=spec.days, freq="D").strftime(spec.date_format).to_numpy()
+    regions = [name.title() for name in REGION_COORDS]
+
+    revenue = rng.gamma(2.0, 150.0, rows).round(2)
+    expense = (revenue * rng.uniform(0.6, 1.1, rows)).round(2)
+    profit = (revenue - expense).round(2)
+
+    data = {}
+    if spec.order_ids:
+        data["order id"] = np.char.add("ORD-", np.arange(offset, offset + rows).astype(str)).astype(object)
+    data.update({
+        "order date": days[rng.integers(0, len(days), rows)],
+        "product name": _pick(rng, _labels([], spec.products, "Product"), rows, spec.missing_rate),
+        "category": _pick(rng, _labels(CATEGORY_NAMES, spec.categories, "Category"), rows, spec.missing_rate),
+        "region": _pick(rng, _labels(regions, spec.regions, "Region"), rows, spec.missing_rate),
+        "status": _pick(rng, _labels(STATUS_NAMES, spec.statuses, "Status"), rows, spec.missing_rate),
+        "channel": _pick(rng, _labels(CHANNEL_NAMES, spec.channels, "Channel"), rows, spec.missing_rate),
+        "orders": rng.integers(1, 10, rows),
+        "revenue": revenue,
+        "expense": expense,
+        "profit": profit,
+    })
+    if spec.currency:
+        for col in ("revenue", "expense", "profit"):
+            data[col] = _format_money(data[col], spec.currency, spec.currency_style)
+    return pd.DataFrame(data)
+
+
+def make_frame(rows, seed=0):
+    """Default-spec frame of `rows` rows (numeric money columns, dd-mm-YYYY dates)."""
+    return generate_frame(DatasetSpec(rows=rows, seed=seed))
+
+
+def write_csv(spec, path, chunk_rows=1_000_000):
+    """Write spec as a CSV at path, generating chunk_rows rows at a time."""
+    for offset in range(0, spec.rows, chunk_rows):
+        block = replace(spec, rows=min(chunk_rows, spec.rows - offset))
+        first = offset == 0
+        generate_frame(block, offset=offset).to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--rows", type=int, default=DatasetSpec.rows)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    parser.add_argument("--products", type=int, default=DatasetSpec.products)
+    parser.add_argument("--categories", type=int, default=DatasetSpec.categories)
+    parser.add_argument("--regions", type=int, default=DatasetSpec.regions)
+    parser.add_argument("--statuses", type=int, default=DatasetSpec.statuses)
+    parser.add_argument("--channels", type=int, default=DatasetSpec.channels)
+    parser.add_argument("--days", type=int, default=DatasetSpec.days)
+    parser.add_argument("--date-format", default=DatasetSpec.date_format)
+    parser.add_argument("--currency", choices=sorted(CURRENCY_SYMBOLS))
+    parser.add_argument("--currency-style", choices=["symbol", "code"], default=DatasetSpec.currency_style)
+    parser.add_argument("--order-ids", action="store_true")
+    parser.add_argument("--missing-rate", type=float, default=DatasetSpec.missing_rate)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(
+        rows=args.rows, seed=args.seed, products=args.products, categories=args.categories,
+        regions=args.regions, statuses=args.statuses, channels=args.channels, days=args.days,
+        date_format=args.date_format, currency=args.currency, currency_style=args.currency_style,
+        order_ids=args.order_ids, missing_rate=args.missing_rate,
+    )
+    write_csv(spec, args.output)
+    print(f"wrote {spec.rows:,} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
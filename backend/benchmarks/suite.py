@@ -0,0 +1,237 @@
+"""
+Benchmark suite: time and peak memory of every analytics stage, checked against baselines.
+
+For each --rows size, builds a dataset with benchmarks.datagen (USD-formatted
+money columns, so currency parsing is exercised) and measures:
+read_uploaded_file, detect_source_currency, normalize_money_columns,
+prepare_dataset, detect_schema, calculate_kpis, every component,
+build_daily_rollup, rollup_payload, write_columnar / read_columnar,
+aggregate_csv and the full _build_analytics_payload.
+
+Time is the best of --repeat runs; peak memory is a separate tracemalloc run.
+Components each get a fresh PreparedDataset, so their own column parsing is
+included. Results are compared with --baseline and the exit status is 1 when
+a case is slower or larger than the tolerance allows; --save-baseline
+records the current numbers instead. Baselines are machine-specific, so
+benchmarks/baselines.json is not committed: record it with --save-baseline
+on the machine that runs the comparison (a baseline from another machine or
+Python/pandas version is reported). Without one, only the budgets below apply.
+
+Memory is also held to MEMORY_BUDGETS, which do not depend on the machine
+or a baseline: the resident size of the frame read_uploaded_file returns
+("frame") and the peaks of the listed cases must stay under a fixed
+allowance plus a number of bytes per row. Going over fails the run, with or
+without --save-baseline.
+
+Usage (from backend/):
+    python -m benchmarks.suite --rows 10000 100000
+    python -m benchmarks.suite --rows 10000 100000 --save-baseline
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+django.setup()
+
+import pandas as pd  # noqa: E402
+
+from backend.analytics import prepare_dataset, read_uploaded_file  # noqa: E402
+from backend.analytics.columnar import read_columnar, write_columnar  # noqa: E402
+from backend.analytics.currency import detect_source_currency, normalize_money_columns  # noqa: E402
+from backend.analytics.kpis import calculate_kpis  # noqa: E402
+from backend.analytics.rollup import build_daily_rollup, rollup_payload  # noqa: E402
+from backend.analytics.schema import detect_schema  # noqa: E402
+from backend.analytics.streaming import aggregate_csv  # noqa: E402
+from backend.api.dataset_views import _build_analytics_payload  # noqa: E402
+
+from .bench_prepared import COMPONENTS  # noqa: E402
+from .datagen import DatasetSpec, generate_frame  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Differences below these are noise, whatever the tolerance.
+MIN_SECONDS_DELTA = 0.005
+MIN_PEAK_MB_DELTA = 1.0
+# (fixed MB, bytes per row) each case may use at most; "frame" is the deep
+# memory_usage of the frame read_uploaded_file returns.
+MEMORY_BUDGETS = {
+    "frame": (1.0, 160),
+    "read_uploaded_file": (4.0, 600),
+    "_build_analytics_payload": (4.0, 400),
+}
+
+
+def _csv_file(data):
+    f = io.BytesIO(data)
+    f.name = "bench.csv"
+    return f
+
+
+def _raw_frame(data):
+    df = pd.read_csv(_csv_file(data))
+    df.columns = df.columns.str.lower().str.strip()
+    return df
+
+
+def build_cases(rows, seed=0):
+    """
+    (cases, frame) for a dataset of `rows` rows: cases holds (name, setup, fn)
+    per stage, where setup() builds fn's argument outside the measurement and
+    runs before every call; frame is the read_uploaded_file result.
+    """
+    spec = DatasetSpec(rows=rows, seed=seed, currency="USD", order_ids=True)
+    data = generate_frame(spec).to_csv(index=False).encode()
+    raw = _raw_frame(data)
+    df = read_uploaded_file(_csv_file(data))
+    rollup = build_daily_rollup(prepare_dataset(df))
+    columnar = write_columnar(df)
+
+    def fresh():
+        return prepare_dataset(df)
+
+    cases = [
+        ("read_uploaded_file", lambda: _csv_file(data), read_uploaded_file),
+        ("detect_source_currency", lambda: raw, detect_source_currency),
+        ("normalize_money_columns", lambda: raw, normalize_money_columns),
+        ("prepare_dataset", lambda: df, prepare_dataset),
+        ("detect_schema", lambda: df, detect_schema),
+        ("calculate_kpis", fresh, calculate_kpis),
+    ]
+    cases += [(fn.__name__, fresh, fn) for fn in COMPONENTS if fn is not calculate_kpis]
+    cases += [
+        ("build_daily_rollup", fresh, build_daily_rollup),
+        ("rollup_payload", lambda: rollup.between(None, None), rollup_payload),
+        ("write_columnar", lambda: df, write_columnar),
+        ("read_columnar", lambda: io.BytesIO(columnar), read_columnar),
+        ("aggregate_csv", lambda: _csv_file(data), aggregate_csv),
+        ("_build_analytics_payload", fresh, _build_analytics_payload),
+    ]
+    return cases, df
+
+
+def measure(setup, fn, repeat):
+    """(best seconds over repeat runs, peak traced MB of one run)."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    arg = setup()
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1e6
+
+
+def compare(result, base, time_tolerance, memory_tolerance):
+    """Regression messages for one case (empty when within tolerance or no baseline)."""
+    if not base:
+        return []
+    problems = []
+    seconds, peak = result["seconds"], result["peak_mb"]
+    if seconds > base["seconds"] * (1 + time_tolerance) and seconds - base["seconds"] > MIN_SECONDS_DELTA:
+        problems.append(f"time {base['seconds']:.4f}s -> {seconds:.4f}s")
+    if peak > base["peak_mb"] * (1 + memory_tolerance) and peak - base["peak_mb"] > MIN_PEAK_MB_DELTA:
+        problems.append(f"peak {base['peak_mb']:.1f} MB -> {peak:.1f} MB")
+    return problems
+
+
+def over_budget(name, peak_mb, rows):
+    """Budget message when name used more than MEMORY_BUDGETS allows, else None."""
+    if name not in MEMORY_BUDGETS:
+        return None
+    fixed_mb, bytes_per_row = MEMORY_BUDGETS[name]
+    limit = fixed_mb + bytes_per_row * rows / 1e6
+    if peak_mb > limit:
+        return f"{peak_mb:.1f} MB over budget {limit:.1f} MB ({fixed_mb:g} MB + {bytes_per_row} B/row)"
+    return None
+
+
+def _meta():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline.get("meta") != _meta():
+            print(f"note: {args.baseline} was recorded on {baseline.get('meta')}, not {_meta()}")
+    elif not args.save_baseline:
+        print(f"note: no baseline at {args.baseline}; checking memory budgets only (record one with --save-baseline)")
+    results = {}
+    regressions = []
+    over = []
+    for rows in args.rows:
+        size = results.setdefault(str(rows), {})
+        print(f"rows={rows:,}")
+        cases, frame = build_cases(rows)
+        frame_mb = frame.memory_usage(deep=True).sum() / 1e6
+        problem = over_budget("frame", frame_mb, rows)
+        over += [f"frame @ {rows:,} rows: {problem}"] if problem else []
+        print(f"  {'frame':<36} {'':>10} {frame_mb:9.1f} MB{'  OVER BUDGET' if problem else ''}")
+        for name, setup, fn in cases:
+            if args.only and args.only not in name:
+                continue
+            seconds, peak = measure(setup, fn, args.repeat)
+            size[name] = {"seconds": round(seconds, 5), "peak_mb": round(peak, 2)}
+            base = baseline.get("results", {}).get(str(rows), {}).get(name)
+            problems = compare(size[name], base, args.time_tolerance, args.memory_tolerance)
+            regressions += [f"{name} @ {rows:,} rows: {p}" for p in problems]
+            problem = over_budget(name, peak, rows)
+            over += [f"{name} @ {rows:,} rows: {problem}"] if problem else []
+            mark = ("  REGRESSION" if problems else "") + ("  OVER BUDGET" if problem else "")
+            print(f"  {name:<36} {seconds:9.4f}s {peak:9.1f} MB{mark}")
+
+    if over:
+        print("\nMemory budgets exceeded")
+        for line in over:
+            print(" ", line)
+
+    if args.save_baseline:
+        merged = baseline.get("results", {})
+        for rows, cases in results.items():
+            merged.setdefault(rows, {}).update(cases)
+        with open(args.baseline, "w") as fh:
+            json.dump({"meta": _meta(), "results": merged}, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        if over:
+            raise SystemExit(1)
+        return
+
+    if regressions:
+        print("\nRegressions against", args.baseline)
+        for line in regressions:
+            print(" ", line)
+    if regressions or over:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
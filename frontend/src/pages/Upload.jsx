@@ -8,6 +8,8 @@ import { KpiContext } from '../context/KpiContext'
 import { useAuth } from '../context/AuthContext'
 import './Upload.css'
 
+const JOB_POLL_INTERVAL_MS = 1000
+
 const Upload = () => {
   const [selectedFile, setSelectedFile] = useState(null)
   const [isUploading, setIsUploading] = useState(false)
@@ -23,6 +25,17 @@ const Upload = () => {
     setUploadSuccess(false)
   }
 
+  const waitForJob = async (jobId) => {
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+      const res = await authFetch(`${API_BASE}/api/jobs/${jobId}/`)
+      const job = await res.json()
+      if (!res.ok) return { error: job.error || 'Upload failed' }
+      if (job.status === 'done') return job.result
+      if (job.status === 'failed') return { error: job.error || 'Upload failed' }
+    }
+  }
+
   const handleUpload = async () => {
     if (!selectedFile) return
     setIsUploading(true)
@@ -35,11 +48,19 @@ const Upload = () => {
         method: 'POST',
         body: formData,
       })
-      const data = await res.json()
+      let data = await res.json()
       if (!res.ok) {
         setError(data.error || 'Upload failed')
         return
       }
+      // 202: processing runs in the background; poll the job until it finishes.
+      if (res.status === 202) {
+        data = await waitForJob(data.job_id)
+        if (data.error) {
+          setError(data.error)
+          return
+        }
+      }
       setKpiData(data)
       setUploadSuccess(true)
     } catch (err) {